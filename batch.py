@@ -0,0 +1,174 @@
+"""Decode and summarize many logs without the GUI (no Qt needed).
+
+    python batch.py "logs/2025/**/*.csv" --summary season.csv
+    python batch.py "logs/*.blf" "logs/*.asc" --workers 8 --export exports
+    python batch.py "logs/*.csv" --export exports --format parquet
+    python batch.py "logs/2025/**/*.csv" --events events.csv
+    python batch.py "logs/*.csv" --profile profile.json
+    python batch.py "archive/**/*.csv.zst" --summary archive.csv
+
+Every log matching the patterns (plain, or compressed with gzip, zstd or
+xz, decompressed as it is read) is decoded in a pool of processes and
+summarized in one row of the summary CSV (canlog.SUMMARY: peak
+temperatures, minimum cell voltage, energy, distance). With --export its
+decoded signals are also written to <export dir>/<log path>.npz, or
+.parquet / .arrow with --format (canlog.export_signals, needs pyarrow); the
+log path is taken relative to the folder the logs have in common and keeps
+its extension, so logs/a/run.csv exports as exports/a/run.csv.npz next to
+a/run.blf.npz. With --events the rules of rules.csv (or --rules) are run
+over every log and the events they find are written to one CSV, one row per
+event, and counted in the summary. With --profile each log's load profile
+(canlog.LoadStats: phases, frames and decode time per CAN ID, unused IDs,
+skipped lines) goes to a JSON file. Throughput is printed at the end in
+files/s and frames/s; a log that fails to decode gets its error in the
+summary and the exit status is 1.
+"""
+import sys
+import argparse
+import csv
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import canlog
+
+
+def find_logs(patterns):
+    """Files matching any of the glob patterns (** recurses), each once, sorted"""
+    paths = set()
+    for pattern in patterns:
+        paths.update(p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p))
+    return sorted(paths)
+
+
+def export_paths(paths, export_dir, fmt):
+    """Where each log's signals are exported: its path relative to the folder
+    all logs have in common, extension kept, under `export_dir`. Raises
+    ValueError if two logs would be written to the same file"""
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in paths])
+    outs = {}
+    seen = {}
+    for p in paths:
+        out = os.path.join(export_dir, os.path.relpath(os.path.abspath(p), root) + "." + fmt)
+        key = os.path.normcase(os.path.normpath(out))    # one file on case-insensitive disks
+        if key in seen:
+            raise ValueError(f"{seen[key]} and {p} would both be exported to {out}")
+        seen[key] = p
+        outs[p] = out
+    return outs
+
+
+def process_log(path, out=None, fmt="npz", cache=False, rules=None, profile=False):
+    """Worker: decode one log and return its summary row, the events `rules`
+    find in it (if given) and its load profile (with `profile`, else None).
+    With `out` its signals are exported there in format `fmt`"""
+    start = time.perf_counter()
+    row = {"log": path}
+    events = []
+    stats = canlog.LoadStats() if profile else None
+    try:
+        DATA = canlog.load_dataset(path, cache=cache, workers=1, stats=stats)
+        row.update(canlog.summarize(DATA))
+        if rules is not None:
+            events = canlog.detect_events(DATA, rules)
+            row["events"] = len(events)
+        if out:
+            os.makedirs(os.path.dirname(out), exist_ok=True)
+            if fmt == "npz":
+                canlog.export_npz(DATA, out)
+            else:
+                canlog.export_signals(DATA, out)
+        row["error"] = ""
+    except Exception as e:          # one bad log must not stop the rest of the run
+        row["error"] = f"{type(e).__name__}: {e}"
+    row["seconds"] = round(time.perf_counter() - start, 3)
+    return row, events, stats.as_dict() if stats is not None else None
+
+
+def write_summary(path, rows):
+    columns = {}
+    for row in rows:
+        columns.update(dict.fromkeys(k for k in row if k not in ("seconds", "error")))
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, [*columns, "seconds", "error"], restval="")
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({k: round(v, 4) if isinstance(v, float) else v for k, v in row.items()})
+
+
+def write_events(path, events):
+    """One row per event: {log: [Event]} in log order"""
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["log", "rule", "signal", "start (ms)", "end (ms)", "duration (ms)", "peak"])
+        for log, found in events.items():
+            for e in found:
+                signal = canlog.SIGNAL_DB.channel_names(e.signal)[e.channel or 0]
+                writer.writerow([log, e.rule, signal, e.start, e.end, e.duration, round(e.peak, 4)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("patterns", nargs="+", help="log files or glob patterns (quote them)")
+    parser.add_argument("--summary", default="summary.csv", help="summary CSV to write (default: %(default)s)")
+    parser.add_argument("--export", metavar="DIR", help="also write each log's signals to DIR/<log path>.<format>")
+    parser.add_argument("--format", choices=("npz", "parquet", "arrow"), default="npz", help="export format (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="decode processes (default: all cores)")
+    parser.add_argument("--cache", action="store_true", help="read and fill the viewer's decoded-log cache")
+    parser.add_argument("--events", metavar="CSV", help="run the event rules and write what they find to CSV")
+    parser.add_argument("--rules", default=canlog.RULES_PATH, help="event rule table (default: rules.csv)")
+    parser.add_argument("--profile", metavar="JSON", help="write the load profile of every log to JSON")
+    args = parser.parse_args()
+
+    paths = find_logs(args.patterns)
+    if not paths:
+        parser.error("no log matches " + " ".join(args.patterns))
+    outs = {}
+    if args.export:
+        try:
+            outs = export_paths(paths, args.export, args.format)
+        except ValueError as e:
+            parser.error(str(e))
+    rules = None
+    if args.events:
+        try:
+            rules = canlog.load_rules(args.rules)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+
+    start = time.perf_counter()
+    rows = {}
+    events = {}
+    profiles = {}
+    with ProcessPoolExecutor(min(args.workers, len(paths))) as pool:
+        jobs = {
+            pool.submit(process_log, p, outs.get(p), args.format, args.cache, rules, bool(args.profile)): p
+            for p in paths
+        }
+        for i, job in enumerate(as_completed(jobs), start=1):
+            row, events[jobs[job]], profiles[jobs[job]] = job.result()
+            rows[jobs[job]] = row
+            status = row["error"] or f"{row['frames']:,} frames"
+            print(f"[{i}/{len(paths)}] {row['log']}  {status}  {row['seconds']:.1f}s", flush=True)
+    elapsed = time.perf_counter() - start
+
+    rows = [rows[p] for p in paths]
+    write_summary(args.summary, rows)
+    if args.events:
+        write_events(args.events, {p: events[p] for p in paths})
+    if args.profile:
+        with open(args.profile, "w", encoding="utf-8") as f:
+            json.dump({p: profiles[p] for p in paths}, f, indent=2)
+    frames = sum(row.get("frames", 0) for row in rows)
+    failed = sum(1 for row in rows if row["error"])
+    print(f"{len(paths)} logs, {frames:,} frames in {elapsed:.1f}s: "
+          f"{len(paths) / elapsed:.2f} files/s, {frames / elapsed:,.0f} frames/s")
+    if failed:
+        print(f"{failed} logs failed, see {args.summary}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
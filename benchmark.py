@@ -0,0 +1,497 @@
+"""Benchmark the bulk decoder against the original row loop on a synthetic log.
+
+    python benchmark.py --frames 3000000
+    python benchmark.py --frames 3000000 --cache
+    python benchmark.py --frames 3000000 --workers 8
+    python benchmark.py --frames 3000000 --compress gzip,zstd,xz --workers 8
+    python benchmark.py --lod 1000000,10000000,100000000
+    python benchmark.py --suite 1M,10M,100M --json results.json --data-dir logs
+    python benchmark.py --suite 1M,10M --json new.json --baseline results.json
+    python benchmark.py --generate test_10M.csv --frames 10M
+
+Writes a synthetic CAN log in the viewer's CSV format, decodes it with both
+load_dataset_rowwise (the per-row DictReader loop) and load_dataset (bulk
+path: index the frames, then decode every signal), checks that both produce
+the same signals and prints the timings. With --cache it times a cold open
+(index + cache write) against a warm one (memory-mapped from the cache)
+instead, and with --workers N the serial bulk path against N decode
+processes. --compress times opening the log compressed (as one stream, and
+for gzip and zstd as independent members or frames the way bgzip / pzstd
+write them, with --workers N also in N processes) against opening it plain,
+and checks the results are identical. --lod times viewport queries on the
+level-of-detail pyramid of one signal of each length against a scan of the
+samples in view (a signal decoded from every frame: the worst case).
+
+--suite opens a synthetic log of each size in a fresh process, the way the
+viewer does, and reports frames/s, peak RSS, time to the first plot (index,
+decode and serialize one trace) and the time to aggregate and serialize
+every trace of the log as the page is sent them. The results go to --json
+with the versions they were measured on; --baseline prints the change
+against an earlier file. Logs are generated with a fixed seed, so the same
+sizes give the same logs; --data-dir keeps them for the next run.
+--generate only writes a synthetic log, e.g. to open in the viewer.
+"""
+import argparse
+import gzip
+import json
+import lzma
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import canlog
+
+# (ID, relative frame rate) - roughly the mix seen on the car's bus
+ID_MIX = [
+    ("0x0A0", 10), ("0x0A1", 10), ("0x0A2", 10), ("0x0A5", 100), ("0x0A6", 100),
+    ("0x0A7", 100), ("0x0AC", 100), ("0x0C0", 100),
+    ("0x000075A1", 50), ("0x000075A2", 50), ("0x000075B0", 50),
+    ("0x4EC", 100), ("0x4ED", 100), ("0x2B0", 50), ("0x200", 50), ("0x300", 50),
+    ("0x710", 50), ("0x702", 50),
+    ("0x12905301", 20), ("0x12905381", 20), ("0x12905401", 20), ("0x12905481", 20),
+    ("0x12905501", 20), ("0x12905581", 20), ("0x12905601", 10), ("0x12905681", 10),
+    ("0x123", 30),  # not decoded by the viewer
+]
+
+
+WALK_LOW, WALK_SPAN = 200, 800     # raw 16-bit words of the other IDs wander in low..low + span
+
+
+def write_synthetic_log(path, n_frames, seed=0, chunk=1_000_000):
+    """Write `n_frames` frames of random but plausible traffic to `path`:
+    every 16-bit word of a frame is a slow random walk of its ID, so traces
+    look (and compress) like signals rather than noise"""
+    rng = np.random.default_rng(seed)
+    ids = np.array([i for i, _ in ID_MIX])
+    weights = np.array([w for _, w in ID_MIX], dtype=np.float64)
+    weights /= weights.sum()
+    walk = rng.integers(0, 2 * WALK_SPAN, size=(len(ids), 4))
+    t = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write("Timestamp,ID,Extended,Length,Data\n")
+        for start in range(0, n_frames, chunk):
+            n = min(chunk, n_frames - start)
+            which = rng.choice(len(ids), size=n, p=weights)
+            ts = t + np.cumsum(rng.integers(0, 2, size=n))
+            t = int(ts[-1])
+            payload = np.empty((n, 8), dtype=np.uint8)
+            for k in range(len(ids)):
+                rows = np.flatnonzero(which == k)
+                if not len(rows):
+                    continue
+                words = walk[k] + np.cumsum(rng.integers(-2, 3, size=(len(rows), 4)), axis=0)
+                walk[k] = words[-1]
+                # fold the walk back into the span at its edges
+                words = WALK_LOW + WALK_SPAN - np.abs(words % (2 * WALK_SPAN) - WALK_SPAN)
+                payload[rows] = words.astype("<u2").view(np.uint8).reshape(-1, 8)
+            bms = np.char.startswith(ids[which], "0x129056")
+            cells = np.char.startswith(ids[which], "0x12905") & ~bms
+            # BMS frames: module id in byte 0 (a few out of range), plausible mV / 0.1 K values
+            payload[bms | cells, 0] = rng.integers(0, 11, size=int((bms | cells).sum()))
+            cv = rng.integers(3300, 4200, size=(int(cells.sum()), 3)).astype("<u2")
+            payload[cells, 2:8] = cv.view(np.uint8).reshape(-1, 6)
+            ntc = rng.integers(2900, 3300, size=(int(bms.sum()), 3)).astype("<u2")
+            ntc[rng.random(ntc.shape) < 0.02] = 0
+            payload[bms, 2:8] = ntc.view(np.uint8).reshape(-1, 6)
+            hexdata = payload.tobytes().hex().upper()
+            ext = np.where(np.char.str_len(ids[which]) > 5, "True", "False")
+            f.write("".join(
+                f"{ts[i]},{ids[which[i]]},{ext[i]},8,{hexdata[16 * i:16 * i + 16]}\n"
+                for i in range(n)
+            ))
+
+
+# signals whose definition changed on purpose since load_dataset_rowwise
+EXPECTED_DIFFERENCES = {
+    # pack/segment points come from frames that carry a cell, each segment
+    # sums its own module's cells, and a sum is NaN until all its cells reported;
+    # NTC segment points likewise skip frames whose readings are all invalid
+    "BMS_Pack", "BMS_Segments", "NTC_Segments",
+    # inverter power samples the other signals by timestamp rather than file
+    # order (frames in the same ms count as simultaneous) and is NaN, not 0,
+    # until they have values
+    "Calculated_Currents", "DC_Powers", "DC_Comulative_Powers",
+    "DC_Discharge_Comulative_Powers", "DC_Regeneration_Comulative_Powers",
+}
+
+
+def _same(x, y):
+    # values are stored as float32 now, the row loop keeps float64
+    return np.shape(x) == np.shape(y) and np.allclose(x, y, rtol=1e-5, atol=1e-4, equal_nan=True)
+
+
+def _identical(x, y):
+    return np.array_equal(x, y, equal_nan=np.asarray(x).dtype.kind == "f")
+
+
+def diff_data(a, b, exact=False):
+    """Names of the signals that differ between two Data objects (derived
+    signals of `a` are only compared once computed, see canlog.decode_all)"""
+    same_fn = _identical if exact else _same
+    bad = []
+    columns = a.columns() if hasattr(a, "columns") else vars(a)
+    for name, sig in columns.items():
+        if name in EXPECTED_DIFFERENCES and not exact:
+            continue
+        other = getattr(b, name)
+        for part in ("ts", "val"):
+            x, y = sig[part], other[part]
+            if isinstance(x, list) or isinstance(y, list) or np.ndim(x) == 2 or np.ndim(y) == 2:
+                same = len(x) == len(y) and all(same_fn(u, v) for u, v in zip(x, y))
+            else:
+                same = same_fn(x, y)
+            if not same:
+                bad.append(f"{name}.{part}")
+    return bad
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - start
+
+
+def bench_cache(path, n):
+    with tempfile.TemporaryDirectory() as cache_dir:
+        canlog.CACHE_DIR = cache_dir
+        cold, t_cold = timed(canlog.load_dataset, path)
+        warm, t_warm = timed(canlog.load_dataset, path)
+        print(f"cold     {t_cold:8.3f}s  {n / t_cold:12,.0f} frames/s  (index + cache write)")
+        print(f"warm     {t_warm:8.3f}s  {n / t_warm:12,.0f} frames/s  ({t_cold / t_warm:.0f}x faster)")
+        canlog.decode_all(cold)
+        canlog.decode_all(warm)
+        bad = diff_data(cold, warm)
+        print("outputs match" if not bad else "MISMATCH: " + ", ".join(bad))
+        del cold, warm              # release the memory maps before the directory goes
+
+
+def bench_parallel(path, n, workers):
+    serial, t_serial = timed(canlog.load_dataset, path, canlog.CSV_BLOCK_SIZE, False, 1)
+    print(f"serial   {t_serial:8.2f}s  {n / t_serial:12,.0f} frames/s")
+    parallel, t_par = timed(canlog.load_dataset, path, canlog.CSV_BLOCK_SIZE, False, workers)
+    print(f"{workers:2d} procs {t_par:8.2f}s  {n / t_par:12,.0f} frames/s  ({t_serial / t_par:.1f}x)")
+    canlog.decode_all(serial)
+    canlog.decode_all(parallel)
+    bad = diff_data(serial, parallel, exact=True)
+    print("outputs identical" if not bad else "MISMATCH: " + ", ".join(bad))
+
+
+COMPRESSED_SUFFIX = {"gzip": ".gz", "zstd": ".zst", "xz": ".xz"}
+MEMBER_BYTES = 4 * 1024 * 1024      # log bytes per gzip member / zstd frame of a "members" copy
+
+
+def compressor(compression, f):
+    """Binary file compressing what is written to it into `f`"""
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=f, mode="wb", compresslevel=6)
+    if compression == "xz":
+        return lzma.LZMAFile(f, "wb", preset=6)
+    import zstandard
+    return zstandard.ZstdCompressor(level=3).stream_writer(f, closefd=False)
+
+
+def write_compressed(path, out, compression, member_bytes=None):
+    """Compress `path` to `out` as one stream, or as one gzip member / zstd
+    frame per `member_bytes` of it"""
+    with open(path, "rb") as src, open(out, "wb") as dst:
+        if not member_bytes:
+            with compressor(compression, dst) as z:
+                shutil.copyfileobj(src, z, MEMBER_BYTES)
+            return
+        for chunk in iter(lambda: src.read(member_bytes), b""):
+            with compressor(compression, dst) as z:
+                z.write(chunk)
+
+
+def count_frames(path):
+    """Frames (lines after the header) of a CSV log, compressed or not"""
+    with open(path, "rb") as raw:
+        return sum(1 for _ in canlog.decompressing(raw, canlog.log_compression(path))) - 1
+
+
+def bench_compressed(path, n, compressions, workers=None):
+    plain, t_plain = timed(canlog.load_dataset, path, canlog.CSV_BLOCK_SIZE, False, 1)
+    size = os.path.getsize(path)
+    print(f"{'plain':22} {size / 1e6:8.0f} MB  {t_plain:8.2f}s  {n / t_plain:12,.0f} frames/s  {size / t_plain / 1e6:6.0f} MB/s")
+    canlog.decode_all(plain)
+    with tempfile.TemporaryDirectory() as tmp:
+        for compression in compressions:
+            copies = [("", None)] if compression == "xz" else [("", None), ("/members", MEMBER_BYTES)]
+            for label, member_bytes in copies:
+                out = os.path.join(tmp, os.path.basename(path) + COMPRESSED_SUFFIX[compression])
+                try:
+                    write_compressed(path, out, compression, member_bytes)
+                except ImportError as e:
+                    print(f"{compression:22} skipped: {e}")
+                    break
+                ratio = size / os.path.getsize(out)
+                runs = [1] + ([workers] if member_bytes and workers and workers > 1 else [])
+                for w in runs:
+                    data, t = timed(canlog.load_dataset, out, canlog.CSV_BLOCK_SIZE, False, w)
+                    name = compression + label + (f" {w} procs" if w > 1 else "")
+                    print(f"{name:22} {ratio:7.1f}x   {t:8.2f}s  {n / t:12,.0f} frames/s  {size / t / 1e6:6.0f} MB/s"
+                          f"  ({t / t_plain:.2f}x the plain time)")
+                    canlog.decode_all(data)
+                    bad = diff_data(plain, data, exact=True)
+                    if bad:
+                        print("MISMATCH: " + ", ".join(bad))
+                    del data
+                os.unlink(out)
+
+
+def bench_lod(sizes, points=3000, queries=200, scans=20, seed=0):
+    rng = np.random.default_rng(seed)
+    for n in sizes:
+        ts = rng.integers(0, 3, size=n, dtype=np.int64)
+        np.cumsum(ts, out=ts)
+        val = rng.standard_normal(n, dtype=np.float32)
+        np.cumsum(val, out=val)
+        lod, t_build = timed(canlog.Pyramid, ts, val)
+        size = sum(a.nbytes for level in lod.levels for a in level)
+        # zoom windows from the whole log down to 1e-5 of it
+        width = ts[-1] * 10 ** rng.uniform(-5, 0, size=queries)
+        start = rng.uniform(0, 1, size=queries) * (ts[-1] - width)
+        windows = list(zip(start.tolist(), (start + width).tolist()))
+        t_query = [timed(lod.view, w, points)[1] for w in windows]
+        t_scan = [timed(_scan_view, ts, val, w, points)[1] for w in windows[:scans]]
+        print(f"{n:12,} samples  build {t_build:6.2f}s  {size / n:4.1f} B/sample  "
+              f"query median {1000 * np.median(t_query):6.3f} ms  max {1000 * max(t_query):6.3f} ms  "
+              f"(scan median {1000 * np.median(t_scan):8.3f} ms  max {1000 * max(t_scan):8.3f} ms)")
+        del ts, val, lod
+
+
+def _scan_view(ts, val, t_range, points):
+    # what a pyramid saves: min/max over every sample in view
+    i0, i1 = np.searchsorted(ts, np.array(t_range, dtype=ts.dtype))
+    step = max((i1 - i0) * 2 // points, 1)
+    view = val[i0:i1]
+    edges = np.arange(0, len(view), step)
+    return np.fmin.reduceat(view, edges), np.fmax.reduceat(view, edges)
+
+
+def parse_size(text):
+    """Frame count from a number ("100000", "1e6") or one with a k/M/G suffix ("2.5M")"""
+    scale = {"k": 1_000, "m": 1_000_000, "g": 1_000_000_000}.get(text[-1:].lower())
+    return int(float(text[:-1]) * scale) if scale else int(float(text))
+
+
+def peak_rss():
+    """Peak resident memory of this process in bytes, None where unknown"""
+    try:
+        import resource
+    except ImportError:             # Windows
+        import ctypes
+        from ctypes import wintypes
+
+        class Counters(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+                (name, ctypes.c_size_t) for name in (
+                    "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage",
+                    "QuotaPagedPoolUsage", "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage",
+                    "PagefileUsage", "PeakPagefileUsage",
+                )
+            ]
+        counters = Counters(cb=ctypes.sizeof(Counters))
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return None
+        return int(counters.PeakWorkingSetSize)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024     # kB on Linux
+
+
+def measure(path, frames, points=3000, first="Motor_Temperature"):
+    """Metrics of opening `path` as the viewer does, for the --suite report"""
+    import plotly.graph_objects as go
+    from plotly.io.json import to_json_plotly
+
+    start = time.perf_counter()
+    DATA = canlog.load_dataset(path, cache=False)
+    t_index = time.perf_counter() - start
+    x, y = canlog.pyramid(DATA, first).view(None, points)
+    to_json_plotly([canlog.trace_json(go.Scattergl(mode="lines", name=first, x=x, y=y))])
+    t_first_plot = time.perf_counter() - start
+    _, t_decode = timed(canlog.decode_all, DATA)
+
+    # every trace of the log, as the page is sent them when all are checked
+    start = time.perf_counter()
+    traces = []
+    for name, n in canlog.SIGNAL_DB.layout().items():
+        for i, trace in enumerate(canlog.SIGNAL_DB.channel_names(name)):
+            x, y = canlog.pyramid(DATA, name, i if n else None).view(None, points)
+            traces.append(go.Scattergl(mode="lines", name=trace, x=x, y=y))
+    t_aggregate = time.perf_counter() - start
+    payload, t_serialize = timed(lambda: to_json_plotly([canlog.trace_json(tr) for tr in traces]))
+    return {
+        "frames": frames,
+        "log_bytes": os.path.getsize(path),
+        "index_s": round(t_index, 4),
+        "decode_s": round(t_decode, 4),
+        "frames_per_s": round(frames / (t_index + t_decode)),
+        "first_plot_s": round(t_first_plot, 4),
+        "traces": len(traces),
+        "aggregate_s": round(t_aggregate, 4),
+        "serialize_s": round(t_serialize, 4),
+        "figure_bytes": len(payload),
+        "peak_rss_bytes": peak_rss(),
+    }
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "decoder_version": canlog.DECODER_VERSION,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def run_suite(sizes, data_dir=None):
+    """measure() one synthetic log of each size, each in a fresh process so
+    that peak RSS is that log's"""
+    tmp = None
+    if data_dir is None:
+        tmp = tempfile.TemporaryDirectory()
+        data_dir = tmp.name
+    os.makedirs(data_dir, exist_ok=True)
+    results = []
+    try:
+        for n in sizes:
+            path = os.path.join(data_dir, f"synthetic_{n}.csv")
+            if not os.path.isfile(path):
+                _, t = timed(write_synthetic_log, path, n)
+                print(f"wrote {n:,} frames ({os.path.getsize(path) / 1e6:.0f} MB) in {t:.1f}s", flush=True)
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--measure", path, "--frames", str(n)],
+                capture_output=True, text=True, check=True,
+            )
+            result = json.loads(out.stdout.splitlines()[-1])
+            rss = result["peak_rss_bytes"]
+            print(f"{n:12,} frames  {result['frames_per_s']:12,} frames/s  "
+                  f"peak RSS {rss / 1e6 if rss else float('nan'):7.0f} MB  "
+                  f"first plot {result['first_plot_s']:7.2f}s  "
+                  f"{result['traces']} traces: aggregate {result['aggregate_s']:6.2f}s "
+                  f"serialize {result['serialize_s']:6.2f}s ({result['figure_bytes'] / 1e6:.1f} MB)", flush=True)
+            results.append(result)
+    finally:
+        if tmp is not None:
+            tmp.cleanup()
+    return results
+
+
+# metrics compared by --baseline, and whether more is better
+COMPARED = {
+    "frames_per_s": True, "peak_rss_bytes": False, "first_plot_s": False,
+    "aggregate_s": False, "serialize_s": False,
+}
+
+
+def compare(results, baseline):
+    """Print the change of every metric against a baseline report, per size"""
+    old = {r["frames"]: r for r in baseline["results"]}
+    print(f"against {baseline['environment'].get('commit')} ({baseline['environment'].get('date')}):")
+    for r in results:
+        if r["frames"] not in old:
+            continue
+        changes = []
+        for key, more_is_better in COMPARED.items():
+            a, b = old[r["frames"]].get(key), r.get(key)
+            if a and b:
+                change = (b - a) / a * 100
+                worse = change < 0 if more_is_better else change > 0
+                changes.append(f"{key} {change:+.0f}%{' !' if worse and abs(change) >= 10 else ''}")
+        print(f"{r['frames']:12,} frames  " + "  ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=parse_size, default=3_000_000)
+    parser.add_argument("--log", help="decode this log instead of a synthetic one")
+    parser.add_argument("--skip-rowwise", action="store_true", help="only time the bulk decoder")
+    parser.add_argument("--cache", action="store_true", help="time cold vs. warm opens through the cache")
+    parser.add_argument("--workers", type=int, help="time the serial path vs. this many decode processes")
+    parser.add_argument("--compress", metavar="C,C,...", help="time opening the log compressed with these (gzip, zstd, xz)")
+    parser.add_argument("--lod", metavar="N,N,...", help="time pyramid viewport queries on signals of these lengths")
+    parser.add_argument("--suite", metavar="N,N,...", help="run the report on synthetic logs of these sizes (1M, 10M, ...)")
+    parser.add_argument("--json", help="write the --suite report to this file")
+    parser.add_argument("--baseline", help="compare the --suite report with this earlier one")
+    parser.add_argument("--data-dir", help="where --suite keeps its synthetic logs (default: a temporary directory)")
+    parser.add_argument("--generate", metavar="LOG", help="only write a synthetic log of --frames frames")
+    parser.add_argument("--measure", metavar="LOG", help=argparse.SUPPRESS)     # one --suite run
+    args = parser.parse_args()
+    if args.compress and not set(args.compress.split(",")) <= COMPRESSED_SUFFIX.keys():
+        parser.error("--compress takes " + ",".join(COMPRESSED_SUFFIX))
+
+    if args.generate:
+        _, t = timed(write_synthetic_log, args.generate, args.frames)
+        print(f"wrote {args.frames:,} frames ({os.path.getsize(args.generate) / 1e6:.0f} MB) in {t:.1f}s")
+        return
+    if args.measure:
+        print(json.dumps(measure(args.measure, args.frames)))
+        return
+    if args.suite:
+        results = run_suite([parse_size(n) for n in args.suite.split(",")], args.data_dir)
+        report = {"environment": environment(), "results": results}
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+        if args.baseline:
+            with open(args.baseline, encoding="utf-8") as f:
+                compare(results, json.load(f))
+        return
+    if args.lod:
+        bench_lod([parse_size(n) for n in args.lod.split(",")])
+        return
+
+    tmp = None
+    path = args.log
+    if path is None:
+        tmp = tempfile.NamedTemporaryFile(suffix=".csv", delete=False)
+        tmp.close()
+        path = tmp.name
+        _, t = timed(write_synthetic_log, path, args.frames)
+        print(f"wrote {args.frames:,} frames ({os.path.getsize(path) / 1e6:.0f} MB) in {t:.1f}s")
+    try:
+        n = args.frames if args.log is None else count_frames(path)
+        if args.cache:
+            bench_cache(path, n)
+            return
+        if args.compress:
+            bench_compressed(path, n, args.compress.split(","), args.workers)
+            return
+        if args.workers:
+            bench_parallel(path, n, args.workers)
+            return
+        bulk, t_index = timed(canlog.load_dataset, path, canlog.CSV_BLOCK_SIZE, False)
+        print(f"index    {t_index:8.2f}s  {n / t_index:12,.0f} frames/s  (until the first plot)")
+        _, t_decode = timed(canlog.decode_all, bulk)
+        t_bulk = t_index + t_decode
+        print(f"bulk     {t_bulk:8.2f}s  {n / t_bulk:12,.0f} frames/s  (index + decoding every signal)")
+        if not args.skip_rowwise:
+            rows, t_rows = timed(canlog.load_dataset_rowwise, path)
+            print(f"rowwise  {t_rows:8.2f}s  {n / t_rows:12,.0f} frames/s  ({t_rows / t_bulk:.1f}x slower)")
+            bad = diff_data(rows, bulk)
+            print("outputs match" if not bad else "MISMATCH: " + ", ".join(bad))
+    finally:
+        if tmp is not None:
+            os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,3022 @@
+"""Decoding of CAN logs into per-signal columns, without the GUI.
+
+Reads CSV, candump, ASC and BLF logs, plain or compressed (gzip, zstd, xz),
+indexes their frames by CAN ID and decodes the signals of the signal table
+(signals.csv) on first use into Data; decoded logs are cached on disk.
+Imported by the viewer, the batch CLI and the benchmark.
+"""
+import base64
+import csv
+import gzip
+import io
+import lzma
+import re
+import struct
+import zlib
+import os
+import json
+import shutil
+import socket
+import hashlib
+import time
+import threading
+import multiprocessing
+from dataclasses import dataclass, fields
+from types import SimpleNamespace
+import numpy as np
+
+
+def time_slice(ts, start=None, end=None):
+    """(i0, i1) such that ts[i0:i1] are the samples with start <= ts <= end
+    (None: unbounded), by binary search of the sorted `ts`"""
+    # bounds of the timestamps' own type: a float would convert all of ts
+    i0 = 0 if start is None else int(np.searchsorted(ts, ts.dtype.type(np.ceil(start)), side="left"))
+    i1 = len(ts) if end is None else int(np.searchsorted(ts, ts.dtype.type(np.floor(end)), side="right"))
+    return i0, max(i0, i1)
+
+
+class SignalColumn:
+    """Growable column of samples: int64 timestamps, float32 values.
+
+    Capacity doubles as batches are appended, `ts`/`val` are zero-copy views
+    of the filled part and `sig["ts"]`/`sig["val"]` work as on a plain dict.
+    """
+    def __init__(self, capacity=1024):
+        self._ts = np.empty(capacity, dtype=np.int64)
+        self._val = np.empty(capacity, dtype=np.float32)
+        self.n = 0
+
+    def append(self, ts, val):
+        end = self.n + len(ts)
+        if end > len(self._ts):
+            self._reserve(max(end, 2 * len(self._ts)))
+        self._ts[self.n:end] = ts
+        self._val[self.n:end] = val
+        self.n = end
+
+    def _reserve(self, capacity):
+        for attr in ("_ts", "_val"):
+            old = getattr(self, attr)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.n] = old[:self.n]
+            setattr(self, attr, new)
+
+    def finish(self):
+        """Give back the unused capacity"""
+        if self.n < len(self._ts):
+            self._ts = self._ts[:self.n].copy()
+            self._val = self._val[:self.n].copy()
+
+    @property
+    def ts(self):
+        return self._ts[:self.n]
+
+    @property
+    def val(self):
+        return self._val[:self.n]
+
+    def __len__(self):
+        return self.n
+
+    def arrays(self):
+        """The arrays that make up the column, as saved in the cache"""
+        return {"ts": self.ts, "val": self.val}
+
+    @classmethod
+    def from_arrays(cls, ts, val):
+        """Wrap existing (e.g. memory-mapped) arrays without copying them"""
+        col = cls(capacity=0)
+        col._ts, col._val, col.n = ts, val, len(ts)
+        return col
+
+    def window(self, start=None, end=None):
+        """Zero-copy column of the samples with start <= ts <= end"""
+        ts, val = self.ts, self.val
+        i0, i1 = time_slice(ts, start, end)
+        return SignalColumn.from_arrays(ts[i0:i1], val[i0:i1])
+
+    def __getitem__(self, key):
+        if key not in ("ts", "val"):
+            raise KeyError(key)
+        return getattr(self, key)
+
+
+class ChannelMatrix:
+    """Growable 2-D (channel x sample) storage of a multi-channel group.
+
+    Every channel is one row of a matrix padded at the end (ts 0, val NaN);
+    `ts[i]`/`val[i]` are zero-copy views of channel i, its samples from
+    starts[i] (0 but in ring buffers and windows) to lengths[i], and
+    matrix() returns the padded arrays themselves.
+    """
+    def __init__(self, channels, capacity=256):
+        self._ts = np.zeros((channels, capacity), dtype=np.int64)
+        self._val = np.full((channels, capacity), np.nan, dtype=np.float32)
+        self.starts = np.zeros(channels, dtype=np.int64)
+        self.lengths = np.zeros(channels, dtype=np.int64)
+
+    def append(self, channel, ts, val):
+        """Append samples of any channels; samples of one channel stay in the given order"""
+        if len(channel) == 0:
+            return
+        order = np.argsort(channel, kind="stable")
+        ch = channel[order]
+        counts = np.bincount(ch, minlength=len(self.lengths))
+        pos = self.lengths[ch] + np.arange(len(ch)) - (np.cumsum(counts) - counts)[ch]
+        end = int((self.lengths + counts).max())
+        if end > self._ts.shape[1]:
+            self._reserve(max(end, 2 * self._ts.shape[1]))
+        self._ts[ch, pos] = ts[order]
+        self._val[ch, pos] = val[order]
+        self.lengths += counts
+
+    def _reserve(self, capacity):
+        for attr, fill in (("_ts", 0), ("_val", np.nan)):
+            old = getattr(self, attr)
+            new = np.full((old.shape[0], capacity), fill, dtype=old.dtype)
+            new[:, :old.shape[1]] = old
+            setattr(self, attr, new)
+
+    def finish(self):
+        """Trim the padding to the longest channel"""
+        width = int(self.lengths.max(initial=0))
+        if width < self._ts.shape[1]:
+            self._ts = self._ts[:, :width].copy()
+            self._val = self._val[:, :width].copy()
+
+    def matrix(self):
+        """(ts, val) as padded (channels, longest channel) arrays"""
+        width = int(self.lengths.max(initial=0))
+        return self._ts[:, :width], self._val[:, :width]
+
+    @property
+    def ts(self):
+        return [self._ts[i, s:n] for i, (s, n) in enumerate(zip(self.starts.tolist(), self.lengths.tolist()))]
+
+    @property
+    def val(self):
+        return [self._val[i, s:n] for i, (s, n) in enumerate(zip(self.starts.tolist(), self.lengths.tolist()))]
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def arrays(self):
+        """The arrays that make up the group, as saved in the cache"""
+        ts, val = self.matrix()
+        return {"ts": ts, "val": val, "lengths": self.lengths}
+
+    @classmethod
+    def from_arrays(cls, ts, val, lengths):
+        """Wrap existing (e.g. memory-mapped) arrays without copying them"""
+        group = cls(len(lengths), capacity=0)
+        group._ts, group._val, group.lengths = ts, val, np.asarray(lengths)
+        return group
+
+    def window(self, start=None, end=None):
+        """Zero-copy group of the samples with start <= ts <= end"""
+        group = ChannelMatrix.from_arrays(self._ts, self._val, self.lengths.copy())
+        for i, (s, ts) in enumerate(zip(self.starts.tolist(), self.ts)):
+            i0, i1 = time_slice(ts, start, end)
+            group.starts[i], group.lengths[i] = s + i0, s + i1
+        return group
+
+    def __getitem__(self, key):
+        if key not in ("ts", "val"):
+            raise KeyError(key)
+        return getattr(self, key)
+
+
+class RingColumn(SignalColumn):
+    """SignalColumn keeping only the newest `limit` samples, for live capture.
+
+    Storage grows by doubling up to 2 * limit; once full, the newest samples
+    are moved to its front in place, so `ts`/`val` views are only valid
+    until the next append (read them under the writer's lock).
+    `total` counts every sample ever appended.
+    """
+    def __init__(self, limit):
+        super().__init__(min(1024, 2 * limit))
+        self.limit = limit
+        self.start = 0
+        self.total = 0
+
+    def append(self, ts, val):
+        self.total += len(ts)
+        if len(ts) > self.limit:
+            ts, val = ts[-self.limit:], val[-self.limit:]
+        if self.n + len(ts) > 2 * self.limit:
+            self._compact(min(self.n - self.start, self.limit - len(ts)))
+        super().append(ts, val)
+        self.start = max(self.start, self.n - self.limit)
+
+    def _reserve(self, capacity):
+        super()._reserve(min(capacity, 2 * self.limit))
+
+    def _compact(self, keep):
+        # the kept samples start past `limit`, so the move never overlaps
+        for a in (self._ts, self._val):
+            a[:keep] = a[self.n - keep:self.n]
+        self.start, self.n = 0, keep
+
+    @property
+    def ts(self):
+        return self._ts[self.start:self.n]
+
+    @property
+    def val(self):
+        return self._val[self.start:self.n]
+
+    def __len__(self):
+        return self.n - self.start
+
+
+class RingMatrix(ChannelMatrix):
+    """ChannelMatrix keeping only the newest `limit` samples of every
+    channel, in the same way as RingColumn"""
+    def __init__(self, channels, limit):
+        super().__init__(channels, min(256, 2 * limit))
+        self.limit = limit
+        self.total = np.zeros(channels, dtype=np.int64)
+
+    def append(self, channel, ts, val):
+        counts = np.bincount(channel, minlength=len(self.lengths))
+        self.total += counts
+        if (counts > self.limit).any():
+            # only the newest `limit` samples of each channel can be kept
+            order = np.argsort(channel, kind="stable")
+            ch = channel[order]
+            rank = np.arange(len(ch)) - (np.cumsum(counts) - counts)[ch]
+            keep = np.empty(len(ch), dtype=bool)
+            keep[order] = rank >= (counts - self.limit)[ch]
+            channel, ts, val = channel[keep], ts[keep], val[keep]
+            counts = np.minimum(counts, self.limit)
+        if ((self.lengths + counts) > 2 * self.limit).any():
+            self._compact(np.clip(self.limit - counts, 0, self.lengths - self.starts))
+        super().append(channel, ts, val)
+        self.starts = np.maximum(self.starts, self.lengths - self.limit)
+
+    def _reserve(self, capacity):
+        super()._reserve(min(capacity, 2 * self.limit))
+
+    def _compact(self, keep):
+        # move the newest keep[i] samples of every channel to the front of
+        # its row in one gather/scatter, then pad the rest of what was used
+        rows = np.repeat(np.arange(len(keep)), keep)
+        dst = np.arange(len(rows)) - np.repeat(np.cumsum(keep) - keep, keep)
+        src = dst + np.repeat(self.lengths - keep, keep)
+        width = int(self.lengths.max(initial=0))
+        pad = np.arange(width) >= keep[:, None]
+        for a, fill in ((self._ts, 0), (self._val, np.nan)):
+            a[rows, dst] = a[rows, src]
+            a[:, :width][pad] = fill
+        self.starts[:] = 0
+        self.lengths = keep.astype(np.int64)
+
+
+class FrameIndex:
+    """Raw frames of a log indexed by CAN ID, for decoding signals on demand.
+
+    The payloads of the frames whose key is in `keys` go into one contiguous
+    (n, 8) buffer in file order; per ID the index holds its frames' offsets
+    into that buffer and their timestamps. An offset also orders frames of
+    different IDs, so it stands in for the file row when decoding.
+
+    Blocks are added while the log is read; finish() packs the per-ID parts
+    into flat arrays, the frames of keys[i] being bounds[i]:bounds[i + 1],
+    and puts frames logged out of time order back in order, so that every
+    timestamp array decoded from a finished index is sorted.
+    `rows` counts every frame read, indexed or not.
+
+    frames() may be called from another thread while blocks are added:
+    add(), extend() and finish() change the index under a lock, and
+    frames() takes a consistent snapshot under the same lock.
+    """
+    def __init__(self, keys=(), capacity=65536):
+        self.wanted = np.array(sorted(keys), dtype=np.int64)
+        self._payload = np.empty((capacity, 8), dtype=np.uint8)
+        self.n = 0
+        self.rows = 0
+        self._parts = {}                # key -> [(offset, ts)] until finish()
+        self.keys = np.empty(0, dtype=np.int64)
+        self.bounds = np.zeros(1, dtype=np.int64)
+        self.offset = np.empty(0, dtype=np.int64)
+        self.ts = np.empty(0, dtype=np.int64)
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # indexes of log ranges come back from worker processes
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def add(self, ts, key, payload):
+        """Index one block of frames"""
+        keep = np.isin(key, self.wanted)
+        ts, key, payload = ts[keep], key[keep], payload[keep]
+        order = np.argsort(key, kind="stable")
+        uniq, first = np.unique(key[order], return_index=True)
+        with self._lock:
+            self.rows += len(keep)
+            start = self._append_payload(payload)
+            offset = np.arange(start, start + len(ts), dtype=np.int64)
+            for k, sl in zip(uniq.tolist(), np.split(order, first[1:])):
+                self._parts.setdefault(k, []).append((offset[sl], ts[sl]))
+
+    def extend(self, other):
+        """Index the frames of `other`, a finished index of the next part of the log"""
+        with self._lock:
+            self.rows += other.rows
+            start = self._append_payload(other.payload)
+            for i, k in enumerate(other.keys.tolist()):
+                sl = slice(other.bounds[i], other.bounds[i + 1])
+                self._parts.setdefault(k, []).append((other.offset[sl] + start, other.ts[sl]))
+
+    def _append_payload(self, payload):
+        # a full buffer is replaced, never written over below n, so the
+        # payload a snapshot of frames() holds stays valid
+        start, end = self.n, self.n + len(payload)
+        if end > len(self._payload):
+            new = np.empty((max(end, 2 * len(self._payload)), 8), dtype=np.uint8)
+            new[:start] = self._payload[:start]
+            self._payload = new
+        self._payload[start:end] = payload
+        self.n = end
+        return start
+
+    @property
+    def payload(self):
+        return self._payload[:self.n]
+
+    def __len__(self):
+        return self.n
+
+    def frames(self, keys):
+        """{key: (offset, ts, payload)} of the frames of `keys` indexed so
+        far, as decode_block takes them (offset in place of the row)"""
+        with self._lock:
+            payload = self._payload
+            parts = {key: list(self._parts[key]) for key in keys if key in self._parts}
+            packed_keys, bounds, packed_offset, packed_ts = self.keys, self.bounds, self.offset, self.ts
+        out = {}
+        for key in keys:
+            if key in parts:
+                offset = np.concatenate([c[0] for c in parts[key]])
+                ts = np.concatenate([c[1] for c in parts[key]])
+            else:
+                i = int(np.searchsorted(packed_keys, key))
+                if i == len(packed_keys) or packed_keys[i] != key:
+                    continue
+                offset = packed_offset[bounds[i]:bounds[i + 1]]
+                ts = packed_ts[bounds[i]:bounds[i + 1]]
+            out[key] = offset, ts, payload[offset]
+        return out
+
+    def finish(self):
+        """Pack the blocks added so far and give back the unused capacity"""
+        with self._lock:
+            self._finish()
+
+    def _finish(self):
+        if self._parts:
+            keys = sorted(self._parts)
+            chunks = [c for k in keys for c in self._parts[k]]
+            counts = [sum(len(o) for o, _ in self._parts[k]) for k in keys]
+            self.keys = np.array(keys, dtype=np.int64)
+            self.bounds = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+            self.offset = np.concatenate([o for o, _ in chunks])
+            self.ts = np.concatenate([t for _, t in chunks])
+            self._sort_by_time()
+        if self.n < len(self._payload):
+            self._payload = self._payload[:self.n].copy()
+        self._parts = {}
+
+    def _sort_by_time(self):
+        # timestamps in offset (file) order; clock steps and merged logs can
+        # leave them unsorted, and every window and lookup needs them sorted
+        ts = np.empty(self.n, dtype=np.int64)
+        ts[self.offset] = self.ts
+        if (ts[1:] >= ts[:-1]).all():
+            return
+        order = np.argsort(ts, kind="stable")
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        offset = rank[self.offset]
+        for i in range(len(self.keys)):
+            sl = slice(self.bounds[i], self.bounds[i + 1])
+            by_time = np.argsort(offset[sl], kind="stable")
+            offset[sl] = offset[sl][by_time]
+            self.ts[sl] = self.ts[sl][by_time]
+        self._payload = self._payload[order]
+        self.offset = offset
+
+    def arrays(self):
+        """The arrays that make up the index, as saved in the cache"""
+        return {
+            "keys": self.keys, "bounds": self.bounds, "offset": self.offset, "ts": self.ts,
+            "payload": self.payload, "rows": np.array([self.rows], dtype=np.int64),
+        }
+
+    @classmethod
+    def from_arrays(cls, keys, bounds, offset, ts, payload, rows):
+        """Wrap existing (e.g. memory-mapped) arrays without copying them"""
+        index = cls(capacity=0)
+        index.keys, index.bounds, index.offset, index.ts = keys, bounds, offset, ts
+        index._payload, index.n, index.rows = payload, len(payload), int(rows[0])
+        return index
+
+
+class Data:
+    """Decoded signals, one column per signal of the signal table; groups
+    with several channels (BMS_Cell, NTC_Cell, ...) are a ChannelMatrix.
+    With `limit` (live capture) every column is a ring buffer of that many
+    samples per channel instead, the DERIVED ones included: extend_derived()
+    keeps those up to date as frames arrive.
+
+    With a FrameIndex, signals are decoded from it the first time they are
+    read, together with the other signals of their IDs (SignalDB.units),
+    and kept once the index is complete; before finish() they are decoded
+    from the frames indexed so far every time. The signals in DERIVED are
+    computed from the decoded columns the first time they are read after
+    finish(), and then kept like the others; before that they read as empty.
+
+    window() gives the same signals cut to a time range (or a named marker
+    such as a lap, see mark()) as zero-copy views found by binary search.
+    """
+    def __init__(self, db=None, limit=None, index=None):
+        self._db = db = db or SIGNAL_DB
+        self._index = index
+        self._complete = False
+        self._resampled = {}            # see resample()
+        self._pyramids = {}             # see pyramid()
+        self._markers = {}              # see mark()
+        self._window = None             # (data, start, end) of a window() view
+        self._stats = None              # LoadStats of the load, see iter_dataset()
+        if index is not None:
+            return
+        for name, n in db.layout().items():
+            if name in DERIVED and not limit:
+                continue                # computed on first use, see __getattr__
+            setattr(self, name, self._new_column(n, limit))
+
+    @staticmethod
+    def _new_column(n, limit=None):
+        if limit:
+            return RingMatrix(n, limit) if n else RingColumn(limit)
+        return ChannelMatrix(n) if n else SignalColumn()
+
+    def __getattr__(self, name):
+        # only called for attributes not set yet: the derived signals, and
+        # with an index the signals not decoded yet
+        if name.startswith("_") or name not in self._db.groups:
+            raise AttributeError(name)
+        if self._window is not None:
+            data, start, end = self._window
+            col = getattr(data, name).window(start, end)
+            if data._complete:
+                setattr(self, name, col)
+            return col
+        layout = self._db.layout()
+        if name not in DERIVED:
+            if self._index is None or name not in self._db.units:
+                raise AttributeError(name)
+            return self._decode(name, layout)
+        if not self._complete:
+            return self._new_column(layout[name])
+        fn = DERIVED[name]
+        for out, f in DERIVED.items():
+            if f is fn and out in layout:
+                setattr(self, out, self._new_column(layout[out]))
+        start = time.perf_counter()
+        fn(self, self._db)
+        if self._stats is not None:
+            self._stats.add("derive", time.perf_counter() - start)
+        for out, f in DERIVED.items():
+            if f is fn and out in layout:
+                getattr(self, out).finish()
+        return getattr(self, name)
+
+    def _decode(self, name, layout):
+        """Decode the unit of signals `name` belongs to from the index"""
+        keys, names = self._db.units[name]
+        cols = SimpleNamespace(**{n: self._new_column(layout[n]) for n in names})
+        decode_block(cols, self._index.frames(keys), {}, self._db, self._stats)
+        for col in vars(cols).values():
+            col.finish()
+        if self._complete:
+            for n, col in vars(cols).items():
+                setattr(self, n, col)
+        return getattr(cols, name)
+
+    def mark(self, name, start, end):
+        """Name the time range start..end ms (a lap, a run), for window()"""
+        self._markers[name] = (start, end)
+
+    def markers(self):
+        """{name: (start, end)} of the marked time ranges"""
+        return dict(self._markers)
+
+    def window(self, start=None, end=None):
+        """Data whose signals are zero-copy views of the samples of these
+        with start <= ts <= end ms (None: unbounded); `start` may instead
+        name a marker. Signals are cut (and decoded) on first use."""
+        if isinstance(start, str):
+            start, end = self._markers[start]
+        view = Data(self._db, index=self._index)
+        view._window = (self, start, end)
+        view._complete = self._complete
+        view._markers = self._markers
+        if self._index is None:
+            # the columns of live or hand-filled Data exist from the start,
+            # so the view's own (empty) ones are replaced by cuts of them now
+            for name, col in self.columns().items():
+                setattr(view, name, col.window(start, end))
+        return view
+
+    def nbytes(self):
+        """Bytes held by the index, the decoded columns and the pyramids and
+        resampled grids kept (memory-mapped arrays included)"""
+        arrays = list(self._index.arrays().values()) if self._index is not None else []
+        for col in self.columns().values():
+            arrays.extend(col.arrays().values())
+        for lod in self._pyramids.values():
+            arrays.extend(a for level in lod.levels for a in level)
+        for grid in self._resampled.values():
+            arrays.extend(grid)
+        return sum(a.nbytes for a in arrays)
+
+    def columns(self):
+        """{name: column} of the signals decoded or derived so far"""
+        return {name: col for name, col in vars(self).items() if not name.startswith("_")}
+
+    def finish(self):
+        for col in self.columns().values():
+            col.finish()
+        if self._index is not None:
+            self._index.finish()
+        self._complete = True
+
+
+class RowwiseData:
+    """Per-signal Python lists, as load_dataset_rowwise fills them"""
+    def __init__(self, db=None):
+        db = db or SIGNAL_DB
+        for name, n in db.layout().items():
+            if n:
+                setattr(self, name, {"ts": [[] for _ in range(n)], "val": [[] for _ in range(n)]})
+            else:
+                setattr(self, name, {"ts": [], "val": []})
+
+
+def parse_bms_data(data):
+    """Parse BMS message data"""
+    module_id = int(data[0:2], 16)
+    value1 = int.from_bytes(bytes.fromhex(data[4:8]), byteorder='little')
+    value2 = int.from_bytes(bytes.fromhex(data[8:12]), byteorder='little')
+    value3 = int.from_bytes(bytes.fromhex(data[12:16]), byteorder='little')
+    
+    return module_id, value1, value2, value3
+
+def load_dataset_rowwise(filepath):
+    """Original row-by-row decoder, kept as the reference for benchmark.py"""
+    DATA = RowwiseData()
+    if not os.path.isfile(filepath):
+        return DATA
+    
+    with open(filepath, mode="r", encoding="utf-8", newline='') as f:
+        reader = csv.DictReader(f, fieldnames=["Timestamp", "ID", "Extended", "Length", "Data"])
+        next(reader)
+        base_dt = None
+        for row in reader:
+            ID = row["ID"]
+            data = row["Data"]
+            elapsed_ms = int(row["Timestamp"])       # 把秒跟毫秒拆開
+            if ID == "0x0A0":
+                a_t = int.from_bytes(bytes.fromhex(data[0:4]), byteorder="little", signed=True) / 10
+                b_t = int.from_bytes(bytes.fromhex(data[4:8]), byteorder="little", signed=True) / 10
+                c_t = int.from_bytes(bytes.fromhex(data[8:12]), byteorder="little", signed=True) / 10
+                gate_t = int.from_bytes(bytes.fromhex(data[12:16]), byteorder="little", signed=True) / 10
+                DATA.Module_A_Temperature['ts'].append(elapsed_ms)
+                DATA.Module_A_Temperature['val'].append(a_t)
+                DATA.Module_B_Temperature['ts'].append(elapsed_ms)
+                DATA.Module_B_Temperature['val'].append(b_t)
+                DATA.Module_C_Temperature['ts'].append(elapsed_ms)
+                DATA.Module_C_Temperature['val'].append(c_t)
+                DATA.Gate_Driver_Temperature['ts'].append(elapsed_ms)
+                DATA.Gate_Driver_Temperature['val'].append(gate_t)
+
+            if ID == "0x0A1":
+                value = int.from_bytes(bytes.fromhex(data[0:4]), byteorder="little", signed=True) / 10
+                DATA.Control_Board_Temperature['ts'].append(elapsed_ms)
+                DATA.Control_Board_Temperature['val'].append(value)
+
+            if ID == "0x0A2":
+                motor_t = int.from_bytes(bytes.fromhex(data[8:12]), byteorder="little", signed=True) / 10
+                DATA.Motor_Temperature['ts'].append(elapsed_ms)
+                DATA.Motor_Temperature['val'].append(motor_t)
+
+            if ID == "0x0A5":
+                rpm = int.from_bytes(bytes.fromhex(data[4:8]), byteorder="little", signed=True) * -1
+                delta_resolver = int.from_bytes(bytes.fromhex(data[12:16]), byteorder="little", signed=True)
+                speed = rpm * 0.52 * 3.14159 / 3 / 60 * 3.6  # Convert to km/h
+                try:
+                    distance = speed * (elapsed_ms - DATA.Speed['ts'][-1]) / 3600 + DATA.Distance['val'][-1]
+                except Exception as e:
+                    distance = 0
+                DATA.RPM['ts'].append(elapsed_ms)
+                DATA.RPM['val'].append(rpm)
+                DATA.Delta_Resolver['ts'].append(elapsed_ms)
+                DATA.Delta_Resolver['val'].append(delta_resolver)
+                DATA.Speed['ts'].append(elapsed_ms)
+                DATA.Speed['val'].append(speed)
+                DATA.Distance['ts'].append(elapsed_ms)
+                DATA.Distance['val'].append(distance)
+
+
+            if ID == "0x0A7":
+                dc = int.from_bytes(bytes.fromhex(data[0:4]), byteorder="little")
+                output = int.from_bytes(bytes.fromhex(data[4:8]), byteorder="little")
+                DATA.DC_Voltages['ts'].append(elapsed_ms)
+                DATA.DC_Voltages['val'].append(dc / 10)
+                DATA.Output_Voltages['ts'].append(elapsed_ms)
+                DATA.Output_Voltages['val'].append(output / 10)
+
+            if ID == "0x0A6":
+                a_current = int.from_bytes(bytes.fromhex(data[0:4]), byteorder="little", signed=True) / 10
+                b_current = int.from_bytes(bytes.fromhex(data[4:8]), byteorder="little", signed=True) / 10
+                c_current = int.from_bytes(bytes.fromhex(data[8:12]), byteorder="little", signed=True) / 10
+                dc_current = int.from_bytes(bytes.fromhex(data[12:16]), byteorder="little", signed=True) / 10
+                try:
+                    calculated_current = DATA.RPM['val'][-1] * DATA.Feedback_Torques['val'][-1] / 9550 * 1000 / DATA.DC_Voltages['val'][-1]
+                except Exception as e:
+                    calculated_current = 0
+                try:
+                    dc_power = DATA.DC_Voltages['val'][-1] * dc_current / 1000  # kW
+                except Exception as e:
+                    dc_power = 0
+                try:
+                    dc_comulative_power = DATA.DC_Comulative_Powers['val'][-1] + dc_power * (elapsed_ms - DATA.DC_Comulative_Powers['ts'][-1]) / 3600  # Wh
+                except Exception as e:
+                    dc_comulative_power = 0
+                DATA.A_Currents['ts'].append(elapsed_ms)
+                DATA.A_Currents['val'].append(a_current)
+                DATA.B_Currents['ts'].append(elapsed_ms)
+                DATA.B_Currents['val'].append(b_current)
+                DATA.C_Currents['ts'].append(elapsed_ms)
+                DATA.C_Currents['val'].append(c_current)
+                DATA.DC_Currents['ts'].append(elapsed_ms)
+                DATA.DC_Currents['val'].append(dc_current)
+                DATA.Calculated_Currents['ts'].append(elapsed_ms)
+                DATA.Calculated_Currents['val'].append(calculated_current)
+                DATA.DC_Powers['ts'].append(elapsed_ms)
+                DATA.DC_Powers['val'].append(dc_power)
+                DATA.DC_Comulative_Powers['ts'].append(elapsed_ms)
+                DATA.DC_Comulative_Powers['val'].append(dc_comulative_power)
+                try:
+                    if dc_power >= 0:
+                        dc_discharge_comulative_power = DATA.DC_Discharge_Comulative_Powers['val'][-1] + dc_power * (elapsed_ms - DATA.DC_Discharge_Comulative_Powers['ts'][-1]) / 3600
+                        dc_regeneration_comulative_power = DATA.DC_Regeneration_Comulative_Powers['val'][-1]
+                    else:
+                        dc_regeneration_comulative_power = DATA.DC_Regeneration_Comulative_Powers['val'][-1] + (-dc_power) * (elapsed_ms - DATA.DC_Regeneration_Comulative_Powers['ts'][-1]) / 3600
+                        dc_discharge_comulative_power = DATA.DC_Discharge_Comulative_Powers['val'][-1]
+                except Exception as e:
+                    dc_discharge_comulative_power = 0
+                    dc_regeneration_comulative_power = 0
+                
+                DATA.DC_Discharge_Comulative_Powers['ts'].append(elapsed_ms)
+                DATA.DC_Discharge_Comulative_Powers['val'].append(dc_discharge_comulative_power)
+                DATA.DC_Regeneration_Comulative_Powers['ts'].append(elapsed_ms)
+                DATA.DC_Regeneration_Comulative_Powers['val'].append(dc_regeneration_comulative_power)
+
+            if ID == "0x0C0":
+                command_torque = int.from_bytes(bytes.fromhex(data[0:4]), byteorder="little")
+                command_direction = int.from_bytes(bytes.fromhex(data[8:10]), byteorder="little")
+                DATA.VCU_Command_Torques['ts'].append(elapsed_ms)
+                DATA.VCU_Command_Torques['val'].append(command_torque / 10)
+                DATA.VCU_Command_Directions['ts'].append(elapsed_ms)
+                DATA.VCU_Command_Directions['val'].append(command_direction * 100)
+
+            if ID == "0x0AC":
+                command_torque = int.from_bytes(bytes.fromhex(data[0:4]), byteorder="little", signed=True)
+                feedback_torque = int.from_bytes(bytes.fromhex(data[4:8]), byteorder="little", signed=True) * -1
+                DATA.Command_Torques['ts'].append(elapsed_ms)
+                DATA.Command_Torques['val'].append(command_torque / 10)
+                DATA.Feedback_Torques['ts'].append(elapsed_ms)
+                DATA.Feedback_Torques['val'].append(feedback_torque / 10)
+
+            if ID == "0x000075A1":
+                value = int.from_bytes(bytes.fromhex(data[0:4]), byteorder="little")
+                ratio = int.from_bytes(bytes.fromhex(data[4:8]), byteorder="little")
+                DATA.APPS1['ts'].append(elapsed_ms)
+                DATA.APPS1['val'].append(value)
+
+            if ID == "0x000075A2":
+                value = int.from_bytes(bytes.fromhex(data[0:4]), byteorder="little")
+                ratio = int.from_bytes(bytes.fromhex(data[4:8]), byteorder="little")
+                DATA.APPS2['ts'].append(elapsed_ms)
+                DATA.APPS2['val'].append(value)
+
+            if ID == "0x000075B0":
+                value = int.from_bytes(bytes.fromhex(data[0:4]), byteorder="little")
+                ratio = int.from_bytes(bytes.fromhex(data[4:8]), byteorder="little")
+                DATA.BSE['ts'].append(elapsed_ms)
+                DATA.BSE['val'].append(value)
+
+            if ID == "0x4EC":
+                if DATA.Gyro_Ang_x['ts'] and elapsed_ms - DATA.Gyro_Ang_x['ts'][-1] < 100:
+                    continue
+                acc_x = int.from_bytes(bytes.fromhex(data[0:4]), byteorder="big", signed=True) / 10
+                acc_y = int.from_bytes(bytes.fromhex(data[4:8]), byteorder="big", signed=True) / 10
+                acc_z = int.from_bytes(bytes.fromhex(data[8:12]), byteorder="big", signed=True) / 10
+                DATA.Gyro_Ang_x['ts'].append(elapsed_ms)
+                DATA.Gyro_Ang_x['val'].append(acc_x)
+                DATA.Gyro_Ang_y['ts'].append(elapsed_ms)
+                DATA.Gyro_Ang_y['val'].append(acc_y)
+                DATA.Gyro_Ang_z['ts'].append(elapsed_ms)
+                DATA.Gyro_Ang_z['val'].append(acc_z)
+
+            if ID == "0x4ED":
+                if DATA.Gyro_Acc_x['ts'] and elapsed_ms - DATA.Gyro_Acc_x['ts'][-1] < 100:
+                    continue
+                ang_x = int.from_bytes(bytes.fromhex(data[0:4]), byteorder="big", signed=True) / 100
+                ang_y = int.from_bytes(bytes.fromhex(data[4:8]), byteorder="big", signed=True) / 100
+                ang_z = int.from_bytes(bytes.fromhex(data[8:12]), byteorder="big", signed=True) / 100
+                DATA.Gyro_Acc_x['ts'].append(elapsed_ms)
+                DATA.Gyro_Acc_x['val'].append(ang_x)
+                DATA.Gyro_Acc_y['ts'].append(elapsed_ms)
+                DATA.Gyro_Acc_y['val'].append(ang_y)
+                DATA.Gyro_Acc_z['ts'].append(elapsed_ms)
+                DATA.Gyro_Acc_z['val'].append(ang_z)
+
+            NUM_CMU_MODULE = 10  # Number of CMU modules
+            NUM_CELL_PER_CMU = 12  # Cells per CMU
+            NUM_NTC_PER_CMU = 5  # NTC sensors per CMU
+            BMS_CV_ID = [
+                "0x12905301",
+                "0x12905381",
+                "0x12905401",
+                "0x12905481",
+                "0x12905501",
+                "0x12905581",
+            ]
+            if ID in BMS_CV_ID:
+                module_id, cell_a_mv, cell_b_mv, cell_c_mv = parse_bms_data(data)
+                if module_id < NUM_CMU_MODULE:
+                    
+                    # Calculate cell indices based on message ID
+                    msg_idx = BMS_CV_ID.index(ID)
+                    cell_a_idx = msg_idx * 3
+                    cell_b_idx = msg_idx * 3 + 1
+                    cell_c_idx = msg_idx * 3 + 2
+
+                    
+                    # Update cell voltages
+                    if cell_a_idx < NUM_CELL_PER_CMU:
+                        DATA.BMS_Cell['ts'][module_id*NUM_CELL_PER_CMU + cell_a_idx].append(elapsed_ms)
+                        DATA.BMS_Cell['val'][module_id*NUM_CELL_PER_CMU + cell_a_idx].append(cell_a_mv)
+                    if cell_b_idx < NUM_CELL_PER_CMU:
+                        DATA.BMS_Cell['ts'][module_id*NUM_CELL_PER_CMU + cell_b_idx].append(elapsed_ms)
+                        DATA.BMS_Cell['val'][module_id*NUM_CELL_PER_CMU + cell_b_idx].append(cell_b_mv)
+                    if cell_c_idx < NUM_CELL_PER_CMU:
+                        DATA.BMS_Cell['ts'][module_id*NUM_CELL_PER_CMU + cell_c_idx].append(elapsed_ms)
+                        DATA.BMS_Cell['val'][module_id*NUM_CELL_PER_CMU + cell_c_idx].append(cell_c_mv)
+                    try:
+                        # print([i[-1] for i in DATA.BMS_Cell['val']])
+                        total_pack_voltage = sum([i[-1] for i in DATA.BMS_Cell['val']]) / 1000  # Convert mV to V
+                        # print(total_pack_voltage)
+                    except Exception as e:
+                        total_pack_voltage = 0
+                    DATA.BMS_Pack['ts'].append(elapsed_ms)
+                    DATA.BMS_Pack['val'].append(total_pack_voltage)
+                    try:
+                        total_segment_voltage = sum([i[-1] for i in DATA.BMS_Cell['val'][msg_idx // 4 * 12 : msg_idx // 4 * 12 + 12]]) / 1000
+                    except Exception as e:
+                        total_segment_voltage = 0
+                    DATA.BMS_Segments['ts'][module_id].append(elapsed_ms)
+                    DATA.BMS_Segments['val'][module_id].append(total_segment_voltage)
+
+
+            # # Process temperature messages
+            BMS_NTC_ID = [
+                "0x12905601",
+                "0x12905681"
+            ]
+            if ID in BMS_NTC_ID:
+                module_id, ntc_a, ntc_b, ntc_c = parse_bms_data(data)
+                if module_id < NUM_CMU_MODULE:
+                    # Calculate NTC indices
+                    msg_idx = BMS_NTC_ID.index(ID)
+                    ntc_a_idx = msg_idx * 3
+                    ntc_b_idx = msg_idx * 3 + 1
+                    ntc_c_idx = msg_idx * 3 + 2
+                    
+                    # Convert to Celsius (from 0.1 Kelvin units)
+                    ntc_a_deg_c = 0.1 * float(ntc_a) - 273.15
+                    ntc_b_deg_c = 0.1 * float(ntc_b) - 273.15
+                    ntc_c_deg_c = 0.1 * float(ntc_c) - 273.15
+                    
+                    # Update NTC temperatures, bypass -273.15 (invalid data)
+                    if ntc_a_idx < NUM_NTC_PER_CMU and ntc_a_deg_c != -273.15:
+                        DATA.NTC_Cell['ts'][module_id * NUM_NTC_PER_CMU + ntc_a_idx].append(elapsed_ms)
+                        DATA.NTC_Cell['val'][module_id * NUM_NTC_PER_CMU + ntc_a_idx].append(ntc_a_deg_c)
+                    if ntc_b_idx < NUM_NTC_PER_CMU and ntc_b_deg_c != -273.15:
+                        DATA.NTC_Cell['ts'][module_id * NUM_NTC_PER_CMU + ntc_b_idx].append(elapsed_ms)
+                        DATA.NTC_Cell['val'][module_id * NUM_NTC_PER_CMU + ntc_b_idx].append(ntc_b_deg_c)
+                    if ntc_c_idx < NUM_NTC_PER_CMU and ntc_c_deg_c != -273.15:
+                        DATA.NTC_Cell['ts'][module_id * NUM_NTC_PER_CMU + ntc_c_idx].append(elapsed_ms)
+                        DATA.NTC_Cell['val'][module_id * NUM_NTC_PER_CMU + ntc_c_idx].append(ntc_c_deg_c)
+                    
+                    try:
+                        avg_ntc_segment_temp = sum([v[-1] for v in DATA.NTC_Cell['val'][module_id * NUM_NTC_PER_CMU : (module_id + 1) * NUM_NTC_PER_CMU] if v]) / NUM_NTC_PER_CMU
+                    except Exception as e:
+                        avg_ntc_segment_temp = 0
+                    DATA.NTC_Segments['ts'][module_id].append(elapsed_ms)
+                    DATA.NTC_Segments['val'][module_id].append(avg_ntc_segment_temp)
+                    
+            if ID == "0x2B0":
+                data_bytes = bytes.fromhex(data)
+                angle = int.from_bytes(data_bytes[0:2], byteorder="little", signed=True) / 10
+                speed = int.from_bytes(data_bytes[2:3], byteorder="little", signed=True)
+
+                DATA.Steering_Angle['ts'].append(elapsed_ms)
+                DATA.Steering_Angle['val'].append(angle)
+                DATA.Steering_Speed['ts'].append(elapsed_ms)
+                DATA.Steering_Speed['val'].append(speed)
+                
+            if ID == "0x200":
+                data_bytes = bytes.fromhex(data)
+                front_left_linear = int.from_bytes(data_bytes[0:2], byteorder="big", signed=False) / 10
+                front_right_linear = int.from_bytes(data_bytes[2:4], byteorder="big", signed=False) / 10
+                DATA.Front_Left_Linear['ts'].append(elapsed_ms)
+                DATA.Front_Left_Linear['val'].append(front_left_linear)
+                DATA.Front_Right_Linear['ts'].append(elapsed_ms)
+                DATA.Front_Right_Linear['val'].append(front_right_linear)
+            
+            if ID == "0x300":
+                data_bytes = bytes.fromhex(data)
+                rear_left_linear = int.from_bytes(data_bytes[0:2], byteorder="big", signed=False) / 10
+                rear_right_linear = int.from_bytes(data_bytes[2:4], byteorder="big", signed=False) / 10
+                DATA.Rear_Left_Linear['ts'].append(elapsed_ms)
+                DATA.Rear_Left_Linear['val'].append(rear_left_linear)
+                DATA.Rear_Right_Linear['ts'].append(elapsed_ms)
+                DATA.Rear_Right_Linear['val'].append(rear_right_linear)
+            
+            if ID == "0x710":
+                data_bytes = bytes.fromhex(data)
+                front_left_wheel_speed = int.from_bytes(data_bytes[0:2], byteorder="big", signed=False) / 100
+                front_right_wheel_speed = int.from_bytes(data_bytes[2:4], byteorder="big", signed=False) / 100
+                DATA.Front_Left_Wheel_Speed['ts'].append(elapsed_ms)
+                DATA.Front_Left_Wheel_Speed['val'].append(front_left_wheel_speed)
+                DATA.Front_Right_Wheel_Speed['ts'].append(elapsed_ms)
+                DATA.Front_Right_Wheel_Speed['val'].append(front_right_wheel_speed)
+                
+            if ID == "0x702":
+                data_bytes = bytes.fromhex(data)
+                rear_left_wheel_speed = int.from_bytes(data_bytes[0:2], byteorder="big", signed=False) / 100
+                rear_right_wheel_speed = int.from_bytes(data_bytes[2:4], byteorder="big", signed=False) / 100
+                DATA.Rear_Left_Wheel_Speed['ts'].append(elapsed_ms)
+                DATA.Rear_Left_Wheel_Speed['val'].append(rear_left_wheel_speed)
+                DATA.Rear_Right_Wheel_Speed['ts'].append(elapsed_ms)
+                DATA.Rear_Right_Wheel_Speed['val'].append(rear_right_wheel_speed)
+                
+
+    # Convert all lists to numpy arrays before returning
+    for key, obj in DATA.__dict__.items():
+        if isinstance(obj, dict):
+            for subkey, val in obj.items():
+                try:
+                    obj[subkey] = np.array(val)
+                except Exception as e:
+                    obj[subkey] = [np.array(v) for v in val]
+    return DATA
+
+# --- signal definition table ---------------------------------------------------
+
+SIGNAL_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "signals.csv")
+
+
+@dataclass(frozen=True)
+class SignalDef:
+    """One row of the signal definition table.
+
+    Rows without an `id` are derived channels computed after decoding. Rows
+    with `mux` set belong to a multiplexed group: byte 0 of the frame selects
+    the module and `channel` is the slot within that module.
+    """
+    name: str
+    id: str = ""
+    start: int = 0
+    length: int = 0
+    byteorder: str = "little"
+    signed: bool = False
+    scale: float = 1.0
+    offset: float = 0.0
+    unit: str = ""
+    category: str = ""
+    label: str = ""
+    trace: str = ""
+    mux: int = 0
+    channel: int = 0
+    invalid: int = None
+    min_gap_ms: int = 0
+
+    @property
+    def derived(self):
+        return not self.id
+
+
+class MessageDecoder:
+    """Decodes all fields of one CAN ID for a batch of frames"""
+
+    def __init__(self, key, fields, channels):
+        self.key = key
+        self.fields = fields
+        self.channels = channels          # slots per module of each multiplexed field
+        self.mux = max(f.mux for f in fields)
+        self.min_gap_ms = max(f.min_gap_ms for f in fields)
+
+    def __call__(self, row, ts, payload, state):
+        """Return [(name, row, ts, val, channel)] - channel is None for plain signals.
+
+        `state` is a dict owned by the caller that carries decimation across
+        batches of the same log.
+        """
+        if self.min_gap_ms:
+            keep, state[self.key] = decimate_ms(ts, self.min_gap_ms, state.get(self.key))
+            row, ts, payload = row[keep], ts[keep], payload[keep]
+        if self.mux:
+            module = payload[:, 0].astype(np.int64)
+            keep = module < self.mux
+            row, ts, payload, module = row[keep], ts[keep], payload[keep], module[keep]
+        out = []
+        for f in self.fields:
+            raw = bulk_field(payload, f.start, f.length, f.byteorder, f.signed)
+            if float(f.scale).is_integer() and f.offset == 0:
+                val = raw * int(f.scale)
+            else:
+                val = raw * f.scale + f.offset
+            r, t, channel = row, ts, None
+            if f.mux:
+                channel = module * self.channels[f.name] + f.channel
+            if f.invalid is not None:
+                ok = raw != f.invalid
+                r, t, val = r[ok], t[ok], val[ok]
+                channel = channel[ok] if channel is not None else None
+            out.append((f.name, r, t, val, channel))
+        return out
+
+
+class SignalDB:
+    """The signal table compiled into an ID -> decoder dispatch table, the
+    storage layout of Data and the sidebar checkbox tree"""
+
+    def __init__(self, signals, digest=""):
+        self.signals = signals
+        self.digest = digest              # hash of the table file, part of the cache key
+        self.groups = {}
+        for s in signals:
+            self.groups.setdefault(s.name, []).append(s)
+        for name, rows in self.groups.items():
+            aggregated = any(name in outputs for _, outputs in AGGREGATES.values())
+            if rows[0].derived and name not in DERIVED and not aggregated:
+                raise ValueError(f"{name}: derived signal has no entry in DERIVED or AGGREGATES")
+        # slots per module of every multiplexed group
+        self.channels = {
+            name: max(r.channel for r in rows) + 1
+            for name, rows in self.groups.items() if rows[0].mux and not rows[0].derived
+        }
+        by_key = {}
+        for s in signals:
+            if not s.derived:
+                by_key.setdefault(can_id_key(s.id), []).append(s)
+        self.decoders = {key: MessageDecoder(key, fields, self.channels) for key, fields in by_key.items()}
+        # signals decode together with the other fields of their IDs; IDs
+        # that share a signal (a group spread over several IDs) decode as one
+        # unit, and a group's AGGREGATES come with it
+        units = []
+        for key, decoder in self.decoders.items():
+            keys, names = {key}, {f.name for f in decoder.fields}
+            for unit in [u for u in units if u[1] & names]:
+                units.remove(unit)
+                keys |= unit[0]
+                names |= unit[1]
+            units.append((keys, names))
+        self.units = {}                   # name -> (keys, names) of its unit
+        for keys, names in units:
+            for cells, (_, outputs) in AGGREGATES.items():
+                if cells in names:
+                    names |= set(outputs)
+            unit = tuple(sorted(keys)), tuple(n for n in self.groups if n in names)
+            for name in unit[1]:
+                self.units[name] = unit
+
+    def layout(self):
+        """name -> number of channels (0 for a plain signal)"""
+        out = {}
+        for name, rows in self.groups.items():
+            if not rows[0].mux:
+                out[name] = 0
+            elif rows[0].derived:
+                out[name] = rows[0].mux
+            else:
+                out[name] = rows[0].mux * self.channels[name]
+        return out
+
+    def channel_names(self, name):
+        """Trace names of the channels of a group, [name] for a plain signal"""
+        s = self.groups[name][0]
+        n = self.layout()[name]
+        if not n:
+            return [name]
+        if s.derived:
+            return [s.trace.format(module=m + 1) for m in range(n)]
+        per = self.channels[name]
+        return [s.trace.format(module=i // per + 1, channel=i % per + 1) for i in range(n)]
+
+    def categories(self):
+        """{category: [(checkbox label, signal name, module or None)]} in table order"""
+        out = {}
+        for name, rows in self.groups.items():
+            s = rows[0]
+            unit = f"({s.unit})" if s.unit else ""
+            items = out.setdefault(s.category, [])
+            if s.mux and not s.derived:
+                for m in range(s.mux):
+                    items.append((s.label.format(module=m + 1) + unit, name, m))
+            else:
+                items.append(((s.label or name.replace("_", " ")) + unit, name, None))
+        return out
+
+
+def read_table(path, cls):
+    """One `cls` (a dataclass) per row of a CSV table; empty cells take the field default"""
+    types = {f.name: f.type for f in fields(cls)}
+    rows = []
+    with open(path, mode="r", encoding="utf-8", newline="") as f:
+        for line, row in enumerate(csv.DictReader(f), start=2):
+            kwargs = {}
+            for key, text in row.items():
+                text = (text or "").strip()
+                if not text:
+                    continue
+                if key not in types:
+                    raise ValueError(f"{path}:{line}: unknown column {key!r}")
+                if types[key] is bool:
+                    kwargs[key] = text.lower() in ("true", "1", "yes")
+                elif types[key] in (int, float):
+                    kwargs[key] = types[key](text)
+                else:
+                    kwargs[key] = text
+            rows.append(cls(**kwargs))
+    return rows
+
+
+def load_signal_db(path=SIGNAL_DB_PATH):
+    """Read a signal definition table (see signals.csv)"""
+    with open(path, mode="rb") as f:
+        digest = hashlib.sha1(f.read()).hexdigest()
+    return SignalDB(read_table(path, SignalDef), digest)
+
+
+# --- bulk (columnar) decoding -------------------------------------------------
+
+CSV_BLOCK_SIZE = 4 * 1024 * 1024    # bytes read per block in the bulk path (any log format)
+CAN_EFF_FLAG = 0x80000000           # set in frame keys of 29-bit (extended) IDs
+
+# ASCII -> nibble value, 0xFF for anything that is not a hex digit
+_HEX_LUT = np.full(256, 0xFF, dtype=np.uint8)
+for _i, _c in enumerate(b"0123456789abcdef"):
+    _HEX_LUT[_c] = _i
+    _HEX_LUT[ord(chr(_c).upper())] = _i
+
+
+def can_id_key(text):
+    """Frame key of an ID as written in the log ("0x0A0" standard, "0x000075A1" extended)"""
+    digits = text[2:] if text[:2].lower() == "0x" else text
+    key = int(digits, 16)
+    if len(digits) > 3:
+        key |= CAN_EFF_FLAG
+    return key
+
+
+def _parse_decimal(a, start, end):
+    """Parse the unsigned decimal field a[start:end] of every line"""
+    width = end - start
+    val = np.zeros(len(start), dtype=np.int64)
+    ok = width > 0
+    for j in range(int(width.max(initial=0))):
+        m = j < width
+        d = a[np.where(m, start + j, 0)].astype(np.int64) - 48
+        ok &= ~m | ((d >= 0) & (d <= 9))
+        val = np.where(m, val * 10 + d, val)
+    return val, ok
+
+
+def _parse_id(a, start, end):
+    """Parse the ID field of every line into frame keys (see can_id_key)"""
+    prefixed = (end - start > 2) & (a[start] == ord("0")) & ((a[start + 1] | 0x20) == ord("x"))
+    start = start + 2 * prefixed
+    width = end - start
+    key = np.zeros(len(start), dtype=np.int64)
+    ok = (width > 0) & (width <= 8)
+    for j in range(int(width.max(initial=0))):
+        m = j < width
+        n = _HEX_LUT[a[np.where(m, start + j, 0)]].astype(np.int64)
+        ok &= ~m | (n != 0xFF)
+        key = np.where(m, (key << 4) | n, key)
+    key |= np.where(width > 3, CAN_EFF_FLAG, 0)
+    return key, ok
+
+
+def _parse_payload(a, start, end):
+    """Parse the hex Data field of every line into an (n, 8) uint8 matrix, zero padded"""
+    nchar = end - start
+    payload = np.zeros((len(start), 8), dtype=np.uint8)
+    ok = np.ones(len(start), dtype=bool)
+    for k in range(8):
+        m = 2 * k + 1 < nchar
+        if not m.any():
+            break
+        hi = _HEX_LUT[a[np.where(m, start + 2 * k, 0)]]
+        lo = _HEX_LUT[a[np.where(m, start + 2 * k + 1, 0)]]
+        ok &= ~m | ((hi != 0xFF) & (lo != 0xFF))
+        payload[:, k] = np.where(m, (hi << 4) | lo, 0)
+    return payload, ok
+
+
+def parse_csv_block(buf):
+    """Decode a block of complete CSV lines into (ts, key, payload) arrays.
+
+    Lines that do not have exactly five fields or fail to parse are dropped.
+    """
+    a = np.frombuffer(buf, dtype=np.uint8)
+    nl = np.flatnonzero(a == ord("\n"))
+    line_start = np.concatenate(([0], nl[:-1] + 1))
+    line_end = nl - ((a[np.maximum(nl - 1, 0)] == ord("\r")) & (nl > line_start))
+    commas = np.flatnonzero(a == ord(","))
+    first = np.searchsorted(commas, line_start)
+    good = np.searchsorted(commas, line_end) - first == 4
+    c = commas[first[good][:, None] + np.arange(4)]
+    ts, ok_ts = _parse_decimal(a, line_start[good], c[:, 0])
+    key, ok_id = _parse_id(a, c[:, 0] + 1, c[:, 1])
+    payload, ok_data = _parse_payload(a, c[:, 3] + 1, line_end[good])
+    ok = ok_ts & ok_id & ok_data
+    return ts[ok], key[ok], payload[ok]
+
+
+def iter_csv_blocks(f, block_size=CSV_BLOCK_SIZE, limit=None, counter=None):
+    """Yield newline-terminated blocks of whole lines from a binary file,
+    reading at most `limit` bytes from the current position; `counter` (a
+    dict) gets the number of lines read under "lines"."""
+    tail = b""
+    while True:
+        if limit is not None:
+            block_size = min(block_size, limit)
+            limit -= block_size
+        chunk = f.read(block_size)
+        if not chunk:
+            break
+        buf = tail + chunk
+        cut = buf.rfind(b"\n") + 1
+        tail = buf[cut:]
+        if cut:
+            if counter is not None:
+                counter["lines"] = counter.get("lines", 0) + buf.count(b"\n", 0, cut)
+            yield buf[:cut]
+    if tail.strip():
+        if counter is not None:
+            counter["lines"] = counter.get("lines", 0) + 1
+        yield tail + b"\n"
+
+
+def read_csv(f, block_size=CSV_BLOCK_SIZE, limit=None, counter=None):
+    """Reader of the logger's CSV export (Timestamp,ID,Extended,Length,Data)"""
+    for buf in iter_csv_blocks(f, block_size, limit, counter):
+        yield parse_csv_block(buf)
+
+
+def _hex_nibbles(fields, width):
+    """Hex digit strings (at most `width` long) as an (n, width) matrix of
+    nibble values, 0xFF for non-hex characters and past the end"""
+    a = np.array(fields, dtype=f"S{width}").view(np.uint8).reshape(-1, width)
+    return _HEX_LUT[a]
+
+
+def _nibbles_to_key(nib):
+    """Fold an ID nibble matrix (digits left aligned) into integer IDs and their digit counts"""
+    width = (nib != 0xFF).sum(axis=1)
+    key = np.zeros(len(nib), dtype=np.int64)
+    for j in range(nib.shape[1]):
+        key = np.where(j < width, (key << 4) | nib[:, j], key)
+    return key, width
+
+
+def _nibbles_to_payload(nib):
+    """Pairs of payload nibbles as an (n, 8) uint8 matrix, zero padded"""
+    hi, lo = nib[:, 0::2], nib[:, 1::2]
+    present = (hi != 0xFF) & (lo != 0xFF)
+    return np.where(present, (hi << 4) | lo, 0).astype(np.uint8)
+
+
+def _seconds_to_ms(fields):
+    return np.rint(np.array(fields, dtype=np.bytes_).astype(np.float64) * 1000).astype(np.int64)
+
+
+# (1436509052.249713) can0 12345678#DEADBEEF    - `candump -l` / log2asc input
+_CANDUMP_LINE = re.compile(rb"^\((\d+\.\d+)\)\s+\S+\s+([0-9A-Fa-f]{1,8})#((?:[0-9A-Fa-f]{2}){0,8})\s*$", re.M)
+
+
+def read_candump(f, block_size=CSV_BLOCK_SIZE, limit=None, counter=None):
+    """Reader of Linux `candump -l` logs. 8-digit IDs are extended, as in the
+    CSV; remote and CAN FD frames are skipped."""
+    for buf in iter_csv_blocks(f, block_size, limit, counter):
+        lines = _CANDUMP_LINE.findall(buf)
+        if not lines:
+            continue
+        ts, ids, data = zip(*lines)
+        key, width = _nibbles_to_key(_hex_nibbles(ids, 8))
+        key |= np.where(width > 3, CAN_EFF_FLAG, 0)
+        yield _seconds_to_ms(ts), key, _nibbles_to_payload(_hex_nibbles(data, 16))
+
+
+#    0.015991 1  18FEF100x       Rx   d 8 01 02 03 04 05 06 07 08 ...
+_ASC_LINE = re.compile(
+    rb"^\s*(\d+\.\d+)\s+\d+\s+([0-9A-Fa-f]{1,8})(x?)\s+(?:Rx|Tx)\s+d\s+\d+((?:[ \t]+[0-9A-Fa-f]{2}){0,8})", re.M
+)
+
+
+_ASC_HEADER = re.compile(rb"^\s*base\s+(\w+)(?:[ \t]+timestamps[ \t]+(\w+))?", re.M)     # "base hex  timestamps absolute"
+
+
+def read_asc(f, block_size=CSV_BLOCK_SIZE, limit=None, counter=None):
+    """Reader of Vector ASC logs (base hex, absolute timestamps); an "x" after
+    the ID marks it extended. Error, remote and CAN FD lines are skipped.
+    A log written with "base dec" or "timestamps relative" raises
+    ValueError rather than being read as hex with absolute times."""
+    first = True
+    for buf in iter_csv_blocks(f, block_size, limit, counter):
+        if first:
+            header = _ASC_HEADER.search(buf)
+            if header is not None:
+                base, stamps = (g.decode(errors="replace").lower() if g else None for g in header.groups())
+                if base != "hex":
+                    raise ValueError(
+                        f"ASC log with \"base {base}\": only base hex is supported, "
+                        "export it from CANalyzer/CANoe with hexadecimal numbers"
+                    )
+                if stamps not in (None, "absolute"):
+                    raise ValueError(
+                        f"ASC log with \"timestamps {stamps}\": only absolute timestamps are "
+                        "supported, export it from CANalyzer/CANoe with absolute timestamps"
+                    )
+            first = False
+        lines = _ASC_LINE.findall(buf)
+        if not lines:
+            continue
+        ts, ids, ext, data = zip(*lines)
+        key, _ = _nibbles_to_key(_hex_nibbles(ids, 8))
+        key |= np.where(np.array(ext, dtype=np.bytes_) == b"x", CAN_EFF_FLAG, 0)
+        data = [d.replace(b" ", b"").replace(b"\t", b"") for d in data]
+        yield _seconds_to_ms(ts), key, _nibbles_to_payload(_hex_nibbles(data, 16))
+
+
+# BLF: a file header, then LOBJ objects; the frames sit in (usually zlib
+# compressed) LOG_CONTAINER objects whose contents are themselves a stream
+# of objects that can continue in the next container.
+BLF_OBJ_HEADER = struct.Struct("<4sHHII")           # signature, header size, header version, object size, type
+BLF_CONTAINER = struct.Struct("<H6xI4x")            # compression method, uncompressed size
+BLF_CAN_MESSAGE, BLF_LOG_CONTAINER, BLF_CAN_MESSAGE2 = 1, 10, 86
+BLF_TIME_TEN_MICS = 1                               # object flag: timestamp in 10 us, else ns
+
+
+def _blf_objects(stream):
+    """Start offsets of the complete objects in a BLF object stream, and the
+    offset where the incomplete rest begins"""
+    a = np.frombuffer(stream, dtype=np.uint8)
+    # every LOBJ signature is a candidate; take them all if they chain up,
+    # else (a payload that happens to spell LOBJ) walk the stream
+    cand = np.flatnonzero((a[:-3] == 76) & (a[1:-2] == 79) & (a[2:-1] == 66) & (a[3:] == 74)) if len(a) >= 4 else np.empty(0, np.int64)
+    cand = cand[cand + BLF_OBJ_HEADER.size <= len(a)]
+    if len(cand) and cand[0] == 0:
+        size = a[cand[:, None] + np.arange(8, 12)].copy().view("<u4")[:, 0].astype(np.int64)
+        nxt = cand + size + size % 4
+        if (nxt[:-1] == cand[1:]).all():
+            done = nxt <= len(a)
+            return cand[done], int(nxt[done][-1]) if done.any() else 0
+    starts = []
+    pos = 0
+    while pos + BLF_OBJ_HEADER.size <= len(stream):
+        sig, _, _, size, _ = BLF_OBJ_HEADER.unpack_from(stream, pos)
+        if sig != b"LOBJ" or size < BLF_OBJ_HEADER.size:
+            raise ValueError(f"corrupt BLF object at stream offset {pos}")
+        if pos + size > len(stream):
+            break
+        starts.append(pos)
+        pos += size + size % 4
+    return np.array(starts, dtype=np.int64), min(pos, len(stream))
+
+
+def _blf_can_frames(stream, starts):
+    """(ts, key, payload) of the CAN_MESSAGE(2) objects starting at `starts`"""
+    a = np.frombuffer(stream, dtype=np.uint8)
+    head = a[starts[:, None] + np.arange(16)].copy()
+    hsize = head[:, 4:6].copy().view("<u2")[:, 0].astype(np.int64)
+    otype = head[:, 12:16].copy().view("<u4")[:, 0]
+    can = starts[(otype == BLF_CAN_MESSAGE) | (otype == BLF_CAN_MESSAGE2)]
+    hsize = hsize[(otype == BLF_CAN_MESSAGE) | (otype == BLF_CAN_MESSAGE2)]
+    flags = a[can[:, None] + np.arange(16, 20)].copy().view("<u4")[:, 0]
+    stamp = a[can[:, None] + np.arange(24, 32)].copy().view("<u8")[:, 0]
+    # ms since the start of the measurement, rounded like the text formats
+    ts = np.rint(stamp / np.where(flags & BLF_TIME_TEN_MICS, 100.0, 1e6)).astype(np.int64)
+    body = a[(can + hsize)[:, None] + np.arange(16)]
+    arb = body[:, 4:8].copy().view("<u4")[:, 0].astype(np.int64)
+    key = (arb & 0x1FFFFFFF) | np.where(arb & CAN_EFF_FLAG, CAN_EFF_FLAG, 0)
+    dlc = np.minimum(body[:, 3], 8)
+    payload = np.where(np.arange(8) < dlc[:, None], body[:, 8:16], 0).astype(np.uint8)
+    return ts, key, payload
+
+
+def read_blf(f, block_size=CSV_BLOCK_SIZE, limit=None, counter=None):
+    """Reader of Vector BLF logs (CAN_MESSAGE and CAN_MESSAGE2 objects).
+    Container contents are collected until about `block_size` bytes, then
+    the frames of all the complete objects are pulled out at once."""
+    head = f.read(8)
+    if len(head) < 8:
+        raise ValueError("not a BLF file (empty or truncated)")
+    sig, header_size = struct.unpack("<4sI", head)
+    if sig != b"LOGG":
+        raise ValueError("not a BLF file")
+    f.read(header_size - len(head))     # read, not seek: a zstd stream cannot seek
+    stream = b""
+    parts = []
+    while True:
+        head = f.read(BLF_OBJ_HEADER.size)
+        if len(head) < BLF_OBJ_HEADER.size:
+            break
+        sig, hsize, _, size, otype = BLF_OBJ_HEADER.unpack(head)
+        if sig != b"LOBJ":
+            raise ValueError(f"corrupt BLF object at offset {f.tell() - len(head)}")
+        body = f.read(size - BLF_OBJ_HEADER.size)
+        f.read(size % 4)
+        if otype == BLF_LOG_CONTAINER:
+            method, _ = BLF_CONTAINER.unpack_from(body)
+            data = body[BLF_CONTAINER.size:]
+            parts.append(zlib.decompress(data) if method == 2 else data)
+        else:
+            parts.append(head + body + bytes(size % 4))
+        if sum(map(len, parts)) >= block_size:
+            stream = b"".join([stream] + parts)
+            parts = []
+            starts, rest = _blf_objects(stream)
+            yield _blf_can_frames(stream, starts)
+            stream = stream[rest:]
+    stream = b"".join([stream] + parts)
+    starts, _ = _blf_objects(stream)
+    yield _blf_can_frames(stream, starts)
+
+
+@dataclass(frozen=True)
+class LogFormat:
+    """How to read one log file format"""
+    read: object                # read(f, block_size, limit, counter) -> iterator of (ts, key, payload) arrays
+    header: bool = False        # first line is a header
+    lines: bool = True          # newline-delimited, so byte ranges decode in parallel
+
+
+LOG_FORMATS = {
+    ".csv": LogFormat(read_csv, header=True),
+    ".asc": LogFormat(read_asc),
+    ".log": LogFormat(read_candump),
+    ".blf": LogFormat(read_blf, lines=False),
+}
+
+
+def log_extension(filepath):
+    """Extension of the log format of a file, that of the file inside for a
+    compressed one (".csv" for "run.csv.gz")"""
+    root, ext = os.path.splitext(filepath)
+    if ext.lower() in COMPRESSED_EXTENSIONS:
+        ext = os.path.splitext(root)[1]
+    return ext.lower()
+
+
+def log_format(filepath):
+    """LogFormat of a log, by extension (the CSV export for anything unknown)"""
+    return LOG_FORMATS.get(log_extension(filepath), LOG_FORMATS[".csv"])
+
+
+# --- compressed logs -------------------------------------------------------------
+# Compressed logs are decompressed chunk by chunk into the readers, never to
+# disk. gzip members and zstd frames decompress independently, so a log made
+# of many (bgzip, pzstd, concatenated files) is split between them and indexed
+# in parallel like the byte ranges of a plain log (see log_byte_ranges).
+
+COMPRESSIONS = {                        # magic bytes -> compression
+    b"\x1f\x8b": "gzip",
+    b"\x28\xb5\x2f\xfd": "zstd",
+    b"\xfd7zXZ\x00": "xz",
+}
+COMPRESSED_EXTENSIONS = {".gz": "gzip", ".zst": "zstd", ".xz": "xz"}
+ZSTD_MAGIC, ZSTD_SKIPPABLE = 0xFD2FB528, 0x184D2A50     # the latter & 0xFFFFFFF0
+GZIP_OS = set(range(14)) | {255}
+
+
+def log_compression(filepath):
+    """"gzip", "zstd" or "xz" for a compressed log, by its magic bytes, else None"""
+    with open(filepath, "rb") as f:
+        head = f.read(6)
+    return next((name for magic, name in COMPRESSIONS.items() if head.startswith(magic)), None)
+
+
+def decompressing(f, compression):
+    """Binary reader of the decompressed contents of `f` (a binary file
+    positioned at the start of a gzip member or zstd frame), decompressing as
+    it is read; `f` itself when `compression` is None"""
+    if compression is None:
+        return f
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=f, mode="rb")
+    if compression == "xz":
+        return lzma.LZMAFile(f)
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("reading zstd logs needs zstandard (pip install zstandard)") from None
+    # buffered for readline(); skippable frames are passed over
+    return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(f, read_across_frames=True), CSV_BLOCK_SIZE)
+
+
+def _zstd_frames(f, size):
+    """(start, end) of the frames of a zstd file, found from the frame and
+    block headers without decompressing; skippable frames are left out"""
+    frames = []
+    pos = 0
+    while pos < size:
+        f.seek(pos)
+        magic = int.from_bytes(f.read(4), "little")
+        if magic & 0xFFFFFFF0 == ZSTD_SKIPPABLE:
+            pos += 8 + int.from_bytes(f.read(4), "little")
+            continue
+        if magic != ZSTD_MAGIC:
+            raise ValueError(f"corrupt zstd frame at offset {pos}")
+        fhd = f.read(1)[0]
+        single_segment, fcs = fhd >> 5 & 1, fhd >> 6
+        end = pos + 5 + (not single_segment) + (0, 1, 2, 4)[fhd & 3] + (single_segment, 2, 4, 8)[fcs]
+        while True:
+            f.seek(end)
+            block = int.from_bytes(f.read(3), "little")
+            end += 3 + (1 if block >> 1 & 3 == 1 else block >> 3)      # an RLE block holds one byte
+            if block & 1 or end >= size:
+                break
+        end += 4 * (fhd >> 2 & 1)                                      # content checksum
+        frames.append((pos, min(end, size)))
+        pos = end
+    return frames
+
+
+def _gzip_members(f, size, chunk=CSV_BLOCK_SIZE):
+    """(start, end) of the likely members of a gzip file: where a header
+    could start (magic, deflate, valid flags, extra flags and OS). A match
+    inside compressed data is possible, if rare; decompressing the range
+    then fails its CRC or end-of-member check (see iter_log_blocks)."""
+    starts = [0]
+    f.seek(0)
+    base, buf = 0, b""
+    while True:
+        data = f.read(chunk)
+        if not data:
+            break
+        buf = buf[-10:] + data              # a header cut at the end of the last chunk
+        offset = base - (len(buf) - len(data))
+        i = buf.find(b"\x1f\x8b\x08")
+        while 0 <= i <= len(buf) - 10:
+            if not buf[i + 3] & 0xE0 and buf[i + 8] in (0, 2, 4) and buf[i + 9] in GZIP_OS and offset + i > starts[-1]:
+                starts.append(offset + i)
+            i = buf.find(b"\x1f\x8b\x08", i + 1)
+        base += len(data)
+    return list(zip(starts, starts[1:] + [size]))
+
+
+def compressed_members(filepath, compression=None):
+    """(start, end) byte ranges of the parts of a compressed log that
+    decompress on their own: zstd frames, gzip members, a single one for xz"""
+    compression = compression or log_compression(filepath)
+    size = os.path.getsize(filepath)
+    with open(filepath, "rb") as f:
+        if compression == "zstd":
+            return _zstd_frames(f, size)
+        if compression == "gzip":
+            return _gzip_members(f, size)
+    return [(0, size)]
+
+
+def _iter_member_blocks(fmt, f, compression, byte_range, block_size, counter):
+    """iter_log_blocks over whole members (`byte_range`) of a compressed
+    line-based log: the partial lines at the range's edges are put in
+    `counter` instead of being parsed"""
+    start, end = byte_range
+    f.seek(start)
+    whole = end >= os.fstat(f.fileno()).st_size     # the rest of the log: streamed
+    source = f if whole else io.BytesIO(f.read(end - start))
+    base = 0 if whole else start
+    stream = decompressing(source, compression)
+    lines = counter if "lines" in counter else None
+    head, tail = None, b""
+    while True:
+        chunk = stream.read(block_size)
+        if not chunk:
+            break
+        buf = tail + chunk
+        if head is None:
+            cut = buf.find(b"\n") + 1
+            if not cut:
+                tail = buf
+                continue
+            head, buf = buf[:cut], buf[cut:]
+        cut = buf.rfind(b"\n") + 1
+        tail = buf[cut:]
+        if cut:
+            for block in fmt.read(io.BytesIO(buf[:cut]), block_size, None, lines):
+                counter["rows"] = counter.get("rows", 0) + len(block[0])
+                counter["bytes"] = base + source.tell()
+                yield block
+    counter["head"], counter["tail"] = head, tail
+    counter["bytes"] = end
+
+
+def iter_log_blocks(filepath, block_size=CSV_BLOCK_SIZE, byte_range=None, counter=None):
+    """Yield the (ts, key, payload) arrays of each block of the file.
+
+    `byte_range` = (start, end) reads only that newline-aligned part of a
+    line-based log; `counter` (a dict) receives the number of parsed frames
+    under "rows", the file position reached under "bytes" and, if it has a
+    "lines" entry, the lines read (header excluded) of a line-based log.
+
+    A compressed log is decompressed as it is read; "bytes" counts its
+    compressed bytes. Its byte ranges are whole members (compressed_members),
+    which split lines anywhere: the partial first line of the range (through
+    its newline, None if there is none) goes to counter["head"] and the rest
+    after the last newline to counter["tail"], both unparsed.
+    """
+    fmt = log_format(filepath)
+    compression = log_compression(filepath)
+    counter = {} if counter is None else counter
+    lines = counter if "lines" in counter else None
+    rows = 0
+    with open(filepath, "rb") as raw:
+        if byte_range is not None and compression is not None:
+            yield from _iter_member_blocks(fmt, raw, compression, byte_range, block_size, counter)
+            return
+        f = decompressing(raw, compression)
+        if byte_range is None:
+            if fmt.header:
+                f.readline()
+            limit = None
+        else:
+            f.seek(byte_range[0])
+            limit = byte_range[1] - byte_range[0]
+        for ts, key, payload in fmt.read(f, block_size, limit, lines):
+            rows += len(ts)
+            counter["rows"] = rows
+            counter["bytes"] = raw.tell()
+            yield ts, key, payload
+
+
+def group_frames(row, ts, key, payload, wanted):
+    """{key: (row, ts, payload)} of the frames whose key is in the sorted
+    array `wanted`, each ID's frames in their original order"""
+    keep = np.isin(key, wanted)
+    row, ts, key, payload = row[keep], ts[keep], key[keep], payload[keep]
+    order = np.argsort(key, kind="stable")
+    uniq, first = np.unique(key[order], return_index=True)
+    return {
+        k: (row[sl], ts[sl], payload[sl])
+        for k, sl in zip(uniq.tolist(), np.split(order, first[1:]))
+    }
+
+
+def bulk_field(payload, offset, length, byteorder="little", signed=False):
+    """Decode one integer field of every frame through a typed view of the payload"""
+    dtype = np.dtype(("<" if byteorder == "little" else ">") + ("i" if signed else "u") + str(length))
+    raw = np.ascontiguousarray(payload[:, offset:offset + length]).view(dtype)[:, 0]
+    return raw.astype(np.int64)
+
+
+def decimate_ms(ts, min_gap, last=None):
+    """Indices of the frames kept when a frame closer than `min_gap` to the
+    last kept one is skipped, and the new last kept timestamp. `last` carries
+    the rule over from the previous batch."""
+    keep = []
+    if np.all(ts[1:] >= ts[:-1]):
+        i = 0 if last is None else int(np.searchsorted(ts, last + min_gap, side="left"))
+        while i < len(ts):
+            keep.append(i)
+            last = int(ts[i])
+            i = int(np.searchsorted(ts, ts[i] + min_gap, side="left"))
+    else:
+        for i, t in enumerate(ts.tolist()):
+            if last is None or t - last >= min_gap:
+                keep.append(i)
+                last = t
+    return np.array(keep, dtype=np.intp), last
+
+
+def running_integral(ts, rate):
+    """Left-to-right sum of rate * dt / 3600 that starts at 0, as the row loop accumulates it"""
+    out = np.zeros(len(ts), dtype=np.float64)
+    if len(ts) > 1:
+        out[1:] = np.cumsum(rate[1:] * np.diff(ts) / 3600)
+    return out
+
+
+def _group_cumsum(x, group):
+    """Cumulative sum of `x` restarting at every change of the (sorted) `group`"""
+    c = np.cumsum(x)
+    start = np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+    base = np.r_[0, c[start[1:] - 1]]
+    return c - np.repeat(base, np.diff(np.r_[start, len(x)]))
+
+
+class ModuleTotals:
+    """Latest value of every channel of a multiplexed group (BMS_Cell,
+    NTC_Cell), carried from batch to batch so the pack and per-module totals
+    are extended by deltas instead of re-summed over all channels.
+
+    A channel counts as missing until its first sample; `seen` tells how
+    many channels of the pack / module have reported.
+    """
+    def __init__(self, channels, per_module):
+        self.per_module = per_module
+        self.latest = np.zeros(channels, dtype=np.float64)
+        self.seen = np.zeros(channels, dtype=bool)
+
+    def update(self, row, val, channel):
+        """Totals after each frame of a batch of samples in file order.
+
+        Returns (last, module, pack, pack_seen, segment, segment_seen) with
+        one entry per frame: `last` indexes the frame's last sample, `module`
+        is the module it reported and the totals include it.
+        """
+        val = val.astype(np.float64)
+        n_modules = len(self.latest) // self.per_module
+        # previous value of each sample's channel: the sample before it in
+        # this batch, else the carried state (0 for a channel never seen)
+        order = np.argsort(channel, kind="stable")
+        ch = channel[order]
+        first = np.r_[True, ch[1:] != ch[:-1]]
+        prev, new = np.empty_like(val), np.empty(len(val), dtype=bool)
+        prev[order] = np.where(first, self.latest[ch], np.r_[0.0, val[order][:-1]])
+        new[order] = first & ~self.seen[ch]
+        delta = val - prev
+
+        module = channel // self.per_module
+        pack = self.latest.sum() + np.cumsum(delta)
+        pack_seen = self.seen.sum() + np.cumsum(new)
+        by_module = np.argsort(module, kind="stable")
+        m = module[by_module]
+        segment, segment_seen = np.empty_like(val), np.empty(len(val), dtype=np.int64)
+        segment[by_module] = self.latest.reshape(n_modules, -1).sum(axis=1)[m] + _group_cumsum(delta[by_module], m)
+        segment_seen[by_module] = self.seen.reshape(n_modules, -1).sum(axis=1)[m] + _group_cumsum(new[by_module], m)
+
+        last_of_channel = np.flatnonzero(np.r_[ch[1:] != ch[:-1], True])
+        self.latest[ch[last_of_channel]] = val[order][last_of_channel]
+        self.seen[ch] = True
+        last = np.flatnonzero(np.r_[row[1:] != row[:-1], True])
+        return last, module[last], pack[last], pack_seen[last], segment[last], segment_seen[last]
+
+
+def decode_block(DATA, frames, state, db=None, stats=None):
+    """Decode one block of frames ({key: (row, ts, payload)}), one vectorized
+    pass per message, and append the samples to DATA's columns, extending
+    the AGGREGATES of the groups as well (see extend_aggregates). A LoadStats
+    `stats` gets the time spent on each ID and on the aggregates."""
+    db = db or SIGNAL_DB
+    parts = {}
+    for key, (row, ts, payload) in frames.items():
+        decoder = db.decoders.get(key)
+        if decoder is None:
+            continue
+        start = time.perf_counter() if stats is not None else 0
+        for name, r, t, val, channel in decoder(row, ts, payload, state):
+            parts.setdefault(name, []).append((r, t, val, channel))
+        if stats is not None:
+            stats.add_decode(key, time.perf_counter() - start)
+
+    start = time.perf_counter() if stats is not None else 0
+    groups = {}
+    for name, chunks in parts.items():
+        col = getattr(DATA, name)
+        if chunks[0][3] is None:
+            for row, ts, val, _ in chunks:
+                col.append(ts, val)
+            continue
+        # fields of a group come from several IDs: put them back in file order
+        row, ts, val, channel = (np.concatenate(c) for c in zip(*chunks))
+        order = np.argsort(row, kind="stable")
+        groups[name] = row[order], ts[order], val[order], channel[order]
+        col.append(channel[order], ts[order], val[order])
+    if stats is not None:
+        aggregate = time.perf_counter()
+        stats.add("columns", aggregate - start)
+    extend_aggregates(DATA, groups, state, db)
+    if stats is not None:
+        stats.add("aggregate", time.perf_counter() - aggregate)
+
+
+def extend_aggregates(DATA, groups, state, db=None):
+    """Extend the AGGREGATES of the groups in `groups` (samples in file order)
+    with the ModuleTotals carried in `state`"""
+    db = db or SIGNAL_DB
+    totals = state.setdefault("totals", {})
+    for cells, (append, _) in AGGREGATES.items():
+        if cells in groups:
+            if cells not in totals:
+                totals[cells] = module_totals(db, cells)
+            append(DATA, db, groups[cells], totals[cells])
+
+
+def decode_all(DATA, db=None):
+    """Decode and derive every signal of the table now instead of on first use"""
+    db = db or SIGNAL_DB
+    for name in db.groups:
+        getattr(DATA, name)
+
+
+# --- derived channels -------------------------------------------------------------
+# Each function fills one or more derived signals from the decoded columns of
+# DATA, in float64. Sources are aligned on the derived signal's timestamps:
+# a source's value is its latest sample at or before that time, NaN before
+# its first sample.
+
+def value_at(col, ts):
+    """Latest value of `col` at or before each of `ts` (NaN before its first sample)"""
+    idx = np.searchsorted(col.ts, ts, side="right") - 1
+    if len(col) == 0:
+        return np.full(len(ts), np.nan)
+    return np.where(idx >= 0, col.val[np.maximum(idx, 0)].astype(np.float64), np.nan)
+
+def _new_samples(col, state=None):
+    """(ts, val as float64, lead) of the samples of `col` to derive from: all
+    of them, or with a `state` dict (live capture, `col` a RingColumn) those
+    appended since the last call, led (lead = 1) by the last sample of the
+    previous call so that differences carry across calls. Samples that left
+    the ring before this call are lost to the derivation, which is why live
+    batches are capped at the ring size (see read_socketcan)."""
+    ts, val = col.ts, col.val
+    if state is None:
+        return ts, val.astype(np.float64), 0
+    new = min(col.total - state.get("total", 0), len(ts))
+    state["total"] = col.total
+    ts, val = ts[len(ts) - new:], val[len(val) - new:].astype(np.float64)
+    lead = int("ts" in state)
+    if lead:
+        ts, val = np.concatenate([[state["ts"]], ts]), np.concatenate([[state["val"]], val])
+    if len(ts):
+        state["ts"], state["val"] = ts[-1], val[-1]
+    return ts, val, lead
+
+
+def derive_motion(DATA, db, state=None):
+    ts, speed, lead = _new_samples(DATA.Speed, state)
+    distance = running_integral(ts, speed)
+    if lead:
+        distance += state["distance"]
+    if state is not None and len(distance):
+        state["distance"] = distance[-1]
+    DATA.Distance.append(ts[lead:], distance[lead:])
+
+
+def derive_inverter_power(DATA, db, state=None):
+    ts, dc_current, lead = _new_samples(DATA.DC_Currents, state)
+    rpm = value_at(DATA.RPM, ts)
+    feedback_torque = value_at(DATA.Feedback_Torques, ts)
+    dc_voltage = value_at(DATA.DC_Voltages, ts)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        calc = rpm * feedback_torque / 9550 * 1000 / dc_voltage
+    calc[dc_voltage == 0] = np.nan
+    dc_power = dc_voltage * dc_current / 1000  # kW
+    # energy counts from the first DC voltage on
+    increment = np.zeros(len(ts))
+    if len(ts) > 1:
+        increment[1:] = np.nan_to_num(dc_power[1:] * np.diff(ts) / 3600)  # Wh
+    energy = [
+        np.cumsum(increment),
+        np.cumsum(np.where(increment > 0, increment, 0.0)),
+        np.cumsum(np.where(increment < 0, -increment, 0.0)),
+    ]
+    if lead:
+        energy = [e + carried for e, carried in zip(energy, state["energy"])]
+    if state is not None and len(ts):
+        state["energy"] = [e[-1] for e in energy]
+    ts = ts[lead:]
+    DATA.Calculated_Currents.append(ts, calc[lead:])
+    DATA.DC_Powers.append(ts, dc_power[lead:])
+    DATA.DC_Comulative_Powers.append(ts, energy[0][lead:])
+    DATA.DC_Discharge_Comulative_Powers.append(ts, energy[1][lead:])
+    DATA.DC_Regeneration_Comulative_Powers.append(ts, energy[2][lead:])
+
+
+def extend_derived(DATA, state, db=None):
+    """Extend the DERIVED signals of ring-buffered DATA (live capture) from
+    the samples their sources got since the last call, carrying running
+    sums in `state`"""
+    db = db or SIGNAL_DB
+    for fn in dict.fromkeys(DERIVED.values()):
+        fn(DATA, db, state.setdefault(fn.__name__, {}))
+
+
+def module_totals(db, cells):
+    """Empty ModuleTotals state of a multiplexed group"""
+    return ModuleTotals(db.layout()[cells], db.channels[cells])
+
+
+def _module_points(events, totals, empty):
+    """Per-frame (ts, module, pack, segment) sums of a group's samples
+    (row, ts, val, channel). While channels of the pack / module are still
+    missing the sum is `empty`, or the sum of those reported when `empty` is None."""
+    row, ts, val, channel = events
+    last, module, pack, pack_seen, segment, segment_seen = totals.update(row, val, channel)
+    if empty is not None:
+        pack = np.where(pack_seen == len(totals.latest), pack, empty)
+        segment = np.where(segment_seen == totals.per_module, segment, empty)
+    return ts[last], module, pack, segment
+
+
+def append_bms(DATA, db, events, totals):
+    # pack / segment voltage is unknown (NaN) until all of its cells have reported
+    ts, module, pack, segment = _module_points(events, totals, np.nan)
+    DATA.BMS_Pack.append(ts, pack / 1000)  # Convert mV to V
+    DATA.BMS_Segments.append(module, ts, segment / 1000)
+
+
+def append_ntc(DATA, db, events, totals):
+    # average over the module's sensors that have reported, divided by the sensor count
+    ts, module, _, segment = _module_points(events, totals, None)
+    DATA.NTC_Segments.append(module, ts, segment / db.channels["NTC_Cell"])
+
+
+# sums over the channels of a group, extended block by block as the group
+# decodes: group -> (append function, the derived signals it fills)
+AGGREGATES = {
+    "BMS_Cell": (append_bms, ("BMS_Pack", "BMS_Segments")),
+    "NTC_Cell": (append_ntc, ("NTC_Segments",)),
+}
+
+
+DERIVED = {
+    "Distance": derive_motion,
+    "Calculated_Currents": derive_inverter_power,
+    "DC_Powers": derive_inverter_power,
+    "DC_Comulative_Powers": derive_inverter_power,
+    "DC_Discharge_Comulative_Powers": derive_inverter_power,
+    "DC_Regeneration_Comulative_Powers": derive_inverter_power,
+}
+
+
+# --- resampling -----------------------------------------------------------------
+# Signals put on one time grid for comparing them sample by sample. A group
+# contributes one column per channel, in channel order. Results are kept on
+# the Data object once its log has fully loaded.
+
+RESAMPLE_METHODS = ("hold", "linear", "mean")
+RESAMPLE_CACHE = 16                 # aligned results kept per Data object
+HEATMAP_COLUMNS = 1000              # time bins of a heatmap() by default
+
+
+def resample_channel(ts, val, grid, period, method="hold"):
+    """Values of one channel on `grid` (float64): "hold" the latest sample at
+    or before each grid time, "linear" interpolation between samples, or the
+    "mean" of the samples in [t, t + period). NaN where there is no value:
+    before the first sample, outside the samples for "linear", empty bins.
+    Only the samples around the grid are read, so a grid over a short window
+    of a long log costs little."""
+    if not len(ts) or not len(grid):
+        return np.full(len(grid), np.nan)
+    if method == "hold":
+        idx = np.searchsorted(ts, grid, side="right") - 1
+        return np.where(idx >= 0, np.asarray(val, dtype=np.float64)[np.maximum(idx, 0)], np.nan)
+    if method == "linear":
+        i0, i1 = time_slice(ts, grid[0], grid[-1])
+        i0, i1 = max(i0 - 1, 0), min(i1 + 1, len(ts))
+        return np.interp(grid, ts[i0:i1], np.asarray(val[i0:i1], dtype=np.float64), left=np.nan, right=np.nan)
+    # mean: samples binned by grid interval, NaN samples left out
+    i0, i1 = time_slice(ts, grid[0], grid[-1] + period - 1)
+    val = np.asarray(val[i0:i1], dtype=np.float64)
+    b = (np.asarray(ts[i0:i1]) - grid[0]) // period
+    keep = (b >= 0) & (b < len(grid)) & np.isfinite(val)
+    counts = np.bincount(b[keep], minlength=len(grid))
+    sums = np.bincount(b[keep], weights=val[keep], minlength=len(grid))
+    with np.errstate(invalid="ignore"):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+def resample(DATA, names, period, t_range=None, method="hold"):
+    """(t, matrix) of the signals `names` on a common grid every `period` ms:
+    t the int64 grid times and matrix float32 (len(t), channels), one column
+    per channel of each signal in order (see SignalDB.channel_names).
+
+    `t_range` = (start, end) ms sets the grid, by default the span of the
+    signals' samples. Results are cached by (names, period, t_range,
+    method) once DATA is complete, and returned read-only.
+    """
+    if method not in RESAMPLE_METHODS:
+        raise ValueError(f"unknown resampling method {method!r}, use one of {RESAMPLE_METHODS}")
+    if period <= 0:
+        raise ValueError(f"resampling period must be positive, not {period}")
+    key = tuple(names), period, None if t_range is None else tuple(t_range), method
+    if key in DATA._resampled:
+        DATA._resampled[key] = DATA._resampled.pop(key)     # most recently used last
+        return DATA._resampled[key]
+    channels = []
+    for name in names:
+        col = getattr(DATA, name)
+        if isinstance(col, ChannelMatrix):
+            channels.extend(zip(col.ts, col.val))
+        else:
+            channels.append((col.ts, col.val))
+    if t_range is None:
+        starts = [ts[0] for ts, _ in channels if len(ts)]
+        ends = [ts[-1] for ts, _ in channels if len(ts)]
+        t_range = (min(starts), max(ends)) if starts else (0, -1)
+    t = np.arange(int(t_range[0]), int(t_range[1]) + 1, int(period), dtype=np.int64)
+    matrix = np.empty((len(t), len(channels)), dtype=np.float32)
+    for c, (ts, val) in enumerate(channels):
+        matrix[:, c] = resample_channel(ts, val, t, period, method)
+    t.flags.writeable = matrix.flags.writeable = False
+    if DATA._complete:
+        DATA._resampled[key] = t, matrix
+        while len(DATA._resampled) > RESAMPLE_CACHE:
+            del DATA._resampled[next(iter(DATA._resampled))]
+    return t, matrix
+
+
+def heatmap(DATA, name, t_range=None, columns=HEATMAP_COLUMNS):
+    """(t, z) of the channels of group `name` (such as the cells of BMS_Cell)
+    as a heatmap of about `columns` bins over `t_range` (start, end) ms,
+    default the span of its samples: t the int64 bin starts, z float32
+    (channels, bins), each channel's mean over each bin or, in a bin without
+    samples, its value held from before (NaN before its first sample).
+    Computed with resample(), so repeated views come from its cache."""
+    if t_range is None:
+        ts = [c for c in getattr(DATA, name).ts if len(c)]
+        if not ts:
+            return np.empty(0, dtype=np.int64), np.empty((DATA._db.layout()[name], 0), dtype=np.float32)
+        t_range = min(c[0] for c in ts), max(c[-1] for c in ts)
+    start, end = int(np.floor(t_range[0])), int(np.ceil(t_range[1]))
+    period = max(-(-(end - start + 1) // max(columns, 1)), 1)
+    t, mean = resample(DATA, [name], period, (start, end), "mean")
+    _, held = resample(DATA, [name], period, (start, end), "hold")
+    return t, np.where(np.isnan(mean), held, mean).T
+
+
+# --- level-of-detail pyramids --------------------------------------------------------
+# Min/max/mean of a channel over buckets of LOD_BASE * 2**k samples, each
+# level built from the one below. A viewport query picks the level whose
+# buckets hold about (samples in view) / points samples, so it costs
+# O(points) whatever the length of the log. Views go to the page as typed
+# arrays (trace_json).
+
+LOD_BASE = 8                        # samples per bucket of the finest level
+
+
+class Pyramid:
+    """Level-of-detail pyramid of one channel (see view())"""
+
+    def __init__(self, ts, val):
+        self.ts = ts
+        self.val = val
+        self.levels = []                # (min, max, mean) float32 arrays per level
+        if len(val) <= LOD_BASE:
+            return
+        n = -(-len(val) // LOD_BASE) * LOD_BASE
+        x = np.full(n, np.nan, dtype=np.float32)
+        x[:len(val)] = val
+        x = x.reshape(-1, LOD_BASE)
+        ok = np.isfinite(x)
+        lo, hi = np.fmin.reduce(x, axis=1), np.fmax.reduce(x, axis=1)
+        total, count = np.where(ok, x, 0).sum(axis=1, dtype=np.float64), ok.sum(axis=1)
+        while True:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                self.levels.append((lo, hi, (total / count).astype(np.float32)))
+            if len(lo) <= 1:
+                break
+            if len(lo) % 2:
+                lo, hi = np.append(lo, np.nan), np.append(hi, np.nan)
+                total, count = np.append(total, 0.0), np.append(count, 0)
+            lo, hi = np.fmin(lo[0::2], lo[1::2]), np.fmax(hi[0::2], hi[1::2])
+            total, count = total[0::2] + total[1::2], count[0::2] + count[1::2]
+
+    def view(self, t_range=None, points=3000, stat="minmax"):
+        """(x, y) of about `points` points drawing the samples in `t_range`
+        (start, end) ms, default all, plus one sample either side to carry the
+        line past the edges. Samples are returned as they are if there are few
+        enough; otherwise "minmax" gives each bucket's min at its first sample's
+        time and its max at its last one's, "mean" one point per bucket."""
+        ts = self.ts
+        if t_range is None:
+            i0, i1 = 0, len(ts)
+        else:
+            i0, i1 = time_slice(ts, *t_range)
+            i0, i1 = max(i0 - 1, 0), min(i1 + 1, len(ts))
+        per_point = (2 if stat == "minmax" else 1) * (i1 - i0) / max(points, 1)
+        if per_point <= LOD_BASE or not self.levels:
+            return ts[i0:i1], self.val[i0:i1]
+        k = min(max(int(np.ceil(np.log2(per_point / LOD_BASE))), 0), len(self.levels) - 1)
+        size = LOD_BASE << k
+        b0, b1 = i0 // size, (i1 - 1) // size + 1
+        lo, hi, mean = (a[b0:b1] for a in self.levels[k])
+        first = ts[b0 * size:b1 * size:size]
+        if stat == "mean":
+            return first, mean
+        last = ts[np.minimum(np.arange(b0 + 1, b1 + 1) * size, len(ts)) - 1]
+        x = np.column_stack([first, last]).ravel()
+        y = np.column_stack([lo, hi]).ravel()
+        return x, y
+
+
+def pyramid(DATA, name, channel=None):
+    """Pyramid of signal `name` (channel `channel` of a group), built on first
+    use and kept on DATA once its log has fully loaded"""
+    key = name, channel
+    if key in DATA._pyramids:
+        return DATA._pyramids[key]
+    col = getattr(DATA, name)
+    ts, val = (col.ts, col.val) if channel is None else (col.ts[channel], col.val[channel])
+    lod = Pyramid(ts, val)
+    if DATA._complete:
+        DATA._pyramids[key] = lod
+    return lod
+
+
+INT32_MIN, INT32_MAX = np.iinfo(np.int32).min, np.iinfo(np.int32).max
+
+
+def typed_array(a):
+    """plotly.js typed-array spec of `a`: base64 of int32 (float64 past the
+    int32 range) timestamps or float32 values, instead of JSON number text.
+    A 2-D `a` (a heatmap's z) keeps its shape."""
+    a = np.asarray(a)
+    if a.dtype.kind in "iu":
+        small = len(a) == 0 or (a.min() >= INT32_MIN and a.max() <= INT32_MAX)
+        a, dtype = (a.astype(np.int32), "i4") if small else (a.astype(np.float64), "f8")
+    else:
+        a, dtype = a.astype(np.float32, copy=False), "f4"
+    spec = {"dtype": dtype, "bdata": base64.b64encode(np.ascontiguousarray(a)).decode("ascii")}
+    if a.ndim > 1:
+        spec["shape"] = ",".join(map(str, a.shape))
+    return spec
+
+
+def trace_json(trace):
+    """JSON of a trace for the page, numeric x/y/z as typed arrays"""
+    d = trace.to_plotly_json()
+    for k in ("x", "y", "z"):
+        if d.get(k) is not None and np.asarray(d[k]).dtype.kind in "iuf":
+            d[k] = typed_array(d[k])
+    return d
+
+
+# --- event rules -------------------------------------------------------------------
+# Rules (rules.csv) flag where a signal crosses a threshold, changes faster
+# than a rate or disagrees with another signal, for at least a duration.
+# Each rule is evaluated on the whole padded (channels, samples) matrix of
+# its signal at once, so all 120 cells of BMS_Cell are one pass.
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules.csv")
+RULE_OPS = {">": np.greater, ">=": np.greater_equal, "<": np.less, "<=": np.less_equal}
+
+
+@dataclass
+class Rule:
+    """One row of the event rule table.
+
+    `kind` selects what is compared (`op`) with `threshold`: "threshold" the
+    signal's value, "rate" its change per second between samples, "diff" its
+    distance |signal - other| from `other` (held at the signal's samples). An
+    event lasts while the comparison holds, and is only kept when that is at
+    least `duration_ms`.
+    """
+    name: str
+    signal: str
+    kind: str = "threshold"
+    op: str = ">"
+    threshold: float = 0.0
+    duration_ms: int = 0
+    other: str = ""
+
+
+@dataclass
+class Event:
+    """Where a rule held: `start` ms to `end` ms (the first sample where it no
+    longer did, or the last sample), on channel `channel` of a group (None
+    for a plain signal); `peak` is the extreme of the compared value"""
+    rule: str
+    signal: str
+    channel: int
+    start: int
+    end: int
+    peak: float
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+
+def load_rules(path=RULES_PATH, db=None):
+    """Read an event rule table (see rules.csv), checking it against the signal table"""
+    db = db or SIGNAL_DB
+    rules = read_table(path, Rule)
+    for rule in rules:
+        where = f"{path}: rule {rule.name!r}"
+        if rule.kind not in ("threshold", "rate", "diff"):
+            raise ValueError(f"{where}: unknown kind {rule.kind!r}")
+        if rule.op not in RULE_OPS:
+            raise ValueError(f"{where}: unknown op {rule.op!r}")
+        for name in (rule.signal, rule.other) if rule.kind == "diff" else (rule.signal,):
+            if name not in db.groups:
+                raise ValueError(f"{where}: unknown signal {name!r}")
+        if rule.kind == "diff" and db.layout()[rule.other]:
+            raise ValueError(f"{where}: {rule.other!r} has channels, diff needs a plain signal")
+    return rules
+
+
+def _padded(col):
+    # (ts, val, valid) as (channels, samples) arrays, a plain signal being one channel
+    if isinstance(col, ChannelMatrix):
+        ts, val = col.matrix()
+        j = np.arange(ts.shape[1])
+        valid = (j >= col.starts[:, None]) & (j < col.lengths[:, None])
+        return ts, val, valid
+    return col.ts[None], col.val[None], np.ones((1, len(col)), dtype=bool)
+
+
+def rule_value(DATA, rule):
+    """(ts, value, valid) padded matrices of what `rule` compares"""
+    ts, val, valid = _padded(getattr(DATA, rule.signal))
+    val = val.astype(np.float64)
+    if rule.kind == "rate":
+        rate = np.full(val.shape, np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rate[:, 1:] = np.diff(val, axis=1) / np.diff(ts, axis=1) * 1000
+        rate[~np.isfinite(rate)] = np.nan           # samples in the same ms
+        valid = valid & np.roll(valid, 1, axis=1)   # the previous sample is in range too
+        valid[:, 0] = False
+        return ts, rate, valid
+    if rule.kind == "diff":
+        other = value_at(getattr(DATA, rule.other), ts.ravel()).reshape(ts.shape)
+        return ts, np.abs(val - other), valid
+    return ts, val, valid
+
+
+def detect(DATA, rule):
+    """Events of one rule, all channels at once"""
+    ts, value, valid = rule_value(DATA, rule)
+    rows, width = value.shape
+    if not width:
+        return []
+    with np.errstate(invalid="ignore"):
+        hold = RULE_OPS[rule.op](value, rule.threshold) & valid
+    # runs of `hold`: +1 where one starts, -1 just after it ends
+    edges = np.zeros((rows, width + 2), dtype=np.int8)
+    edges[:, 1:-1] = hold
+    edges = np.diff(edges, axis=1)
+    row, first = np.nonzero(edges == 1)
+    _, stop = np.nonzero(edges == -1)                # same row-major order as the starts
+    if not len(row):
+        return []
+    start = ts[row, first]
+    lengths = valid.sum(axis=1) + np.argmax(valid, axis=1)
+    end = ts[row, np.where(stop < lengths[row], stop, stop - 1)]
+    keep = end - start >= rule.duration_ms
+    row, first, stop, start, end = row[keep], first[keep], stop[keep], start[keep], end[keep]
+    if not len(row):
+        return []
+    # extreme of the value over each run, by one reduceat over the flat matrix
+    reduce = np.fmax if rule.op in (">", ">=") else np.fmin
+    flat = np.append(value.ravel(), np.nan)
+    bounds = np.column_stack([row * width + first, row * width + stop]).ravel()
+    peak = reduce.reduceat(flat, bounds)[::2]
+    plain = not isinstance(getattr(DATA, rule.signal), ChannelMatrix)
+    return [
+        Event(rule.name, rule.signal, None if plain else r, s, e, p)
+        for r, s, e, p in zip(row.tolist(), start.tolist(), end.tolist(), peak.tolist())
+    ]
+
+
+def detect_events(DATA, rules=None):
+    """Events of every rule (default: rules.csv), in time order"""
+    if rules is None:
+        rules = load_rules()
+    events = [e for rule in rules for e in detect(DATA, rule)]
+    events.sort(key=lambda e: e.start)
+    return events
+
+
+# --- session comparison ------------------------------------------------------------
+# Other sessions (logs) are overlaid on a reference one by mapping their
+# timestamps onto the reference's: shifted so their starts or the first event
+# of a rule coincide, or matched by distance driven. The overlay of a signal is
+# its pyramid view for the matching range, mapped in one vectorized pass.
+
+ALIGN_MODES = ("start", "event", "distance")
+SESSION_POOL_BYTES = 2 * 1024 ** 3  # decoded sessions kept for comparison
+
+
+def session_start(DATA):
+    """Timestamp of the first frame of a session (0 for an empty one)"""
+    ts = DATA._index.ts if DATA._index is not None else np.empty(0, dtype=np.int64)
+    return int(ts.min()) if len(ts) else 0
+
+
+class Alignment:
+    """Maps the timestamps of session `other` onto those of `ref` and back.
+
+    "start" and "event" shift `other` so that its first frame, or the start
+    of its first `rule` event, falls on the reference's; "distance" maps a
+    time to the reference's time at the same Distance (the running maximum,
+    so stops hold one point). Raises ValueError when a session lacks what
+    the mode needs.
+    """
+    def __init__(self, ref, other, mode="start", rule=None):
+        if mode not in ALIGN_MODES:
+            raise ValueError(f"unknown alignment {mode!r}, use one of {ALIGN_MODES}")
+        self.mode = mode
+        if mode == "distance":
+            self._ref, self._other = self._distance(ref), self._distance(other)
+        else:
+            self.offset = self._origin(ref, mode, rule) - self._origin(other, mode, rule)
+
+    @staticmethod
+    def _origin(DATA, mode, rule):
+        if mode == "start":
+            return session_start(DATA)
+        if rule is None:
+            raise ValueError("aligning by event needs a rule")
+        events = detect(DATA, rule)
+        if not events:
+            raise ValueError(f"no {rule.name!r} event in the session")
+        return min(e.start for e in events)
+
+    @staticmethod
+    def _distance(DATA):
+        col = DATA.Distance
+        distance = np.fmax.accumulate(col.val.astype(np.float64))
+        if len(col) < 2 or not distance[-1] > distance[0]:
+            raise ValueError("the session covers no Distance")
+        return col.ts, distance
+
+    def to_ref(self, ts):
+        """Reference times (int64) of `other`'s timestamps; with "distance",
+        those past the reference's distance are dropped, so also returns the
+        kept mask"""
+        ts = np.asarray(ts)
+        if self.mode != "distance":
+            return ts + self.offset, np.ones(len(ts), dtype=bool)
+        (ts_ref, d_ref), (ts_other, d_other) = self._ref, self._other
+        d = np.interp(ts, ts_other, d_other)
+        keep = (d >= d_ref[0]) & (d <= d_ref[-1])
+        return np.rint(np.interp(d[keep], d_ref, ts_ref)).astype(np.int64), keep
+
+    def from_ref(self, ts):
+        """`other`'s times of reference timestamps (float64)"""
+        ts = np.asarray(ts, dtype=np.float64)
+        if self.mode != "distance":
+            return ts - self.offset
+        (ts_ref, d_ref), (ts_other, d_other) = self._ref, self._other
+        return np.interp(np.interp(ts, ts_ref, d_ref), d_other, ts_other)
+
+
+def overlay(other, alignment, name, channel=None, t_range=None, points=3000):
+    """(x, y) drawing signal `name` of session `other` on the reference's time
+    axis: its pyramid view of the part matching reference range `t_range`
+    (start, end) ms, default all"""
+    if t_range is not None:
+        start, end = alignment.from_ref(t_range)
+        t_range = (start, max(start, end))
+    x, y = pyramid(other, name, channel).view(t_range, points)
+    x, keep = alignment.to_ref(x)
+    return x, y[keep]
+
+
+class SessionPool:
+    """Decoded sessions by log path, for comparison. Once their nbytes() add
+    up to more than `max_bytes`, the least recently used are dropped (never
+    the one just used); open() brings one back, quickly from the decoded-log
+    cache."""
+    def __init__(self, max_bytes=SESSION_POOL_BYTES):
+        self.max_bytes = max_bytes
+        self._sessions = {}             # path -> Data, least recently used first
+
+    def __contains__(self, path):
+        return path in self._sessions
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def paths(self):
+        return list(self._sessions)
+
+    def add(self, path, DATA):
+        self._sessions.pop(path, None)
+        self._sessions[path] = DATA
+        self.evict()
+
+    def get(self, path):
+        """The session of `path` if pooled (marking it used), else None"""
+        DATA = self._sessions.pop(path, None)
+        if DATA is not None:
+            self._sessions[path] = DATA
+            self.evict()
+        return DATA
+
+    def open(self, path):
+        """The session of `path`, loaded (and pooled) if it is not pooled"""
+        DATA = self.get(path)
+        if DATA is None:
+            DATA = load_dataset(path)
+            self.add(path, DATA)
+        return DATA
+
+    def remove(self, path):
+        self._sessions.pop(path, None)
+
+    def nbytes(self):
+        return sum(DATA.nbytes() for DATA in self._sessions.values())
+
+    def evict(self):
+        """Drop least recently used sessions until within max_bytes"""
+        sizes = {path: DATA.nbytes() for path, DATA in self._sessions.items()}
+        total = sum(sizes.values())
+        for path in list(self._sessions)[:-1]:
+            if total <= self.max_bytes:
+                break
+            del self._sessions[path]
+            total -= sizes[path]
+
+
+# --- decoded-log cache -------------------------------------------------------------
+# One directory of .npy arrays per log, holding its FrameIndex, memory-mapped
+# on the next open so only the signals used get decoded. Entries are keyed by
+# the log's path, size and mtime, DECODER_VERSION and the signal table, and
+# evicted least-recently-opened first.
+
+CACHE_DIR = os.environ.get("CAN_VIEWER_CACHE", os.path.join(os.path.expanduser("~"), ".can_viewer_cache"))
+CACHE_MAX_BYTES = 8 * 1024 ** 3
+CACHE_KEY = re.compile(r"[0-9a-f]{40}")      # an entry's folder name, see cache_key()
+CACHE_EVICTING = "evicting"                 # marker file of an entry being deleted
+DECODER_VERSION = 6                 # bump whenever a change alters what ends up in the cache
+
+
+def cache_key(filepath, db=None):
+    db = db or SIGNAL_DB
+    st = os.stat(filepath)
+    source = os.path.normcase(os.path.abspath(filepath))
+    text = f"{source}|{st.st_size}|{st.st_mtime_ns}|{DECODER_VERSION}|{db.digest}"
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def load_cache(filepath, cache_dir=None):
+    """Data over the frame index memory-mapped from the cache, or None on a miss"""
+    entry = os.path.join(cache_dir or CACHE_DIR, cache_key(filepath))
+    meta = os.path.join(entry, "meta.json")
+    if not os.path.isfile(meta):
+        return None
+    try:
+        arrays = {
+            part: np.load(os.path.join(entry, f"index.{part}.npy"), mmap_mode="r")
+            for part in FrameIndex().arrays()
+        }
+        os.utime(meta)              # mark as recently used
+    except (OSError, ValueError):
+        return None
+    DATA = Data(index=FrameIndex.from_arrays(**arrays))
+    DATA.finish()
+    return DATA
+
+
+def save_cache(filepath, DATA, cache_dir=None, max_bytes=None):
+    """Write the frame index of DATA as the cache entry of `filepath`, then evict old entries"""
+    cache_dir = cache_dir or CACHE_DIR
+    key = cache_key(filepath)
+    entry = os.path.join(cache_dir, key)
+    tmp = f"{entry}.tmp{os.getpid()}"
+    os.makedirs(tmp, exist_ok=True)
+    try:
+        size = 0
+        for part, arr in DATA._index.arrays().items():
+            path = os.path.join(tmp, f"index.{part}.npy")
+            np.save(path, arr)
+            size += os.path.getsize(path)
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"source": os.path.abspath(filepath), "bytes": size, "version": DECODER_VERSION}, f)
+        if _evicting(cache_dir, key):
+            _remove_entry(entry)            # left by an eviction that could not finish
+        os.replace(tmp, entry)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    evict_cache(cache_dir, CACHE_MAX_BYTES if max_bytes is None else max_bytes, keep=key)
+
+
+def _evicting(cache_dir, key):
+    """Whether `key` is a cache entry whose deletion did not finish"""
+    return bool(CACHE_KEY.fullmatch(key)) and os.path.isfile(os.path.join(cache_dir, key, CACHE_EVICTING))
+
+
+def _remove_entry(entry):
+    """Delete a cache entry marked as being evicted, the mark last; files
+    that cannot be deleted yet stay, with the mark"""
+    try:
+        for name in os.listdir(entry):
+            if name != CACHE_EVICTING:
+                try:
+                    os.remove(os.path.join(entry, name))
+                except OSError:
+                    pass
+        if os.listdir(entry) == [CACHE_EVICTING]:
+            shutil.rmtree(entry, ignore_errors=True)
+    except OSError:
+        pass
+
+
+def evict_cache(cache_dir, max_bytes, keep=None):
+    """Delete least-recently-used entries until the cache fits in max_bytes.
+
+    An entry is first marked as being evicted and loses its meta.json, so
+    one that cannot be deleted completely is never read as valid; what is
+    left of it is deleted again on the next call. Other folders (not named
+    like an entry, or without the mark) are never touched.
+    """
+    entries = []
+    for key in os.listdir(cache_dir):
+        meta = os.path.join(cache_dir, key, "meta.json")
+        if _evicting(cache_dir, key):
+            _remove_entry(os.path.join(cache_dir, key))
+            continue
+        try:
+            with open(meta, encoding="utf-8") as f:
+                size = json.load(f)["bytes"]
+            entries.append((os.stat(meta).st_mtime, size, key))
+        except (OSError, ValueError, KeyError):
+            continue
+    total = sum(size for _, size, _ in entries)
+    for _, size, key in sorted(entries):
+        if total <= max_bytes:
+            break
+        if key == keep or not CACHE_KEY.fullmatch(key):
+            continue
+        entry = os.path.join(cache_dir, key)
+        try:
+            open(os.path.join(entry, CACHE_EVICTING), "w").close()
+            os.remove(os.path.join(entry, "meta.json"))
+        except OSError:
+            continue
+        # files still memory-mapped (open in another window on Windows) stay
+        # until a later call
+        _remove_entry(entry)
+        total -= size
+
+
+# --- load profiling ----------------------------------------------------------------
+# A LoadStats handed to iter_dataset records where a load's time goes. Without
+# one nothing is timed or counted beyond what the load needs anyway.
+
+
+def can_id_text(key):
+    """A frame key as the CSV export writes its ID ("0x0A0", "0x000075A1")"""
+    return f"0x{key & 0x1FFFFFFF:08X}" if key & CAN_EFF_FLAG else f"0x{key:03X}"
+
+
+class LoadStats:
+    """Profile of one load: its wall time, seconds per phase ("read",
+    "index", "join", "finish", "cache read" / "cache write" while the log
+    loads, then "columns", "aggregate" and "derive" as signals are decoded),
+    bytes and lines read, frames parsed, frames per indexed CAN ID and per
+    ID that no signal uses, and the decode time of each ID. Decoding happens
+    on first use, so those keep growing after the load. With several
+    processes, "read" and "index" add up the time of all of them.
+    """
+    def __init__(self):
+        self.seconds = 0.0          # wall time of the load
+        self.phases = {}
+        self.bytes = 0
+        self.lines = 0              # lines read from a line-based log
+        self.frames = 0             # frames parsed
+        self.ids = {}               # key -> frames indexed
+        self.unknown = {}           # key -> frames of IDs no signal uses
+        self.decode = {}            # key -> seconds decoding its frames
+        self.workers = 1
+        self.cached = False
+
+    def add(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def add_decode(self, key, seconds):
+        self.decode[key] = self.decode.get(key, 0.0) + seconds
+
+    def count_unknown(self, key, wanted):
+        uniq, counts = np.unique(key[~np.isin(key, wanted)], return_counts=True)
+        for k, n in zip(uniq.tolist(), counts.tolist()):
+            self.unknown[k] = self.unknown.get(k, 0) + n
+
+    def merge(self, other):
+        """Add the counts and times of a worker's stats"""
+        for phase, seconds in other.phases.items():
+            self.add(phase, seconds)
+        self.lines += other.lines
+        self.frames += other.frames
+        for k, n in other.unknown.items():
+            self.unknown[k] = self.unknown.get(k, 0) + n
+
+    def count_index(self, index):
+        self.ids = dict(zip(index.keys.tolist(), np.diff(index.bounds).tolist()))
+
+    @property
+    def skipped(self):
+        """Lines that did not parse as a frame: malformed rows (and for
+        candump / ASC logs also comments, error and remote frames)"""
+        return max(self.lines - self.frames, 0)
+
+    def as_dict(self):
+        """The profile as plain JSON-ready values, IDs as in the CSV export"""
+        return {
+            "bytes": self.bytes,
+            "load_s": round(self.seconds, 4),
+            "bytes_per_s": round(self.bytes / self.seconds) if self.seconds else None,
+            "frames": self.frames,
+            "skipped_lines": self.skipped,
+            "workers": self.workers,
+            "cached": self.cached,
+            "phases_s": {p: round(t, 4) for p, t in self.phases.items()},
+            "ids": {
+                can_id_text(k): {"frames": n, "decode_s": round(self.decode.get(k, 0.0), 6)}
+                for k, n in sorted(self.ids.items())
+            },
+            "unknown_ids": {can_id_text(k): n for k, n in sorted(self.unknown.items())},
+        }
+
+    def format(self):
+        """The profile as a text report"""
+        d = self.as_dict()
+        if self.cached:
+            how = "from the cache"
+        else:
+            rate = "-" if d["bytes_per_s"] is None else f"{d['bytes_per_s'] / 1e6:.1f}"
+            how = f"({rate} MB/s), {self.workers} process(es)"
+        lines = [
+            f"{d['bytes'] / 1e6:.1f} MB loaded in {d['load_s']:.3f} s {how}",
+            f"{d['frames']:,} frames, {d['skipped_lines']:,} lines skipped (malformed or not a frame)",
+            "",
+            "phase             seconds",
+        ]
+        lines += [f"{p:<16}{t:8.3f}" for p, t in d["phases_s"].items()]
+        lines += ["", "ID              frames  decode ms"]
+        lines += [f"{k:<12}{v['frames']:>10,}{1000 * v['decode_s']:>11.2f}" for k, v in d["ids"].items()]
+        if d["unknown_ids"]:
+            lines += ["", "IDs no signal uses  frames"]
+            lines += [f"{k:<16}{n:>10,}" for k, n in d["unknown_ids"].items()]
+        return "\n".join(lines)
+
+
+# --- parallel indexing -----------------------------------------------------------
+# The log is cut into newline-aligned byte ranges that worker processes parse
+# and index independently; their indexes are joined in file order. Decoding,
+# with the state it carries across frames (decimation, module totals), runs
+# later over the joined index.
+
+PARALLEL_MIN_BYTES = 256 * 1024 * 1024   # smaller logs are not worth the process start-up
+COMPRESSED_PARALLEL_MIN_BYTES = 32 * 1024 * 1024    # the same for compressed logs (about 8-10x)
+PARALLEL_POLL_S = 0.1                   # longest wait for a range before yielding again
+
+
+def log_byte_ranges(filepath, parts):
+    """Split a line-based log after its header into up to `parts` newline-aligned
+    (start, end) ranges; a compressed one into up to `parts` runs of whole
+    members (compressed_members) of about the same size"""
+    size = os.path.getsize(filepath)
+    compression = log_compression(filepath)
+    if compression is not None:
+        starts = [start for start, _ in compressed_members(filepath, compression)[1:]]
+        bounds = [0]
+        for i in range(1, parts):
+            k = int(np.searchsorted(starts, size * i // parts))
+            if k < len(starts) and starts[k] > bounds[-1]:
+                bounds.append(starts[k])
+        return list(zip(bounds, bounds[1:] + [size]))
+    with open(filepath, "rb") as f:
+        if log_format(filepath).header:
+            f.readline()
+        bounds = [f.tell()]
+        for i in range(1, parts):
+            f.seek(bounds[0] + (size - bounds[0]) * i // parts)
+            f.readline()                        # move on to the start of the next line
+            if bounds[-1] < f.tell() < size:
+                bounds.append(f.tell())
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _index_blocks(index, filepath, block_size, byte_range=None, stats=None, counter=None):
+    """Index the blocks of a log (or of a byte range of it), yielding the
+    file position after each; `stats` gets the read and index times and the
+    lines, frames and unused IDs read, `counter` what iter_log_blocks counts"""
+    counter = {} if counter is None else counter
+    if stats is not None:
+        counter["lines"] = 0
+    blocks = iter_log_blocks(filepath, block_size, byte_range, counter)
+    if stats is None:
+        for block in blocks:
+            index.add(*block)
+            yield counter["bytes"]
+        return
+    try:
+        while True:
+            start = time.perf_counter()
+            block = next(blocks, None)
+            read = time.perf_counter()
+            stats.add("read", read - start)
+            if block is None:
+                break
+            stats.count_unknown(block[1], index.wanted)
+            index.add(*block)
+            stats.add("index", time.perf_counter() - read)
+            yield counter["bytes"]
+    finally:
+        stats.lines += counter.get("lines", 0)
+        stats.frames += counter.get("rows", 0)
+
+
+def _index_range(filepath, byte_range, block_size, profile=False):
+    """Worker: index one byte range, offsets counted from its first frame;
+    returns the index, with `profile` its LoadStats, and for a compressed
+    log the partial lines at the range's edges (see iter_log_blocks)"""
+    index = FrameIndex(SIGNAL_DB.decoders)
+    stats = LoadStats() if profile else None
+    counter = {}
+    for _ in _index_blocks(index, filepath, block_size, byte_range, stats, counter):
+        pass
+    index.finish()
+    return index, stats, counter.get("head"), counter.get("tail")
+
+
+def _index_lines(index, fmt, buf, stats=None):
+    """Index the frames of `buf`, whole lines of a line-based log"""
+    counter = None if stats is None else {"lines": 0}
+    for ts, key, payload in fmt.read(io.BytesIO(buf), CSV_BLOCK_SIZE, None, counter):
+        if stats is not None:
+            stats.count_unknown(key, index.wanted)
+            stats.frames += len(ts)
+        index.add(ts, key, payload)
+    if stats is not None:
+        stats.lines += counter["lines"]
+
+
+def iter_index_serial(index, filepath, block_size=CSV_BLOCK_SIZE, stats=None):
+    """Index a log block by block, yielding the bytes read so far"""
+    yield from _index_blocks(index, filepath, block_size, stats=stats)
+
+
+def iter_index_parallel(index, filepath, workers, block_size=CSV_BLOCK_SIZE, stats=None):
+    """Index a log across `workers` processes, joining the ranges in file
+    order and yielding the bytes joined so far. The result matches the
+    serial path exactly. While a range is awaited the bytes joined so far
+    are yielded again every PARALLEL_POLL_S, so the caller can stop the load
+    promptly; closing the generator terminates the worker processes.
+
+    The ranges of a compressed log are runs of members, which cut lines: the
+    line cut between two ranges is indexed here, between their indexes. If a
+    range of a gzip log turns out not to be whole members (a header-like
+    match inside compressed data), the log is read on from its start here.
+    """
+    ranges = log_byte_ranges(filepath, workers * 4)
+    compression = log_compression(filepath)
+    fmt = log_format(filepath)
+    size = os.path.getsize(filepath)
+    carry, first = b"", True        # compressed: the line cut by the last range, whether none was whole yet
+    done = 0
+    pool = multiprocessing.Pool(workers)
+    try:
+        jobs = [pool.apply_async(_index_range, (filepath, r, block_size, stats is not None)) for r in ranges]
+        for (start, end), job in zip(ranges, jobs):
+            job.wait(PARALLEL_POLL_S)
+            while not job.ready():
+                yield done
+                job.wait(PARALLEL_POLL_S)
+            try:
+                part, part_stats, head, tail = job.get()
+            except (EOFError, OSError, zlib.error):         # gzip.BadGzipFile is an OSError
+                if compression != "gzip":
+                    raise
+                pool.terminate()
+                part, part_stats, head, tail = _index_range(filepath, (start, size), block_size, stats is not None)
+                end = size
+            clock = time.perf_counter() if stats is not None else 0
+            if compression is not None and head is None:
+                carry += tail
+            elif compression is not None:
+                line, carry = carry + head, tail
+                if not (first and fmt.header):
+                    _index_lines(index, fmt, line, stats)
+                first = False
+            index.extend(part)
+            if stats is not None:
+                stats.merge(part_stats)
+                stats.add("join", time.perf_counter() - clock)
+            done = end
+            yield done
+            if end == size:
+                break
+        if carry.strip():
+            _index_lines(index, fmt, carry + b"\n", stats)
+    finally:
+        pool.terminate()
+
+
+def iter_dataset(filepath, block_size=CSV_BLOCK_SIZE, cache=True, workers=None, stats=None):
+    """Generator behind load_dataset: yields (DATA, bytes_done, bytes_total) as
+    the log is indexed. DATA is the same growing object every time, so a
+    signal read at a yield is decoded from the frames indexed so far; the
+    DERIVED channels read as empty until the last yield. From then on each
+    signal is decoded (or computed) on first use and kept. Closing the
+    generator stops the load.
+
+    With `cache` a previously built index is memory-mapped from CACHE_DIR
+    instead, and a fresh one is saved there. `workers` > 1 indexes byte
+    ranges of the file in that many processes (line-based formats only; of
+    a compressed log, runs of its gzip members or zstd frames when it has
+    several); by default logs of at least PARALLEL_MIN_BYTES
+    (COMPRESSED_PARALLEL_MIN_BYTES compressed) use every core.
+
+    A LoadStats `stats` is filled in with the profile of the load, and of
+    the decoding of the signals afterwards (DATA keeps it). A file without
+    a single CAN frame (empty, or not a log) raises ValueError.
+    """
+    if not os.path.isfile(filepath):
+        yield Data(), 0, 0
+        return
+    total = os.path.getsize(filepath)
+    clock = time.perf_counter()
+    if stats is not None:
+        stats.bytes = total
+    if cache:
+        DATA = load_cache(filepath)
+        if DATA is not None:
+            if stats is not None:
+                stats.add("cache read", time.perf_counter() - clock)
+                stats.seconds += time.perf_counter() - clock
+                stats.cached = True
+                stats.frames = DATA._index.rows
+                stats.count_index(DATA._index)
+                DATA._stats = stats
+            yield DATA, total, total
+            return
+    compression = log_compression(filepath)
+    if not log_format(filepath).lines:
+        workers = 1
+    elif workers is None:
+        min_bytes = PARALLEL_MIN_BYTES if compression is None else COMPRESSED_PARALLEL_MIN_BYTES
+        workers = (os.cpu_count() or 1) if total >= min_bytes else 1
+    if workers > 1 and compression is not None and len(compressed_members(filepath, compression)) < 2:
+        workers = 1                 # one gzip member or zstd frame, or xz: read as a stream
+    index = FrameIndex(SIGNAL_DB.decoders)
+    DATA = Data(index=index)
+    DATA._stats = stats
+    if workers > 1:
+        steps = iter_index_parallel(index, filepath, workers, block_size, stats)
+    else:
+        steps = iter_index_serial(index, filepath, block_size, stats)
+    try:
+        for done in steps:
+            if stats is not None:
+                stats.seconds += time.perf_counter() - clock
+            yield DATA, done, total
+            clock = time.perf_counter()     # the time the caller held the generator is not the load's
+    finally:
+        steps.close()
+    if index.rows == 0:
+        raise ValueError(
+            f"no CAN frames in {os.path.basename(filepath)}: the file is empty or not a "
+            f"{'/'.join(ext[1:].upper() for ext in LOG_FORMATS)} log"
+        )
+    start = time.perf_counter()
+    DATA.finish()
+    if stats is not None:
+        stats.workers = workers
+        stats.add("finish", time.perf_counter() - start)
+        stats.count_index(index)
+    if cache:
+        start = time.perf_counter()
+        try:
+            save_cache(filepath, DATA)
+        except OSError:
+            pass                    # a read-only or full cache disk only costs the speedup
+        if stats is not None:
+            stats.add("cache write", time.perf_counter() - start)
+    if stats is not None:
+        stats.seconds += time.perf_counter() - clock
+    yield DATA, total, total
+
+
+def load_dataset(filepath, block_size=CSV_BLOCK_SIZE, cache=True, workers=None, stats=None):
+    """Bulk decoder: read the log block by block into a FrameIndex; each
+    signal's messages are then decoded at once, into typed columns, the
+    first time it is used. Arguments as for iter_dataset."""
+    for DATA, _, _ in iter_dataset(filepath, block_size, cache, workers, stats):
+        pass
+    return DATA
+
+
+# --- live capture ----------------------------------------------------------------
+# Frames from a SocketCAN interface (Linux; `vcan` for testing) are decoded
+# in short batches by the same decoders into ring-buffered Data, and can be
+# recorded as a `candump -l` log that load_dataset reads back. The derived
+# channels are kept up to date live as well: the AGGREGATES (BMS pack/segment,
+# NTC segment) by decode_block, the DERIVED signals by extend_derived. A batch
+# holds at most LIVE_SAMPLES frames, so no signal gets more new samples in
+# one batch than its ring buffer keeps.
+
+LIVE_SAMPLES = 200_000                  # samples kept per signal (per channel of a group)
+LIVE_BATCH_S = 0.05                     # frames are decoded in batches this long
+CAN_FRAME = struct.Struct("=IB3x8s")    # struct can_frame: can_id, dlc, data
+CAN_RTR_FLAG, CAN_ERR_FLAG = 0x40000000, 0x20000000
+
+
+def open_socketcan(interface):
+    sock = socket.socket(socket.AF_CAN, socket.SOCK_RAW, socket.CAN_RAW)
+    sock.bind((interface,))
+    return sock
+
+
+def read_socketcan(sock, seconds, t0, limit=None):
+    """(ts, key, payload) arrays of the frames received in the next `seconds`,
+    at most `limit` of them; ts in ms since the monotonic time `t0`. Remote
+    and error frames are dropped."""
+    ts, ids, data = [], [], []
+    end = time.monotonic() + seconds
+    while limit is None or len(ts) < limit:
+        left = end - time.monotonic()
+        if left <= 0:
+            break
+        sock.settimeout(left)
+        try:
+            frame = sock.recv(CAN_FRAME.size)
+        except socket.timeout:
+            break
+        can_id, dlc, payload = CAN_FRAME.unpack(frame)
+        if can_id & (CAN_RTR_FLAG | CAN_ERR_FLAG):
+            continue
+        ts.append(time.monotonic() - t0)
+        ids.append(can_id)
+        data.append(payload[:dlc].ljust(8, b"\0"))
+    ts = np.rint(np.array(ts, dtype=np.float64) * 1000).astype(np.int64)
+    key = np.array(ids, dtype=np.int64) & (CAN_EFF_FLAG | 0x1FFFFFFF)
+    payload = np.frombuffer(b"".join(data), dtype=np.uint8).reshape(-1, 8)
+    return ts, key, payload
+
+
+def format_candump(ts, key, payload, interface):
+    """`candump -l` lines of frames (read back by read_candump)"""
+    lines = []
+    for t, k, p in zip(ts.tolist(), key.tolist(), payload):
+        can_id = f"{k & 0x1FFFFFFF:08X}" if k & CAN_EFF_FLAG else f"{k:03X}"
+        lines.append(f"({t / 1000:.6f}) {interface} {can_id}#{p.tobytes().hex().upper()}\n")
+    return "".join(lines)
+
+
+# --- session summaries and export ------------------------------------------------
+# SUMMARY is one row per log for the batch CLI: column -> (statistic,
+# signals). The statistic runs over every sample of the signals, every
+# channel of a group; "last" is the final value, for the running totals.
+# Columns are named with the unit of their first signal.
+
+SUMMARY = {
+    "motor_temp_max": ("max", ("Motor_Temperature",)),
+    "inverter_temp_max": ("max", (
+        "Gate_Driver_Temperature", "Module_A_Temperature", "Module_B_Temperature",
+        "Module_C_Temperature", "Control_Board_Temperature",
+    )),
+    "cell_temp_max": ("max", ("NTC_Cell",)),
+    "cell_voltage_min": ("min", ("BMS_Cell",)),
+    "pack_voltage_min": ("min", ("BMS_Pack",)),
+    "energy_used": ("last", ("DC_Discharge_Comulative_Powers",)),
+    "energy_regenerated": ("last", ("DC_Regeneration_Comulative_Powers",)),
+    "distance": ("last", ("Distance",)),
+}
+
+
+def summarize(DATA, db=None):
+    """{column: value} summary of a loaded log: frames read, duration and
+    the SUMMARY columns (NaN where their signals have no samples)"""
+    db = db or SIGNAL_DB
+    index = DATA._index
+    ts = index.ts if index is not None else np.empty(0, dtype=np.int64)
+    out = {
+        "frames": index.rows if index is not None else 0,
+        "duration (s)": (int(ts.max()) - int(ts.min())) / 1000 if len(ts) else 0.0,
+    }
+    for column, (stat, names) in SUMMARY.items():
+        values = []
+        for name in names:
+            col = getattr(DATA, name)
+            val = col.matrix()[1] if isinstance(col, ChannelMatrix) else col.val
+            val = np.asarray(val, dtype=np.float64).ravel()
+            values.append(val[np.isfinite(val)])
+        val = np.concatenate(values)
+        unit = db.groups[names[0]][0].unit
+        key = f"{column} ({unit})" if unit else column
+        if not len(val):
+            out[key] = np.nan
+        elif stat == "last":
+            out[key] = float(val[-1])
+        else:
+            out[key] = float(getattr(np, stat)(val))
+    return out
+
+
+def export_npz(DATA, path, db=None):
+    """Write every signal to one uncompressed .npz, each of its arrays (see
+    SignalColumn.arrays, ChannelMatrix.arrays) under "<name>.<part>" """
+    db = db or SIGNAL_DB
+    arrays = {}
+    for name in db.groups:
+        for part, arr in getattr(DATA, name).arrays().items():
+            arrays[f"{name}.{part}"] = arr
+    np.savez(path, **arrays)
+
+
+EXPORT_FORMATS = {".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow"}
+EXPORT_ROWS = 1024 * 1024           # rows per Parquet row group / Arrow record batch
+
+
+def export_signals(DATA, path, names=None, t_range=None, db=None):
+    """Write signals of DATA to a Parquet (.parquet) or Arrow IPC (.arrow,
+    .feather) file in long form, one row per sample: ts (int64 ms), signal
+    and channel (dictionary-encoded names, see SignalDB.channel_names) and
+    value (float32). Returns the number of rows written.
+
+    `names` selects the signals (default: all), `t_range` = (start, end) ms
+    keeps only the samples in that window, found by binary search. Rows go out EXPORT_ROWS at a
+    time straight from the columns, so no second copy of the session is
+    held in memory. Needs pyarrow.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet/Arrow export needs pyarrow (pip install pyarrow)") from None
+    db = db or SIGNAL_DB
+    fmt = EXPORT_FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"{path}: export to one of {', '.join(EXPORT_FORMATS)}")
+    names = list(db.groups) if names is None else list(names)
+    labels = [db.channel_names(name) for name in names]
+    signal_dict = pa.array(names, pa.string())
+    channel_dict = pa.array([label for channels in labels for label in channels], pa.string())
+    schema = pa.schema([
+        ("ts", pa.int64()),
+        ("signal", pa.dictionary(pa.int16(), pa.string())),
+        ("channel", pa.dictionary(pa.int32(), pa.string())),
+        ("value", pa.float32()),
+    ])
+
+    def write(parts):
+        ts, signal, channel, val = (np.concatenate(p) for p in zip(*parts))
+        writer.write_table(pa.table([
+            pa.array(ts, pa.int64()),
+            pa.DictionaryArray.from_arrays(pa.array(signal, pa.int16()), signal_dict),
+            pa.DictionaryArray.from_arrays(pa.array(channel, pa.int32()), channel_dict),
+            pa.array(val, pa.float32()),
+        ], schema=schema))
+
+    writer = pq.ParquetWriter(path, schema) if fmt == "parquet" else pa.ipc.new_file(path, schema)
+    rows = 0
+    try:
+        parts, pending, first = [], 0, 0
+        for s, (name, channels) in enumerate(zip(names, labels)):
+            col = getattr(DATA, name)
+            group = isinstance(col, ChannelMatrix)
+            for c, (ts, val) in enumerate(zip(*((col.ts, col.val) if group else ([col.ts], [col.val])))):
+                if t_range is not None:
+                    i0, i1 = time_slice(ts, *t_range)
+                    ts, val = ts[i0:i1], val[i0:i1]
+                for start in range(0, len(ts), EXPORT_ROWS):
+                    t, v = ts[start:start + EXPORT_ROWS], val[start:start + EXPORT_ROWS]
+                    parts.append((t, np.full(len(t), s, np.int16), np.full(len(t), first + c, np.int32), v))
+                    pending += len(t)
+                    if pending >= EXPORT_ROWS:
+                        write(parts)
+                        rows += pending
+                        parts, pending = [], 0
+            first += len(channels)
+        if parts:
+            write(parts)
+            rows += pending
+    finally:
+        writer.close()
+    return rows
+
+
+SIGNAL_DB = load_signal_db()
@@ -1,399 +1,49 @@
 import sys
-import csv
 import os
+import json
+import threading
+import tempfile
+import time
+import multiprocessing
 import numpy as np
 
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QVBoxLayout, QWidget,
     QHBoxLayout, QCheckBox, QLineEdit, QMessageBox, QFileDialog,
-    QTreeWidget, QTreeWidgetItem, QProgressBar, QPushButton
+    QTreeWidget, QTreeWidgetItem, QProgressBar, QPushButton, QInputDialog, QComboBox,
+    QTableWidget, QTableWidgetItem, QAbstractItemView, QPlainTextEdit, QListWidget, QListWidgetItem
 )
 from PyQt5.QtGui import QIcon, QFont
 from PyQt5.QtWebEngineWidgets import QWebEngineView
+from PyQt5.QtWebChannel import QWebChannel
+import plotly
 import plotly.graph_objects as go
 from plotly.graph_objects import Scattergl
 import plotly.express as px      # <-- add for palettes
-from PyQt5.QtCore import QThread, pyqtSignal
+from plotly.io.json import to_json_plotly
+from plotly.offline import get_plotlyjs
+from PyQt5.QtCore import Qt, QThread, QObject, QFile, QIODevice, QUrl, QTimer, pyqtSignal, pyqtSlot
 
-class Data:
-    def __init__(self):
-        self.DC_Voltages = {"ts": [], "val": []}
-        self.Output_Voltages = {"ts": [], "val": []}
-        self.DC_Currents = {"ts": [], "val": []}
-        self.DC_Powers = {"ts": [], "val": []}
-        self.DC_Discharge_Comulative_Powers = {"ts": [], "val": []}
-        self.DC_Regeneration_Comulative_Powers = {"ts": [], "val": []}
-        self.DC_Comulative_Powers = {"ts": [], "val": []}
-        self.A_Currents = {"ts": [], "val": []}
-        self.B_Currents = {"ts": [], "val": []}
-        self.C_Currents = {"ts": [], "val": []}
-        self.Calculated_Currents = {"ts": [], "val": []}
-        self.Feedback_Torques = {"ts": [], "val": []}
-        self.Command_Torques = {"ts": [], "val": []}
-        self.VCU_Command_Torques = {"ts": [], "val": []}
-        self.VCU_Command_Directions = {"ts": [], "val": []}
-        self.APPS1 = {"ts": [], "val": []}
-        self.APPS2 = {"ts": [], "val": []}
-        self.BSE = {"ts": [], "val": []}
-        self.Distance = {"ts": [], "val": []}
-        self.Speed = {"ts": [], "val": []}
-        self.RPM = {"ts": [], "val": []}
-        self.Motor_Temperature = {"ts": [], "val": []}
-        self.Gate_Driver_Temperature = {"ts": [], "val": []}
-        self.Module_A_Temperature = {"ts": [], "val": []}
-        self.Module_B_Temperature = {"ts": [], "val": []}
-        self.Module_C_Temperature = {"ts": [], "val": []}
-        self.Control_Board_Temperature = {"ts": [], "val": []}
-        self.Delta_Resolver = {"ts": [], "val": []}
-        self.Gyro_Acc_x = {"ts": [], "val": []}
-        self.Gyro_Acc_y = {"ts": [], "val": []}
-        self.Gyro_Acc_z = {"ts": [], "val": []}
-        self.Gyro_Ang_x = {"ts": [], "val": []}
-        self.Gyro_Ang_y = {"ts": [], "val": []}
-        self.Gyro_Ang_z = {"ts": [], "val": []}
-        self.BMS_Pack = {"ts": [], "val": []}
-        self.BMS_Segments = {"ts": [[] for _ in range(10)], "val": [[] for _ in range(10)]}
-        self.BMS_Cell = {"ts": [[] for _ in range(120)], "val": [[] for _ in range(120)]}
-        self.NTC_Segments = {"ts": [[] for _ in range(10)], "val": [[] for _ in range(10)]}
-        self.NTC_Cell = {"ts": [[] for _ in range(50)], "val": [[] for _ in range(50)]}
-        self.Steering_Angle = {"ts": [], "val": []}
-        self.Steering_Speed = {"ts": [], "val": []}
-        self.Front_Left_Linear = {"ts": [], "val": []}
-        self.Front_Right_Linear = {"ts": [], "val": []}
-        self.Rear_Left_Linear = {"ts": [], "val": []}
-        self.Rear_Right_Linear = {"ts": [], "val": []}
-        self.Front_Left_Wheel_Speed = {"ts": [], "val": []}
-        self.Front_Right_Wheel_Speed = {"ts": [], "val": []}
-        self.Rear_Left_Wheel_Speed = {"ts": [], "val": []}
-        self.Rear_Right_Wheel_Speed = {"ts": [], "val": []}
-        
-
-def parse_bms_data(data):
-    """Parse BMS message data"""
-    module_id = int(data[0:2], 16)
-    value1 = int.from_bytes(bytes.fromhex(data[4:8]), byteorder='little')
-    value2 = int.from_bytes(bytes.fromhex(data[8:12]), byteorder='little')
-    value3 = int.from_bytes(bytes.fromhex(data[12:16]), byteorder='little')
-    
-    return module_id, value1, value2, value3
+from canlog import (
+    SIGNAL_DB, CACHE_DIR, LOG_FORMATS, COMPRESSED_EXTENSIONS, LIVE_SAMPLES, LIVE_BATCH_S, Data,
+    load_dataset, iter_dataset, decode_block, extend_derived, group_frames, export_signals, pyramid,
+    load_rules, detect_events, typed_array, trace_json, LoadStats, log_extension,
+    SessionPool, Alignment, overlay, heatmap,
+    open_socketcan, read_socketcan, format_candump,
+)
+
+
+def log_file_filter():
+    """File dialog filter of the log formats, plain or compressed"""
+    patterns = " ".join("*" + ext + z for ext in LOG_FORMATS for z in ("", *COMPRESSED_EXTENSIONS))
+    return f"CAN logs ({patterns})"
 
-def load_dataset(filepath):
-    DATA = Data()
-    if not os.path.isfile(filepath):
-        return DATA
-    
-    with open(filepath, mode="r", encoding="utf-8", newline='') as f:
-        reader = csv.DictReader(f, fieldnames=["Timestamp", "ID", "Extended", "Length", "Data"])
-        next(reader)
-        base_dt = None
-        for row in reader:
-            ID = row["ID"]
-            data = row["Data"]
-            elapsed_ms = int(row["Timestamp"])       # 把秒跟毫秒拆開
-            if ID == "0x0A0":
-                a_t = int.from_bytes(bytes.fromhex(data[0:4]), byteorder="little", signed=True) / 10
-                b_t = int.from_bytes(bytes.fromhex(data[4:8]), byteorder="little", signed=True) / 10
-                c_t = int.from_bytes(bytes.fromhex(data[8:12]), byteorder="little", signed=True) / 10
-                gate_t = int.from_bytes(bytes.fromhex(data[12:16]), byteorder="little", signed=True) / 10
-                DATA.Module_A_Temperature['ts'].append(elapsed_ms)
-                DATA.Module_A_Temperature['val'].append(a_t)
-                DATA.Module_B_Temperature['ts'].append(elapsed_ms)
-                DATA.Module_B_Temperature['val'].append(b_t)
-                DATA.Module_C_Temperature['ts'].append(elapsed_ms)
-                DATA.Module_C_Temperature['val'].append(c_t)
-                DATA.Gate_Driver_Temperature['ts'].append(elapsed_ms)
-                DATA.Gate_Driver_Temperature['val'].append(gate_t)
-
-            if ID == "0x0A1":
-                value = int.from_bytes(bytes.fromhex(data[0:4]), byteorder="little", signed=True) / 10
-                DATA.Control_Board_Temperature['ts'].append(elapsed_ms)
-                DATA.Control_Board_Temperature['val'].append(value)
-
-            if ID == "0x0A2":
-                motor_t = int.from_bytes(bytes.fromhex(data[8:12]), byteorder="little", signed=True) / 10
-                DATA.Motor_Temperature['ts'].append(elapsed_ms)
-                DATA.Motor_Temperature['val'].append(motor_t)
-
-            if ID == "0x0A5":
-                rpm = int.from_bytes(bytes.fromhex(data[4:8]), byteorder="little", signed=True) * -1
-                delta_resolver = int.from_bytes(bytes.fromhex(data[12:16]), byteorder="little", signed=True)
-                speed = rpm * 0.52 * 3.14159 / 3 / 60 * 3.6  # Convert to km/h
-                try:
-                    distance = speed * (elapsed_ms - DATA.Speed['ts'][-1]) / 3600 + DATA.Distance['val'][-1]
-                except Exception as e:
-                    distance = 0
-                DATA.RPM['ts'].append(elapsed_ms)
-                DATA.RPM['val'].append(rpm)
-                DATA.Delta_Resolver['ts'].append(elapsed_ms)
-                DATA.Delta_Resolver['val'].append(delta_resolver)
-                DATA.Speed['ts'].append(elapsed_ms)
-                DATA.Speed['val'].append(speed)
-                DATA.Distance['ts'].append(elapsed_ms)
-                DATA.Distance['val'].append(distance)
-
-
-            if ID == "0x0A7":
-                dc = int.from_bytes(bytes.fromhex(data[0:4]), byteorder="little")
-                output = int.from_bytes(bytes.fromhex(data[4:8]), byteorder="little")
-                DATA.DC_Voltages['ts'].append(elapsed_ms)
-                DATA.DC_Voltages['val'].append(dc / 10)
-                DATA.Output_Voltages['ts'].append(elapsed_ms)
-                DATA.Output_Voltages['val'].append(output / 10)
-
-            if ID == "0x0A6":
-                a_current = int.from_bytes(bytes.fromhex(data[0:4]), byteorder="little", signed=True) / 10
-                b_current = int.from_bytes(bytes.fromhex(data[4:8]), byteorder="little", signed=True) / 10
-                c_current = int.from_bytes(bytes.fromhex(data[8:12]), byteorder="little", signed=True) / 10
-                dc_current = int.from_bytes(bytes.fromhex(data[12:16]), byteorder="little", signed=True) / 10
-                try:
-                    calculated_current = DATA.RPM['val'][-1] * DATA.Feedback_Torques['val'][-1] / 9550 * 1000 / DATA.DC_Voltages['val'][-1]
-                except Exception as e:
-                    calculated_current = 0
-                try:
-                    dc_power = DATA.DC_Voltages['val'][-1] * dc_current / 1000  # kW
-                except Exception as e:
-                    dc_power = 0
-                try:
-                    dc_comulative_power = DATA.DC_Comulative_Powers['val'][-1] + dc_power * (elapsed_ms - DATA.DC_Comulative_Powers['ts'][-1]) / 3600  # Wh
-                except Exception as e:
-                    dc_comulative_power = 0
-                DATA.A_Currents['ts'].append(elapsed_ms)
-                DATA.A_Currents['val'].append(a_current)
-                DATA.B_Currents['ts'].append(elapsed_ms)
-                DATA.B_Currents['val'].append(b_current)
-                DATA.C_Currents['ts'].append(elapsed_ms)
-                DATA.C_Currents['val'].append(c_current)
-                DATA.DC_Currents['ts'].append(elapsed_ms)
-                DATA.DC_Currents['val'].append(dc_current)
-                DATA.Calculated_Currents['ts'].append(elapsed_ms)
-                DATA.Calculated_Currents['val'].append(calculated_current)
-                DATA.DC_Powers['ts'].append(elapsed_ms)
-                DATA.DC_Powers['val'].append(dc_power)
-                DATA.DC_Comulative_Powers['ts'].append(elapsed_ms)
-                DATA.DC_Comulative_Powers['val'].append(dc_comulative_power)
-                try:
-                    if dc_power >= 0:
-                        dc_discharge_comulative_power = DATA.DC_Discharge_Comulative_Powers['val'][-1] + dc_power * (elapsed_ms - DATA.DC_Discharge_Comulative_Powers['ts'][-1]) / 3600
-                        dc_regeneration_comulative_power = DATA.DC_Regeneration_Comulative_Powers['val'][-1]
-                    else:
-                        dc_regeneration_comulative_power = DATA.DC_Regeneration_Comulative_Powers['val'][-1] + (-dc_power) * (elapsed_ms - DATA.DC_Regeneration_Comulative_Powers['ts'][-1]) / 3600
-                        dc_discharge_comulative_power = DATA.DC_Discharge_Comulative_Powers['val'][-1]
-                except Exception as e:
-                    dc_discharge_comulative_power = 0
-                    dc_regeneration_comulative_power = 0
-                
-                DATA.DC_Discharge_Comulative_Powers['ts'].append(elapsed_ms)
-                DATA.DC_Discharge_Comulative_Powers['val'].append(dc_discharge_comulative_power)
-                DATA.DC_Regeneration_Comulative_Powers['ts'].append(elapsed_ms)
-                DATA.DC_Regeneration_Comulative_Powers['val'].append(dc_regeneration_comulative_power)
-
-            if ID == "0x0C0":
-                command_torque = int.from_bytes(bytes.fromhex(data[0:4]), byteorder="little")
-                command_direction = int.from_bytes(bytes.fromhex(data[8:10]), byteorder="little")
-                DATA.VCU_Command_Torques['ts'].append(elapsed_ms)
-                DATA.VCU_Command_Torques['val'].append(command_torque / 10)
-                DATA.VCU_Command_Directions['ts'].append(elapsed_ms)
-                DATA.VCU_Command_Directions['val'].append(command_direction * 100)
-
-            if ID == "0x0AC":
-                command_torque = int.from_bytes(bytes.fromhex(data[0:4]), byteorder="little", signed=True)
-                feedback_torque = int.from_bytes(bytes.fromhex(data[4:8]), byteorder="little", signed=True) * -1
-                DATA.Command_Torques['ts'].append(elapsed_ms)
-                DATA.Command_Torques['val'].append(command_torque / 10)
-                DATA.Feedback_Torques['ts'].append(elapsed_ms)
-                DATA.Feedback_Torques['val'].append(feedback_torque / 10)
-
-            if ID == "0x000075A1":
-                value = int.from_bytes(bytes.fromhex(data[0:4]), byteorder="little")
-                ratio = int.from_bytes(bytes.fromhex(data[4:8]), byteorder="little")
-                DATA.APPS1['ts'].append(elapsed_ms)
-                DATA.APPS1['val'].append(value)
-
-            if ID == "0x000075A2":
-                value = int.from_bytes(bytes.fromhex(data[0:4]), byteorder="little")
-                ratio = int.from_bytes(bytes.fromhex(data[4:8]), byteorder="little")
-                DATA.APPS2['ts'].append(elapsed_ms)
-                DATA.APPS2['val'].append(value)
-
-            if ID == "0x000075B0":
-                value = int.from_bytes(bytes.fromhex(data[0:4]), byteorder="little")
-                ratio = int.from_bytes(bytes.fromhex(data[4:8]), byteorder="little")
-                DATA.BSE['ts'].append(elapsed_ms)
-                DATA.BSE['val'].append(value)
-
-            if ID == "0x4EC":
-                if DATA.Gyro_Ang_x['ts'] and elapsed_ms - DATA.Gyro_Ang_x['ts'][-1] < 100:
-                    continue
-                acc_x = int.from_bytes(bytes.fromhex(data[0:4]), byteorder="big", signed=True) / 10
-                acc_y = int.from_bytes(bytes.fromhex(data[4:8]), byteorder="big", signed=True) / 10
-                acc_z = int.from_bytes(bytes.fromhex(data[8:12]), byteorder="big", signed=True) / 10
-                DATA.Gyro_Ang_x['ts'].append(elapsed_ms)
-                DATA.Gyro_Ang_x['val'].append(acc_x)
-                DATA.Gyro_Ang_y['ts'].append(elapsed_ms)
-                DATA.Gyro_Ang_y['val'].append(acc_y)
-                DATA.Gyro_Ang_z['ts'].append(elapsed_ms)
-                DATA.Gyro_Ang_z['val'].append(acc_z)
-
-            if ID == "0x4ED":
-                if DATA.Gyro_Acc_x['ts'] and elapsed_ms - DATA.Gyro_Acc_x['ts'][-1] < 100:
-                    continue
-                ang_x = int.from_bytes(bytes.fromhex(data[0:4]), byteorder="big", signed=True) / 100
-                ang_y = int.from_bytes(bytes.fromhex(data[4:8]), byteorder="big", signed=True) / 100
-                ang_z = int.from_bytes(bytes.fromhex(data[8:12]), byteorder="big", signed=True) / 100
-                DATA.Gyro_Acc_x['ts'].append(elapsed_ms)
-                DATA.Gyro_Acc_x['val'].append(ang_x)
-                DATA.Gyro_Acc_y['ts'].append(elapsed_ms)
-                DATA.Gyro_Acc_y['val'].append(ang_y)
-                DATA.Gyro_Acc_z['ts'].append(elapsed_ms)
-                DATA.Gyro_Acc_z['val'].append(ang_z)
-
-            NUM_CMU_MODULE = 10  # Number of CMU modules
-            NUM_CELL_PER_CMU = 12  # Cells per CMU
-            NUM_NTC_PER_CMU = 5  # NTC sensors per CMU
-            BMS_CV_ID = [
-                "0x12905301",
-                "0x12905381",
-                "0x12905401",
-                "0x12905481",
-                "0x12905501",
-                "0x12905581",
-            ]
-            if ID in BMS_CV_ID:
-                module_id, cell_a_mv, cell_b_mv, cell_c_mv = parse_bms_data(data)
-                if module_id < NUM_CMU_MODULE:
-                    
-                    # Calculate cell indices based on message ID
-                    msg_idx = BMS_CV_ID.index(ID)
-                    cell_a_idx = msg_idx * 3
-                    cell_b_idx = msg_idx * 3 + 1
-                    cell_c_idx = msg_idx * 3 + 2
-
-                    
-                    # Update cell voltages
-                    if cell_a_idx < NUM_CELL_PER_CMU:
-                        DATA.BMS_Cell['ts'][module_id*NUM_CELL_PER_CMU + cell_a_idx].append(elapsed_ms)
-                        DATA.BMS_Cell['val'][module_id*NUM_CELL_PER_CMU + cell_a_idx].append(cell_a_mv)
-                    if cell_b_idx < NUM_CELL_PER_CMU:
-                        DATA.BMS_Cell['ts'][module_id*NUM_CELL_PER_CMU + cell_b_idx].append(elapsed_ms)
-                        DATA.BMS_Cell['val'][module_id*NUM_CELL_PER_CMU + cell_b_idx].append(cell_b_mv)
-                    if cell_c_idx < NUM_CELL_PER_CMU:
-                        DATA.BMS_Cell['ts'][module_id*NUM_CELL_PER_CMU + cell_c_idx].append(elapsed_ms)
-                        DATA.BMS_Cell['val'][module_id*NUM_CELL_PER_CMU + cell_c_idx].append(cell_c_mv)
-                    try:
-                        # print([i[-1] for i in DATA.BMS_Cell['val']])
-                        total_pack_voltage = sum([i[-1] for i in DATA.BMS_Cell['val']]) / 1000  # Convert mV to V
-                        # print(total_pack_voltage)
-                    except Exception as e:
-                        total_pack_voltage = 0
-                    DATA.BMS_Pack['ts'].append(elapsed_ms)
-                    DATA.BMS_Pack['val'].append(total_pack_voltage)
-                    try:
-                        total_segment_voltage = sum([i[-1] for i in DATA.BMS_Cell['val'][msg_idx // 4 * 12 : msg_idx // 4 * 12 + 12]]) / 1000
-                    except Exception as e:
-                        total_segment_voltage = 0
-                    DATA.BMS_Segments['ts'][module_id].append(elapsed_ms)
-                    DATA.BMS_Segments['val'][module_id].append(total_segment_voltage)
-
-
-            # # Process temperature messages
-            BMS_NTC_ID = [
-                "0x12905601",
-                "0x12905681"
-            ]
-            if ID in BMS_NTC_ID:
-                module_id, ntc_a, ntc_b, ntc_c = parse_bms_data(data)
-                if module_id < NUM_CMU_MODULE:
-                    # Calculate NTC indices
-                    msg_idx = BMS_NTC_ID.index(ID)
-                    ntc_a_idx = msg_idx * 3
-                    ntc_b_idx = msg_idx * 3 + 1
-                    ntc_c_idx = msg_idx * 3 + 2
-                    
-                    # Convert to Celsius (from 0.1 Kelvin units)
-                    ntc_a_deg_c = 0.1 * float(ntc_a) - 273.15
-                    ntc_b_deg_c = 0.1 * float(ntc_b) - 273.15
-                    ntc_c_deg_c = 0.1 * float(ntc_c) - 273.15
-                    
-                    # Update NTC temperatures, bypass -273.15 (invalid data)
-                    if ntc_a_idx < NUM_NTC_PER_CMU and ntc_a_deg_c != -273.15:
-                        DATA.NTC_Cell['ts'][module_id * NUM_NTC_PER_CMU + ntc_a_idx].append(elapsed_ms)
-                        DATA.NTC_Cell['val'][module_id * NUM_NTC_PER_CMU + ntc_a_idx].append(ntc_a_deg_c)
-                    if ntc_b_idx < NUM_NTC_PER_CMU and ntc_b_deg_c != -273.15:
-                        DATA.NTC_Cell['ts'][module_id * NUM_NTC_PER_CMU + ntc_b_idx].append(elapsed_ms)
-                        DATA.NTC_Cell['val'][module_id * NUM_NTC_PER_CMU + ntc_b_idx].append(ntc_b_deg_c)
-                    if ntc_c_idx < NUM_NTC_PER_CMU and ntc_c_deg_c != -273.15:
-                        DATA.NTC_Cell['ts'][module_id * NUM_NTC_PER_CMU + ntc_c_idx].append(elapsed_ms)
-                        DATA.NTC_Cell['val'][module_id * NUM_NTC_PER_CMU + ntc_c_idx].append(ntc_c_deg_c)
-                    
-                    try:
-                        avg_ntc_segment_temp = sum([v[-1] for v in DATA.NTC_Cell['val'][module_id * NUM_NTC_PER_CMU : (module_id + 1) * NUM_NTC_PER_CMU] if v]) / NUM_NTC_PER_CMU
-                    except Exception as e:
-                        avg_ntc_segment_temp = 0
-                    DATA.NTC_Segments['ts'][module_id].append(elapsed_ms)
-                    DATA.NTC_Segments['val'][module_id].append(avg_ntc_segment_temp)
-                    
-            if ID == "0x2B0":
-                data_bytes = bytes.fromhex(data)
-                angle = int.from_bytes(data_bytes[0:2], byteorder="little", signed=True) / 10
-                speed = int.from_bytes(data_bytes[2:3], byteorder="little", signed=True)
-
-                DATA.Steering_Angle['ts'].append(elapsed_ms)
-                DATA.Steering_Angle['val'].append(angle)
-                DATA.Steering_Speed['ts'].append(elapsed_ms)
-                DATA.Steering_Speed['val'].append(speed)
-                
-            if ID == "0x200":
-                data_bytes = bytes.fromhex(data)
-                front_left_linear = int.from_bytes(data_bytes[0:2], byteorder="big", signed=False) / 10
-                front_right_linear = int.from_bytes(data_bytes[2:4], byteorder="big", signed=False) / 10
-                DATA.Front_Left_Linear['ts'].append(elapsed_ms)
-                DATA.Front_Left_Linear['val'].append(front_left_linear)
-                DATA.Front_Right_Linear['ts'].append(elapsed_ms)
-                DATA.Front_Right_Linear['val'].append(front_right_linear)
-            
-            if ID == "0x300":
-                data_bytes = bytes.fromhex(data)
-                rear_left_linear = int.from_bytes(data_bytes[0:2], byteorder="big", signed=False) / 10
-                rear_right_linear = int.from_bytes(data_bytes[2:4], byteorder="big", signed=False) / 10
-                DATA.Rear_Left_Linear['ts'].append(elapsed_ms)
-                DATA.Rear_Left_Linear['val'].append(rear_left_linear)
-                DATA.Rear_Right_Linear['ts'].append(elapsed_ms)
-                DATA.Rear_Right_Linear['val'].append(rear_right_linear)
-            
-            if ID == "0x710":
-                data_bytes = bytes.fromhex(data)
-                front_left_wheel_speed = int.from_bytes(data_bytes[0:2], byteorder="big", signed=False) / 100
-                front_right_wheel_speed = int.from_bytes(data_bytes[2:4], byteorder="big", signed=False) / 100
-                DATA.Front_Left_Wheel_Speed['ts'].append(elapsed_ms)
-                DATA.Front_Left_Wheel_Speed['val'].append(front_left_wheel_speed)
-                DATA.Front_Right_Wheel_Speed['ts'].append(elapsed_ms)
-                DATA.Front_Right_Wheel_Speed['val'].append(front_right_wheel_speed)
-                
-            if ID == "0x702":
-                data_bytes = bytes.fromhex(data)
-                rear_left_wheel_speed = int.from_bytes(data_bytes[0:2], byteorder="big", signed=False) / 100
-                rear_right_wheel_speed = int.from_bytes(data_bytes[2:4], byteorder="big", signed=False) / 100
-                DATA.Rear_Left_Wheel_Speed['ts'].append(elapsed_ms)
-                DATA.Rear_Left_Wheel_Speed['val'].append(rear_left_wheel_speed)
-                DATA.Rear_Right_Wheel_Speed['ts'].append(elapsed_ms)
-                DATA.Rear_Right_Wheel_Speed['val'].append(rear_right_wheel_speed)
-                
-
-    # Convert all lists to numpy arrays before returning
-    for key, obj in DATA.__dict__.items():
-        if isinstance(obj, dict):
-            for subkey, val in obj.items():
-                try:
-                    obj[subkey] = np.array(val)
-                except Exception as e:
-                    obj[subkey] = [np.array(v) for v in val]
-    return DATA
 
 class FileLineEdit(QLineEdit):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setAcceptDrops(True)
-        self.setPlaceholderText("Drag a csv file or click here")
+        self.setPlaceholderText("Drag a log file (csv, asc, blf, candump; gz, zst, xz) or click here")
 
     def dragEnterEvent(self, event):
         urls = event.mimeData().urls()
@@ -410,9 +60,10 @@ class FileLineEdit(QLineEdit):
         if not (urls and urls[0].scheme() == 'file'):
             return
         path = urls[0].toLocalFile()
-        if not path.lower().endswith('.csv'):
+        if log_extension(path) not in LOG_FORMATS:
             QMessageBox.warning(self, "Error: Invalid File",
-                                "Only .csv files are accepted")
+                                "Only " + ", ".join(LOG_FORMATS) + " files are accepted, "
+                                "plain or compressed (" + ", ".join(COMPRESSED_EXTENSIONS) + ")")
             return
         self.setText(path)
         top = self.window()
@@ -420,7 +71,7 @@ class FileLineEdit(QLineEdit):
             top.load_file(path)
     
     def mousePressEvent(self, event):
-        file_path, _ = QFileDialog.getOpenFileName(self, "Select CSV File", "", "CSV Files (*.csv)")
+        file_path, _ = QFileDialog.getOpenFileName(self, "Select Log File", "", log_file_filter())
         if file_path:
             self.setText(file_path)
             top = self.window()
@@ -429,20 +80,257 @@ class FileLineEdit(QLineEdit):
         else:
             super().mousePressEvent(event)
 
+class CaptureThread(QThread):
+    """Decode frames from a SocketCAN interface into ring-buffered Data until
+    interrupted, optionally recording them as a candump log. `lock` guards
+    `data` against readers on other threads."""
+    error = pyqtSignal(str)
+
+    def __init__(self, interface, lock, record=None):
+        super().__init__()
+        self.interface = interface
+        self.lock = lock
+        self.record = record
+        self.data = Data(limit=LIVE_SAMPLES)
+
+    def run(self):
+        try:
+            sock = open_socketcan(self.interface)
+            rec = open(self.record, "w", encoding="ascii") if self.record else None
+        except OSError as e:
+            self.error.emit(str(e))
+            return
+        wanted = np.array(sorted(SIGNAL_DB.decoders), dtype=np.int64)
+        state = {}
+        derived = {}                # running sums of the DERIVED signals
+        row0 = 0
+        t0 = time.monotonic()
+        try:
+            while not self.isInterruptionRequested():
+                ts, key, payload = read_socketcan(sock, LIVE_BATCH_S, t0, LIVE_SAMPLES)
+                if not len(ts):
+                    continue
+                if rec is not None:
+                    rec.write(format_candump(ts, key, payload, self.interface))
+                row = np.arange(row0, row0 + len(ts), dtype=np.int64)
+                row0 += len(ts)
+                frames = group_frames(row, ts, key, payload, wanted)
+                with self.lock:
+                    decode_block(self.data, frames, state)
+                    extend_derived(self.data, derived)
+        except OSError as e:
+            self.error.emit(str(e))
+        finally:
+            sock.close()
+            if rec is not None:
+                rec.close()
+
+
+class ExportThread(QThread):
+    """Write signals of a loaded log to a Parquet / Arrow file (see export_signals)"""
+    done  = pyqtSignal(int)                 # rows written
+    error = pyqtSignal(str)
+
+    def __init__(self, data, path, names=None, t_range=None):
+        super().__init__()
+        self.data = data
+        self.path = path
+        self.names = names
+        self.t_range = t_range
+
+    def run(self):
+        try:
+            self.done.emit(export_signals(self.data, self.path, self.names, self.t_range))
+        except Exception as e:
+            self.error.emit(str(e))
+
+
 class LoadThread(QThread):
-    result = pyqtSignal(object)
-    error  = pyqtSignal(str)
+    result   = pyqtSignal(object)
+    partial  = pyqtSignal(object)           # the Data over the frames indexed so far
+    progress = pyqtSignal(object, object)   # bytes read, total bytes
+    profiled = pyqtSignal(object)           # LoadStats of the load, just before result (with `profile`)
+    error    = pyqtSignal(str)
+
+    PARTIAL_INTERVAL_S = 1.0                # how often checked traces are redrawn while loading
 
-    def __init__(self, filepath):
+    def __init__(self, filepath, profile=False):
         super().__init__()
         self.filepath = filepath
+        self.stats = LoadStats() if profile else None
 
     def run(self):
+        steps = iter_dataset(self.filepath, stats=self.stats)
         try:
-            data = load_dataset(self.filepath)
+            last = time.monotonic()
+            for data, done, total in steps:
+                if self.isInterruptionRequested():
+                    return
+                self.progress.emit(done, total)
+                if done < total and time.monotonic() - last >= self.PARTIAL_INTERVAL_S:
+                    self.partial.emit(data)
+                    last = time.monotonic()
+            if self.stats is not None:
+                self.profiled.emit(self.stats)
             self.result.emit(data)
         except Exception as e:
             self.error.emit(str(e))
+        finally:
+            steps.close()
+
+
+class DiagnosticsPanel(QWidget):
+    """Load profile of the current log (canlog.LoadStats): phases, frames and
+    decode time per CAN ID, unused IDs and skipped lines. Decode times grow
+    as signals are first plotted; Refresh shows the latest."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowFlag(Qt.Window)
+        self.setWindowTitle("Load diagnostics")
+        self.resize(520, 600)
+        self.stats = None
+        layout = QVBoxLayout(self)
+        self.text = QPlainTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setFont(QFont("Consolas", 9))
+        layout.addWidget(self.text)
+        buttons = QHBoxLayout()
+        refresh_btn = QPushButton("Refresh")
+        refresh_btn.clicked.connect(self.refresh)
+        save_btn = QPushButton("Save JSON")
+        save_btn.clicked.connect(self.save)
+        buttons.addWidget(refresh_btn)
+        buttons.addWidget(save_btn)
+        layout.addLayout(buttons)
+
+    def show_stats(self, stats):
+        self.stats = stats
+        self.refresh()
+
+    def refresh(self):
+        if self.stats is None:
+            self.text.setPlainText("Check \"Profile loading\" and open a log to see where its load time goes.")
+        else:
+            self.text.setPlainText(self.stats.format())
+
+    def save(self):
+        if self.stats is None:
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Save load profile", "", "JSON (*.json)")
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.stats.as_dict(), f, indent=2)
+
+
+class EventTable(QTableWidget):
+    """Events found by the rules (canlog.detect_events), one per row;
+    double-clicking a row asks to show it in the plot"""
+    jump = pyqtSignal(object)               # the Event of the row
+
+    COLUMNS = ["Rule", "Signal", "Start (s)", "Duration (s)", "Peak"]
+
+    def __init__(self, events, parent=None):
+        super().__init__(len(events), len(self.COLUMNS), parent)
+        self.setWindowFlag(Qt.Window)
+        self.setWindowTitle(f"Events ({len(events)})")
+        self.resize(700, 400)
+        self.setHorizontalHeaderLabels(self.COLUMNS)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.events = events
+        for row, e in enumerate(events):
+            signal = SIGNAL_DB.channel_names(e.signal)[e.channel or 0]
+            cells = [e.rule, signal, f"{e.start / 1000:.3f}", f"{e.duration / 1000:.3f}", f"{e.peak:.4g}"]
+            for col, text in enumerate(cells):
+                self.setItem(row, col, QTableWidgetItem(text))
+        self.resizeColumnsToContents()
+        self.cellDoubleClicked.connect(lambda row, col: self.jump.emit(self.events[row]))
+
+# points sent to the browser per trace at most; the rest stay in Python and
+# the visible x-range is redrawn from the signal's min/max pyramid (canlog.
+# Pyramid) on every zoom/pan
+RESAMPLE_POINTS = 3000
+
+LIVE_INTERFACE = "can0"     # default SocketCAN interface offered for live capture
+LIVE_FPS = 10               # page updates per second while capturing
+LIVE_POINTS = 20_000        # points per trace the page keeps while capturing
+
+# cell groups (BMS_Cell, NTC_Cell) in heatmap mode: one heatmap per group, a
+# time bin per this many pixels of plot width, each on a y-axis stripe of its own
+HEATMAP_PX_PER_BIN = 1
+HEATMAP_COLORSCALE = "Turbo"
+
+# line styles of the sessions overlaid for comparison, in the order checked
+SESSION_DASHES = ["dash", "dot", "dashdot", "longdash", "longdashdot"]
+
+# runs after Plotly.newPlot: forward zoom/pan to PlotBridge.relayout, and
+# update(promise, t0) to report how long an update took to draw
+BRIDGE_JS = """
+var bridge = null;
+function update(promise, t0) {
+    promise.then(function () {
+        if (bridge) bridge.rendered(performance.now() - t0);
+    });
+}
+new QWebChannel(qt.webChannelTransport, function (channel) {
+    bridge = channel.objects.bridge;
+    document.getElementById('{plot_id}').on('plotly_relayout', function (e) {
+        bridge.relayout(JSON.stringify(e));
+    });
+    bridge.ready();
+});
+"""
+
+
+def plotlyjs_dir():
+    """Directory holding plotly.min.js, copied from the plotly package on first
+    use so the page loads it from disk and needs no network"""
+    for base in (CACHE_DIR, tempfile.gettempdir()):
+        folder = os.path.join(base, f"plotlyjs-{plotly.__version__}")
+        path = os.path.join(folder, "plotly.min.js")
+        if os.path.isfile(path):
+            return folder
+        try:
+            os.makedirs(folder, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(get_plotlyjs())
+            os.replace(tmp, path)
+            return folder
+        except OSError:
+            continue
+    raise OSError("no writable directory for plotly.min.js")
+
+
+def qwebchannel_js():
+    """Source of qwebchannel.js from the QtWebChannel resources, to inline in the page"""
+    f = QFile(":/qtwebchannel/qwebchannel.js")
+    if not f.open(QIODevice.ReadOnly):
+        return ""
+    try:
+        return bytes(f.readAll()).decode("utf-8")
+    finally:
+        f.close()
+
+
+class PlotBridge(QObject):
+    """Object the page talks to through the QWebChannel"""
+    loaded     = pyqtSignal()
+    relayouted = pyqtSignal(dict)
+    drawn      = pyqtSignal(float)      # ms the browser spent on an update
+
+    @pyqtSlot()
+    def ready(self):
+        self.loaded.emit()
+
+    @pyqtSlot(str)
+    def relayout(self, payload):
+        self.relayouted.emit(json.loads(payload))
+
+    @pyqtSlot(float)
+    def rendered(self, ms):
+        self.drawn.emit(ms)
+
 
 class PlotlyWindow(QMainWindow):
     def __init__(self):
@@ -476,124 +364,154 @@ class PlotlyWindow(QMainWindow):
         # sidebar_layout.addStretch()
         main_layout.addWidget(sidebar)
 
-        # Define categories and their checkboxes
-        categories = {
-            "Voltage": [
-                "DC Voltages(V)",
-                "Output Voltages(V)",
-            ],
-            "Current": [
-                "DC Currents(A)",
-                "A Currents(A)",
-                "B Currents(A)",
-                "C Currents(A)",
-                "Calculated Currents(A)",
-            ],
-            "Power": [
-                "DC Powers(kW)",
-                "DC Comulative Powers(kWh)",
-                "DC Discharge Comulative Powers(kWh)",
-                "DC Regeneration Comulative Powers(kWh)",
-            ],
-            "Torque": [
-                "Feedback Torques(Nm)",
-                "Command Torques(Nm)",
-                "VCU Command Torques(Nm)",
-                "VCU Command Directions",
-            ],
-            "Pedal": [
-                "APPS1(mV)",
-                "APPS2(mV)",
-                "BSE(mV)",
-            ],
-            "Motor": [
-                "RPM(rpm)",
-                "Motor Temperature(°C)",
-                "Gate Driver Temperature(°C)",
-                "Module A Temperature(°C)",
-                "Module B Temperature(°C)",
-                "Module C Temperature(°C)",
-                "Control Board Temperature(°C)",
-                "Delta Resolver",
-            ],
-            "Gyro": [
-                "Gyro Acc x(°/s²)",
-                "Gyro Acc y(°/s²)",
-                "Gyro Acc z(°/s²)",
-                "Gyro Ang x(°/s²)",
-                "Gyro Ang y(°/s²)",
-                "Gyro Ang z(°/s²)",
-            ],
-            "Motion": [
-                "Speed(km/h)",
-                "Distance(km)",
-                "Steering Angle(°)",
-                "Steering Speed(°/s)",
-            ],
-            "Suspension": [
-                "Front Left Linear(mm)",
-                "Front Right Linear(mm)",
-                "Rear Left Linear(mm)",
-                "Rear Right Linear(mm)",
-                "Front Left Wheel Speed(rps)",
-                "Front Right Wheel Speed(rps)",
-                "Rear Left Wheel Speed(rps)",
-                "Rear Right Wheel Speed(rps)",
-            ],
-            "BMS": [
-                "BMS Pack(V)",
-                "BMS Segments(V)",
-                "BMS Segment 1(mV)",
-                "BMS Segment 2(mV)",
-                "BMS Segment 3(mV)",
-                "BMS Segment 4(mV)",
-                "BMS Segment 5(mV)",
-                "BMS Segment 6(mV)",
-                "BMS Segment 7(mV)",
-                "BMS Segment 8(mV)",
-                "BMS Segment 9(mV)",
-                "BMS Segment 10(mV)"
-            ],
-            "NTC" : [
-                "NTC Segments(°C)",       # ← aggregated avg-NTC per module
-                "NTC Segment 1(°C)",      # ← individual NTC sensors in module 1
-                "NTC Segment 2(°C)",
-                "NTC Segment 3(°C)",
-                "NTC Segment 4(°C)",
-                "NTC Segment 5(°C)",
-                "NTC Segment 6(°C)",
-                "NTC Segment 7(°C)",
-                "NTC Segment 8(°C)",
-                "NTC Segment 9(°C)",
-                "NTC Segment 10(°C)",
-            ],
-        }
-
+        # one collapsible group per category of the signal table
         self.CheckBoxes = []
-        for cat, items in categories.items():
+        self.checkbox_signal = {}
+        for cat, items in SIGNAL_DB.categories().items():
             cat_item = QTreeWidgetItem([cat])
             self.tree.addTopLevelItem(cat_item)
-            for label in items:
+            for label, name, module in items:
                 cb = QCheckBox(label)
                 cb.stateChanged.connect(self.plot)
                 self.tree.setItemWidget(QTreeWidgetItem(cat_item), 0, cb)
                 self.CheckBoxes.append(cb)
+                self.checkbox_signal[cb] = (name, module)
 
         # --- Plot area ---
         self.webview = QWebEngineView()
         main_layout.addWidget(self.webview, 1)
+        self.bridge = PlotBridge(self)
+        self.bridge.loaded.connect(self.on_page_ready)
+        self.bridge.relayouted.connect(self.on_relayout)
+        self.bridge.drawn.connect(self.on_drawn)
+        self.channel = QWebChannel(self)
+        self.channel.registerObject("bridge", self.bridge)
+        self.webview.page().setWebChannel(self.channel)
 
         self.setCentralWidget(widget)
 
-        self.fig = go.Figure()
+        # the page is loaded once; afterwards only changed traces are sent
+        self.fig = self.new_figure()
+        self.pending_js = []        # updates made before the page was ready
+        self.view = {}              # last zoom/pan, to aggregate new traces for it
+        self.toggle_start = None
+        # plotly.js comes from a local copy next to the page, not the CDN
+        self.webview.setHtml(self.fig.to_html(
+            include_plotlyjs='directory', div_id='plot',
+            post_script=qwebchannel_js() + BRIDGE_JS,
+        ), QUrl.fromLocalFile(plotlyjs_dir() + os.sep))
         self.data = load_dataset('')
+        self.data_path = None       # log of self.data once fully loaded
+        self.loader = None
 
         self.loaded = []
-        
-        # self.export_btn = QPushButton("Export")
-        # sidebar_layout.addWidget(self.export_btn)
-        # self.export_btn.setFixedHeight(30)
-        # self.export_btn.setFlat(True)
+        self.trace_source = {}      # trace name -> (signal name, channel index or None, session path or None)
+        self.overlay_of = {}        # overlay trace name -> name of the trace it compares with
+        self.heatmap_axis = {}      # heatmap trace name -> its y-axis ("y2", "y3", ...)
+
+        # time window: go to start..end ms or a marked lap, step through the log
+        window_row = QHBoxLayout()
+        self.window_start = QLineEdit()
+        self.window_start.setPlaceholderText("start ms")
+        self.window_end = QLineEdit()
+        self.window_end.setPlaceholderText("end ms")
+        go_btn = QPushButton("Go")
+        go_btn.clicked.connect(self.go_to_window)
+        self.window_start.returnPressed.connect(self.go_to_window)
+        self.window_end.returnPressed.connect(self.go_to_window)
+        for w in (self.window_start, self.window_end, go_btn):
+            window_row.addWidget(w)
+        sidebar_layout.addLayout(window_row)
+        marker_row = QHBoxLayout()
+        back_btn = QPushButton("◀")
+        back_btn.clicked.connect(lambda: self.seek(-1))
+        self.marker_box = QComboBox()
+        self.marker_box.setPlaceholderText("laps")
+        self.marker_box.activated.connect(self.go_to_marker)
+        next_btn = QPushButton("▶")
+        next_btn.clicked.connect(lambda: self.seek(1))
+        mark_btn = QPushButton("Mark")
+        mark_btn.clicked.connect(self.mark_window)
+        for w in (back_btn, self.marker_box, next_btn, mark_btn):
+            marker_row.addWidget(w)
+        back_btn.setFixedWidth(30)
+        next_btn.setFixedWidth(30)
+        sidebar_layout.addLayout(marker_row)
+
+        # cells of a segment checked in heatmap mode show every cell of the
+        # group (all segments) as one heatmap instead of a line per cell
+        self.heatmap_cb = QCheckBox("Cells as heatmap")
+        self.heatmap_cb.toggled.connect(self.toggle_heatmaps)
+        sidebar_layout.addWidget(self.heatmap_cb)
+
+        # export of the checked signals (all when none is) to Parquet / Arrow
+        self.exporter = None
+        self.export_zoom_cb = QCheckBox("Export zoomed range only")
+        sidebar_layout.addWidget(self.export_zoom_cb)
+        self.export_btn = QPushButton("Export")
+        sidebar_layout.addWidget(self.export_btn)
+        self.export_btn.setFixedHeight(30)
+        self.export_btn.clicked.connect(self.export)
+
+        # events of the rule table (rules.csv), jumped to from their table
+        self.events_table = None
+        self.events_btn = QPushButton("Find events")
+        sidebar_layout.addWidget(self.events_btn)
+        self.events_btn.setFixedHeight(30)
+        self.events_btn.clicked.connect(self.find_events)
+
+        # other sessions, loaded in the background and overlaid on every
+        # plotted signal, aligned by start, first event of a rule or distance
+        self.sessions = SessionPool()
+        self.session_loader = None
+        self.session_queue = []     # logs waiting for session_loader
+        self.session_reloads = set()    # evicted sessions reloaded since the comparison last changed
+        self.alignments = {}        # session path -> Alignment on self.data, None if it does not apply
+        self.align_box = QComboBox()
+        self.align_box.addItem("Align by start", ("start", None))
+        self.align_box.addItem("Align by distance", ("distance", None))
+        try:
+            rules = load_rules()
+        except (OSError, ValueError):
+            rules = []              # no event alignment without a usable rule table
+        for rule in rules:
+            self.align_box.addItem(f"Align at first: {rule.name}", ("event", rule))
+        self.align_box.currentIndexChanged.connect(self.on_align_changed)
+        sidebar_layout.addWidget(self.align_box)
+        self.session_list = QListWidget()
+        self.session_list.setMaximumHeight(100)
+        self.session_list.itemChanged.connect(lambda item: self.on_sessions_changed())
+        sidebar_layout.addWidget(self.session_list)
+        session_row = QHBoxLayout()
+        add_session_btn = QPushButton("Add sessions")
+        add_session_btn.clicked.connect(self.add_sessions)
+        remove_session_btn = QPushButton("Remove")
+        remove_session_btn.clicked.connect(self.remove_session)
+        session_row.addWidget(add_session_btn)
+        session_row.addWidget(remove_session_btn)
+        sidebar_layout.addLayout(session_row)
+
+        # live capture from a SocketCAN interface
+        self.capture = None
+        self.data_lock = threading.Lock()
+        self.live_sent = {}         # trace name -> samples of its signal already on the page
+        self.live_timer = QTimer(self)
+        self.live_timer.setInterval(1000 // LIVE_FPS)
+        self.live_timer.timeout.connect(self.on_live_tick)
+        self.record_cb = QCheckBox("Record live capture")
+        sidebar_layout.addWidget(self.record_cb)
+        self.live_btn = QPushButton("Start live capture")
+        self.live_btn.setCheckable(True)
+        self.live_btn.toggled.connect(self.toggle_live)
+        sidebar_layout.addWidget(self.live_btn)
+
+        # profile of the load, shown in the diagnostics panel
+        self.diagnostics = DiagnosticsPanel()
+        self.profile_cb = QCheckBox("Profile loading")
+        sidebar_layout.addWidget(self.profile_cb)
+        diagnostics_btn = QPushButton("Diagnostics")
+        diagnostics_btn.clicked.connect(self.show_diagnostics)
+        sidebar_layout.addWidget(diagnostics_btn)
 
         # add status‐bar progress indicator
         self.progress = QProgressBar(self)
@@ -601,26 +519,276 @@ class PlotlyWindow(QMainWindow):
         sidebar_layout.addWidget(self.progress)
 
     def load_file(self, filepath):
-        """Called by FileLineEdit when a .csv is dropped."""
-        # 1) show busy‐indicator
-        self.progress.setRange(0, 0)   # indeterminate
+        """Called by FileLineEdit when a log is dropped."""
+        # 1) stop a load still running for the previous file, or a capture;
+        #    a fully loaded one stays at hand for comparison
+        if self.data_path is not None:
+            self.sessions.add(self.data_path, self.data)
+        self.cancel_load()
+        self.live_btn.setChecked(False)
+        pooled = self.sessions.get(filepath)
+        if pooled is not None:
+            self.reset_plot(pooled)
+            self.data_path = filepath
+            return
+
+        # 2) reset UI; checked signals fill in as the new file decodes
+        self.reset_plot(load_dataset(''))
+        self.progress.setRange(0, 1000)
+        self.progress.setValue(0)
         self.progress.setVisible(True)
-        QApplication.processEvents()
 
-        # 2) start background loading
-        self.loader = LoadThread(filepath)
+        # 3) start background loading
+        self.diagnostics.show_stats(None)
+        self.loader = LoadThread(filepath, self.profile_cb.isChecked())
         self.loader.result.connect(self.on_data_loaded)
+        self.loader.partial.connect(self.on_data_partial)
+        self.loader.progress.connect(self.on_load_progress)
+        self.loader.profiled.connect(self.diagnostics.show_stats)
         self.loader.error.connect(self.on_load_error)
         self.loader.start()
 
-    def on_data_loaded(self, data):
-        # replace old data + reset UI
+    def reset_plot(self, data):
+        """Uncheck everything and show `data` on an empty plot"""
         self.data = data
-        self.fig = go.Figure()
-        self.loaded.clear()
+        self.data_path = None
+        self.alignments.clear()
+        self.session_reloads.clear()
         for cb in self.CheckBoxes:
             cb.setChecked(False)
-        self.webview.setHtml(self.fig.to_html(include_plotlyjs='cdn'))
+        self.fig = self.new_figure()
+        self.loaded.clear()
+        self.trace_source.clear()
+        self.overlay_of.clear()
+        self.heatmap_axis.clear()
+        self.live_sent.clear()
+        self.view = {}
+        self.refresh_markers()
+        self.run_js(f"Plotly.react('plot', [], {to_json_plotly(self.fig.layout)});")
+
+    def toggle_live(self, checked):
+        if not checked:
+            self.stop_capture()
+            return
+        interface, ok = QInputDialog.getText(self, "Live capture", "SocketCAN interface:", text=LIVE_INTERFACE)
+        record = None
+        if ok and self.record_cb.isChecked():
+            record, _ = QFileDialog.getSaveFileName(self, "Record capture to", "", "candump log (*.log)")
+            ok = bool(record)
+        if not ok or not interface:
+            self.live_btn.setChecked(False)
+            return
+        self.cancel_load()
+        self.capture = CaptureThread(interface, self.data_lock, record)
+        self.capture.error.connect(self.on_capture_error)
+        self.reset_plot(self.capture.data)
+        self.capture.start()
+        self.live_timer.start()
+        self.live_btn.setText(f"Stop live capture ({interface})")
+
+    def stop_capture(self):
+        if self.capture is None:
+            return
+        self.capture.error.disconnect()
+        self.capture.requestInterruption()
+        self.capture.wait()         # returns after the batch being read
+        self.capture = None
+        self.live_timer.stop()
+        self.live_btn.setText("Start live capture")
+        self.refresh_traces()       # whole ring buffer, downsampled
+
+    def on_capture_error(self, message):
+        self.live_btn.setChecked(False)
+        QMessageBox.warning(self, "Capture Error", message)
+
+    def on_live_tick(self):
+        """Append the samples captured since the last tick to their traces"""
+        index, xs, ys = [], [], []
+        with self.data_lock:
+            for k, tr in enumerate(self.fig.data):
+                name, i, _ = self.trace_source[tr.name]
+                col = getattr(self.data, name)
+                if not hasattr(col, "total"):
+                    continue            # not ring-buffered: nothing streams into it
+                total = int(col.total if i is None else col.total[i])
+                ts = col.ts if i is None else col.ts[i]
+                new = min(total - self.live_sent.get(tr.name, 0), len(ts))
+                self.live_sent[tr.name] = total
+                if new <= 0:
+                    continue
+                val = col.val if i is None else col.val[i]
+                index.append(k)
+                xs.append(ts[-new:].copy())
+                ys.append(val[-new:].copy())
+        if index:
+            self.run_js(
+                f"Plotly.extendTraces('plot', {to_json_plotly({'x': xs, 'y': ys})}, {index}, {LIVE_POINTS});"
+            )
+
+    def closeEvent(self, event):
+        self.cancel_load()
+        self.session_queue.clear()
+        if self.session_loader is not None:
+            self.session_loader.result.disconnect()
+            self.session_loader.error.disconnect()
+            self.session_loader.requestInterruption()
+            self.session_loader.wait()
+        self.live_btn.setChecked(False)
+        if self.exporter is not None:
+            self.exporter.wait()    # leave no half-written file behind
+        if self.events_table is not None:
+            self.events_table.close()
+        self.diagnostics.close()
+        super().closeEvent(event)
+
+    def export(self):
+        """Write the checked signals, or every signal when none is checked, to a
+        Parquet or Arrow IPC file; optionally only the zoomed time range"""
+        if self.capture is not None or self.loader is not None:
+            QMessageBox.information(self, "Export", "Export is available once the log has loaded and no capture runs.")
+            return
+        path, selected = QFileDialog.getSaveFileName(
+            self, "Export signals", "", "Parquet (*.parquet);;Arrow IPC (*.arrow)"
+        )
+        if not path:
+            return
+        if not os.path.splitext(path)[1]:
+            path += ".parquet" if "parquet" in selected else ".arrow"
+        names = [self.checkbox_signal[cb][0] for cb in self.CheckBoxes if cb.isChecked()]
+        t_range = self.zoomed_range() if self.export_zoom_cb.isChecked() else None
+        self.exporter = ExportThread(self.data, path, list(dict.fromkeys(names)) or None, t_range)
+        self.exporter.done.connect(lambda rows: self.on_export_done(path, rows))
+        self.exporter.error.connect(self.on_export_error)
+        self.export_btn.setEnabled(False)
+        self.exporter.start()
+
+    def on_export_done(self, path, rows):
+        self.export_btn.setEnabled(True)
+        self.exporter = None
+        self.statusBar().showMessage(f"exported {rows:,} rows to {path}", 10000)
+
+    def on_export_error(self, message):
+        self.export_btn.setEnabled(True)
+        self.exporter = None
+        QMessageBox.warning(self, "Export Error", message)
+
+    def show_diagnostics(self):
+        self.diagnostics.refresh()
+        self.diagnostics.show()
+        self.diagnostics.raise_()
+
+    def find_events(self):
+        """Run the rules over the loaded log and list what they found"""
+        if self.capture is not None or self.loader is not None:
+            QMessageBox.information(self, "Events", "Events can be searched once the log has loaded and no capture runs.")
+            return
+        try:
+            events = detect_events(self.data, load_rules())
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Events", str(e))
+            return
+        if self.events_table is not None:
+            self.events_table.close()
+        self.events_table = EventTable(events)
+        self.events_table.jump.connect(self.show_event)
+        self.events_table.show()
+        self.statusBar().showMessage(f"{len(events):,} events", 5000)
+
+    def show_event(self, event):
+        """Zoom to an event, with some context either side, and plot its signal"""
+        pad = max(event.duration // 2, 1000)
+        self.show_window(event.start - pad, event.end + pad)
+        per = SIGNAL_DB.channels.get(event.signal)
+        module = event.channel // per if event.channel is not None and per else None
+        for cb, (name, m) in self.checkbox_signal.items():
+            if name == event.signal and m == module:
+                cb.setChecked(True)
+
+    def zoomed_range(self):
+        """(start, end) ms of the zoomed x-range, None when the whole log is shown"""
+        if 'xaxis.range' in self.view:
+            start, end = self.view['xaxis.range']
+        elif 'xaxis.range[0]' in self.view:
+            start, end = self.view['xaxis.range[0]'], self.view['xaxis.range[1]']
+        else:
+            return None
+        return int(np.floor(start)), int(np.ceil(end))
+
+    def show_window(self, start, end):
+        """Zoom to start..end ms: only that window's points are aggregated and
+        sent, then the axis is moved to it"""
+        self.window_start.setText(str(start))
+        self.window_end.setText(str(end))
+        self.on_relayout({'xaxis.range': [start, end]})
+        self.run_js(f"Plotly.relayout('plot', {to_json_plotly({'xaxis.range': [start, end]})});")
+
+    def go_to_window(self):
+        try:
+            start, end = int(self.window_start.text()), int(self.window_end.text())
+        except ValueError:
+            self.statusBar().showMessage("start and end must be whole ms", 5000)
+            return
+        if end <= start:
+            self.statusBar().showMessage("end must be after start", 5000)
+            return
+        self.show_window(start, end)
+
+    def seek(self, direction):
+        """Step the zoomed window one width back (-1) or forward (1)"""
+        t_range = self.zoomed_range()
+        if t_range is None:
+            self.statusBar().showMessage("zoom in or go to a window first", 5000)
+            return
+        start, end = t_range
+        step = direction * (end - start)
+        self.show_window(start + step, end + step)
+
+    def go_to_marker(self, index):
+        name = self.marker_box.itemText(index)
+        markers = self.data.markers()
+        if name in markers:
+            self.show_window(*markers[name])
+
+    def mark_window(self):
+        """Name the zoomed window (a lap) so it can be gone back to"""
+        t_range = self.zoomed_range()
+        if t_range is None:
+            self.statusBar().showMessage("zoom to the lap to mark first", 5000)
+            return
+        default = f"Lap {len(self.data.markers()) + 1}"
+        name, ok = QInputDialog.getText(self, "Mark", "Name of the zoomed window:", text=default)
+        if not ok or not name:
+            return
+        self.data.mark(name, *t_range)
+        self.refresh_markers()
+
+    def refresh_markers(self):
+        self.marker_box.clear()
+        self.marker_box.addItems(list(self.data.markers()))
+        self.marker_box.setCurrentIndex(-1)
+
+    def cancel_load(self):
+        if self.loader is None:
+            return
+        for sig in (self.loader.result, self.loader.partial, self.loader.progress, self.loader.profiled, self.loader.error):
+            sig.disconnect()
+        self.loader.requestInterruption()
+        self.loader.wait()          # returns after the block being decoded, or PARALLEL_POLL_S with workers
+        self.loader = None
+
+    def on_load_progress(self, done, total):
+        self.progress.setValue(int(1000 * done / total) if total else 1000)
+
+    def on_data_partial(self, data):
+        self.data = data
+        self.alignments.clear()
+        self.refresh_traces()
+
+    def on_data_loaded(self, data):
+        self.data = data
+        self.data_path = self.loader.filepath
+        self.alignments.clear()
+        self.refresh_traces()
 
         # hide progress bar
         self.progress.setVisible(False)
@@ -631,116 +799,335 @@ class PlotlyWindow(QMainWindow):
         QMessageBox.warning(self, "Load Error", message)
         self.loader = None
 
-    def plot(self):
-        cb = self.sender()
-        text = cb.text()
-        text = text.find('(') != -1 and text[:text.find('(')] or text
-        
-
-        # --- BMS segment N (12 cells) with per-cell shading ---
-        if text.startswith("BMS Segment ") and text != "BMS Segments":
-            seg = int(text.split()[-1]) - 1
-            # clear old traces
-            self.fig.data = tuple(
-                tr for tr in self.fig.data
-                if not tr.name.startswith(f"Seg{seg+1}_Cell")
+    def add_sessions(self):
+        """Pick logs to compare with; they load one after the other in the
+        background and are overlaid once loaded"""
+        paths, _ = QFileDialog.getOpenFileNames(self, "Compare with", "", log_file_filter())
+        self.session_reloads.clear()
+        self.session_queue.extend(paths)
+        self.load_next_session()
+
+    def load_next_session(self):
+        while self.session_loader is None and self.session_queue:
+            path = self.session_queue.pop(0)
+            if path in self.sessions:
+                self.on_session_loaded(path, self.sessions.get(path))
+                continue
+            self.session_loader = LoadThread(path)
+            self.session_loader.result.connect(lambda data: self.on_session_loaded(path, data))
+            self.session_loader.error.connect(lambda message: self.on_session_error(path, message))
+            self.session_loader.start()
+            self.statusBar().showMessage(f"loading {os.path.basename(path)} for comparison")
+
+    def on_session_loaded(self, path, data):
+        if self.session_loader is not None:
+            self.session_loader.wait()
+            self.session_loader = None
+        self.sessions.add(path, data)
+        paths = [self.session_list.item(k).data(Qt.UserRole) for k in range(self.session_list.count())]
+        if path not in paths:
+            item = QListWidgetItem(os.path.basename(path))
+            item.setData(Qt.UserRole, path)
+            item.setToolTip(path)
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Checked)
+            self.session_list.addItem(item)
+            self.refresh_traces()
+        elif path in self.session_reloads:
+            self.refresh_traces()   # its overlays were left out while it reloaded
+        self.statusBar().showMessage(f"{len(self.sessions)} sessions, {self.sessions.nbytes() / 2**20:,.0f} MB", 5000)
+        self.load_next_session()
+
+    def on_session_error(self, path, message):
+        self.session_loader.wait()
+        self.session_loader = None
+        QMessageBox.warning(self, "Load Error", f"{os.path.basename(path)}: {message}")
+        self.load_next_session()
+
+    def remove_session(self):
+        for item in self.session_list.selectedItems():
+            self.session_list.takeItem(self.session_list.row(item))
+        self.on_sessions_changed()
+
+    def on_sessions_changed(self):
+        self.session_reloads.clear()
+        self.refresh_traces()
+
+    def pooled_session(self, path):
+        """The session of `path` if pooled, else None while it reloads in the
+        background (once per change of the comparison, so that sessions the
+        pool cannot hold together are not swapped in and out forever)"""
+        data = self.sessions.get(path)
+        if data is None and path not in self.session_reloads:
+            self.session_reloads.add(path)
+            self.session_queue.append(path)
+            QTimer.singleShot(0, self.load_next_session)    # callers may hold data_lock
+            self.statusBar().showMessage(f"reloading {os.path.basename(path)} for comparison")
+        return data
+
+    def compared_sessions(self):
+        """Paths of the checked sessions other than the plotted log"""
+        items = (self.session_list.item(k) for k in range(self.session_list.count()))
+        return [
+            item.data(Qt.UserRole) for item in items
+            if item.checkState() == Qt.Checked and item.data(Qt.UserRole) != self.data_path
+        ]
+
+    def on_align_changed(self):
+        self.alignments.clear()
+        self.on_sessions_changed()
+
+    def alignment(self, path):
+        """Alignment of session `path` on the plotted log, None (with a status
+        message) when the chosen alignment does not apply to it"""
+        if path not in self.alignments:
+            other = self.pooled_session(path)
+            if other is None:
+                return None
+            mode, rule = self.align_box.currentData()
+            try:
+                self.alignments[path] = Alignment(self.data, other, mode, rule)
+            except ValueError as e:
+                self.statusBar().showMessage(f"{os.path.basename(path)}: {e}", 5000)
+                self.alignments[path] = None
+        return self.alignments[path]
+
+    def add_overlays(self, trace, name, i=None):
+        """Add the traces of signal `name` (channel `i`) of each compared
+        session next to `trace`, in its colour with the session's dash"""
+        if self.capture is not None:
+            return                  # nothing to align a live capture with
+        for k, path in enumerate(self.compared_sessions()):
+            if self.pooled_session(path) is None or self.alignment(path) is None:
+                continue            # reloading, or the alignment does not apply
+            overlay_name = f"{trace.name} · {os.path.basename(path)}"
+            self.add_trace(
+                Scattergl(
+                    mode="lines", name=overlay_name, visible=trace.visible,
+                    line=dict(color=trace.line.color, dash=SESSION_DASHES[k % len(SESSION_DASHES)]),
+                ),
+                name, i, path,
             )
-            if cb.isChecked():
-                base_col = px.colors.qualitative.Plotly[seg % len(px.colors.qualitative.Plotly)]
-                for c in range(12):
-                    ts = self.data.BMS_Cell['ts'][seg*12 + c]
-                    val = self.data.BMS_Cell['val'][seg*12 + c]
-                    color = shade_color(base_col, c, 12)
-                    self.fig.add_trace(
-                        Scattergl(
-                            x=ts, y=val, mode="lines",
-                            name=f"Seg{seg+1}_Cell{c+1}",
-                            line=dict(color=color)
-                        )
-                    )
-            self.webview.setHtml(self.fig.to_html(include_plotlyjs='cdn'))
+            self.overlay_of[overlay_name] = trace.name
+
+    def trace_view(self, trace_name, t_range):
+        """{'x', 'y'} of a line trace, {'x', 'z'} of a heatmap, for the
+        x-range `t_range` (None: all)"""
+        name, i, path = self.trace_source[trace_name]
+        if trace_name in self.heatmap_axis:
+            columns = max(self.webview.width() // HEATMAP_PX_PER_BIN, 100)
+            t, z = heatmap(self.data, name, t_range, columns)
+            period = t[1] - t[0] if len(t) > 1 else 1
+            return {'x': t + period // 2, 'z': z}      # bins drawn centred on their middle
+        if path is None:
+            x, y = pyramid(self.data, name, i).view(t_range, RESAMPLE_POINTS)
+        else:
+            session, alignment = self.pooled_session(path), self.alignment(path)
+            if session is None or alignment is None:
+                return {'x': np.empty(0, dtype=np.int64), 'y': np.empty(0)}     # redrawn once reloaded
+            x, y = overlay(session, alignment, name, i, t_range, RESAMPLE_POINTS)
+        return {'x': x, 'y': y}
+
+    def refresh_traces(self):
+        """Rebuild every trace, and the overlays of the compared sessions,
+        from the current self.data, keeping the zoom"""
+        if not self.fig.data:
             return
+        old, self.fig = self.fig, self.new_figure()
+        sources, self.trace_source = self.trace_source, {}
+        self.overlay_of.clear()
+        for tr in old.data:
+            name, i, path = sources[tr.name]
+            if tr.name in self.heatmap_axis:
+                self.add_trace(tr.update(x=None, z=None), name)
+            elif path is None:
+                self.add_trace(tr.update(x=None, y=None), name, i)
+                self.add_overlays(self.fig.data[-1], name, i)
+        data = to_json_plotly([trace_json(tr) for tr in self.fig.data])
+        self.run_js(f"Plotly.react('plot', {data}, document.getElementById('plot').layout);")
 
-        # --- BMS Segments (10 module volt averages) ---
-        if text == "BMS Segments":
-            self.fig.data = tuple(
-                tr for tr in self.fig.data
-                if not tr.name.startswith("Module ")
-            )
-            if cb.isChecked():
-                num_mod = len(self.data.BMS_Segments['val'])
-                for m in range(num_mod):
-                    ts = self.data.BMS_Segments['ts'][m]
-                    val = self.data.BMS_Segments['val'][m]
-                    self.fig.add_trace(
-                        Scattergl(x=ts, y=val, mode="lines",
-                                  name=f"Module {m+1}")
-                    )
-            self.webview.setHtml(self.fig.to_html(include_plotlyjs='cdn'))
+    def new_figure(self):
+        return go.Figure()
+
+    def add_trace(self, trace, name, i=None, session=None):
+        """Add `trace` showing signal `name` (channel `i` of a group) of the
+        plotted log, or of comparison session `session` (its path), drawn for
+        the current zoom from the signal's pyramid"""
+        self.trace_source[trace.name] = (name, i, session)
+        with self.data_lock:
+            total = getattr(getattr(self.data, name), "total", None)
+            if self.capture is not None and total is not None:
+                self.live_sent[trace.name] = int(total if i is None else total[i])
+            view = self.trace_view(trace.name, self.zoomed_range())
+        self.fig.add_trace(trace.update(**view))
+
+    def run_js(self, js):
+        if self.pending_js is None:
+            self.webview.page().runJavaScript(js)
+        else:
+            self.pending_js.append(js)
+
+    def update_js(self, call):
+        """JS running the Plotly `call` (which returns a promise) and timing it"""
+        return f"update({call}, performance.now());"
+
+    def on_page_ready(self):
+        pending, self.pending_js = self.pending_js, None
+        for js in pending:
+            self.run_js(js)
+
+    def on_drawn(self, ms):
+        if self.toggle_start is None:
             return
+        total = (time.perf_counter() - self.toggle_start) * 1000
+        self.toggle_start = None
+        self.statusBar().showMessage(f"toggle {total:.0f} ms (draw {ms:.0f} ms)", 5000)
+
+    def on_relayout(self, relayout):
+        """Zoom/pan in the page: re-aggregate the traces for the new x-range and
+        restyle them in place"""
+        before = self.zoomed_range()
+        if any(k.startswith('xaxis') and k.endswith('.autorange') for k in relayout):
+            self.view = {}                          # autoscale: back to the full range
+        elif any(k.startswith('xaxis.range') for k in relayout):
+            self.view = {k: v for k, v in relayout.items() if k.startswith('xaxis.range')}
+        else:
+            return                                  # y-only zoom: nothing to re-aggregate
+        t_range = self.zoomed_range()
+        if t_range == before and t_range is not None:
+            return                                  # the page echoing show_window()
+        js = []
+        with self.data_lock:
+            for index, tr in enumerate(self.fig.data):
+                view = self.trace_view(tr.name, t_range)
+                tr.update(**view)
+                style = {k: [typed_array(v)] for k, v in view.items()}
+                js.append(f"Plotly.restyle('plot', {to_json_plotly(style)}, [{index}]);")
+        self.run_js("\n".join(js))
+
+    def show_traces(self, names, visible):
+        """Visibility flip of loaded traces and their overlays: no data is sent"""
+        index = [
+            k for k, tr in enumerate(self.fig.data)
+            if tr.name in names or self.overlay_of.get(tr.name) in names
+        ]
+        for k in index:
+            self.fig.data[k].visible = visible
+        self.run_js(self.update_js(
+            f"Plotly.restyle('plot', {{visible: {json.dumps(visible)}}}, {json.dumps(index)})"
+        ))
+        if names & self.heatmap_axis.keys():
+            self.layout_heatmaps()
 
-        # --- NTC segment N (5 sensors) with per-sensor shading ---
-        if text.startswith("NTC Segment ") and text != "NTC Segments":
-            seg = int(text.split()[-1]) - 1
-            # clear old traces
-            self.fig.data = tuple(
-                tr for tr in self.fig.data
-                if not tr.name.startswith(f"Seg{seg+1}_NTC")
+    def layout_heatmaps(self):
+        """Stack the visible heatmaps above the line traces, each on a
+        stripe of the plot with its own y-axis"""
+        shown = [tr.name for tr in self.fig.data if tr.name in self.heatmap_axis and tr.visible is not False]
+        height, gap = 1 / (len(shown) + 1), 0.03 if shown else 0
+        layout = {'yaxis.domain': [0, height - gap / 2]}
+        for k, trace_name in enumerate(reversed(shown), start=1):
+            layout['yaxis' + self.heatmap_axis[trace_name][1:]] = dict(
+                domain=[k * height + gap / 2, (k + 1) * height],
+                anchor='x', autorange='reversed', showticklabels=False,
             )
-            if cb.isChecked():
-                base_col = px.colors.qualitative.Plotly[seg % len(px.colors.qualitative.Plotly)]
-                for i in range(5):
-                    ts = self.data.NTC_Cell['ts'][seg*5 + i]
-                    val = self.data.NTC_Cell['val'][seg*5 + i]
-                    color = shade_color(base_col, i, 5)
-                    self.fig.add_trace(
-                        Scattergl(
-                            x=ts, y=val, mode="lines",
-                            name=f"Seg{seg+1}_NTC{i+1}",
-                            line=dict(color=color)
-                        )
-                    )
-            self.webview.setHtml(self.fig.to_html(include_plotlyjs='cdn'))
+        self.fig.update_layout(layout)
+        self.run_js(f"Plotly.relayout('plot', {to_json_plotly(layout)});")
+
+    def toggle_heatmaps(self):
+        """Redraw the checked cell segments as heatmaps or as lines"""
+        for cb, (name, module) in self.checkbox_signal.items():
+            if module is not None and name in SIGNAL_DB.channels and cb.isChecked():
+                self.plot_group(cb, SIGNAL_DB.groups[name][0], module)
+
+    def plot_heatmap(self, sig):
+        """The heatmap of every cell of `sig`'s group, shown in heatmap mode
+        while any of its segments is checked"""
+        trace_name = sig.category + " heatmap"
+        checked = self.heatmap_cb.isChecked() and any(
+            other.isChecked() for other, (name, module) in self.checkbox_signal.items()
+            if name == sig.name and module is not None
+        )
+        if trace_name in self.trace_source:
+            self.show_traces({trace_name}, checked)
+            return
+        if not checked:
             return
+        axis = f"y{len(self.heatmap_axis) + 2}"
+        self.heatmap_axis[trace_name] = axis
+        self.add_trace(
+            go.Heatmap(
+                name=trace_name, y=SIGNAL_DB.channel_names(sig.name), yaxis=axis,
+                colorscale=HEATMAP_COLORSCALE, hoverongaps=False,
+                colorbar=dict(title=sig.unit, len=0.3, y=1 - 0.35 * (len(self.heatmap_axis) - 1), yanchor='top'),
+            ),
+            sig.name,
+        )
+        self.add_traces(self.fig.data[-1:])
+        self.layout_heatmaps()
 
-        # --- NTC Segments (avg-NTC per module) ---
-        if text == "NTC Segments":
-            self.fig.data = tuple(
-                tr for tr in self.fig.data
-                if not tr.name.startswith("NTC Module ")
-            )
-            if cb.isChecked():
-                num_mod = len(self.data.NTC_Segments['val'])
-                for m in range(num_mod):
-                    ts = self.data.NTC_Segments['ts'][m]
-                    val = self.data.NTC_Segments['val'][m]
-                    self.fig.add_trace(
-                        Scattergl(x=ts, y=val, mode="lines",
-                                  name=f"NTC Module {m+1}")
-                    )
-            self.webview.setHtml(self.fig.to_html(include_plotlyjs='cdn'))
+    def add_traces(self, traces):
+        """Send the downsampled view of new traces (already in self.fig)"""
+        data = to_json_plotly([trace_json(tr) for tr in traces])
+        self.run_js(self.update_js(f"Plotly.addTraces('plot', {data})"))
+
+    def plot(self):
+        cb = self.sender()
+        self.toggle_start = time.perf_counter()
+        name, module = self.checkbox_signal[cb]
+        sig = SIGNAL_DB.groups[name][0]
+        if sig.mux:
+            self.plot_group(cb, sig, module)
             return
 
-        # --- all other signals (single trace) ---
-        key = text.replace(" ", "_")
+        # --- single-trace signals ---
+        text = cb.text()
+        text = text.find('(') != -1 and text[:text.find('(')] or text
         if cb.isChecked():
             if text in self.loaded:
-                for tr in self.fig.data:
-                    if tr.name == text:
-                        tr.visible = True
+                self.show_traces({text}, True)
             else:
-                _D = getattr(self.data, key)
-                self.fig.add_trace(
-                    Scattergl(x=_D['ts'], y=_D['val'],
-                              mode='lines', name=text)
-                )
+                before = len(self.fig.data)
+                self.add_trace(Scattergl(mode='lines', name=text), name)
+                self.add_overlays(self.fig.data[-1], name)
                 self.loaded.append(text)
+                self.add_traces(self.fig.data[before:])
         else:
-            for tr in self.fig.data:
-                if tr.name == text:
-                    tr.visible = False
+            self.show_traces({text}, False)
 
-        self.webview.setHtml(self.fig.to_html(include_plotlyjs='cdn'))
+    def plot_group(self, cb, sig, module):
+        """Traces of a multiplexed group: every channel of one module (shaded
+        from the module's colour), or one trace per module for per-module
+        aggregates such as BMS Segments"""
+        if module is None:
+            traces = [(sig.trace.format(module=m + 1), m, None) for m in range(sig.mux)]
+        else:
+            n = SIGNAL_DB.channels[sig.name]
+            base_col = px.colors.qualitative.Plotly[module % len(px.colors.qualitative.Plotly)]
+            traces = [
+                (sig.trace.format(module=module + 1, channel=c + 1), module * n + c, shade_color(base_col, c, n))
+                for c in range(n)
+            ]
+        names = {t[0] for t in traces}
+        if module is not None and sig.name in SIGNAL_DB.channels and self.capture is None:
+            self.plot_heatmap(sig)
+            if self.heatmap_cb.isChecked():
+                if names & self.trace_source.keys():
+                    self.show_traces(names & self.trace_source.keys(), False)
+                return
+        if names <= self.trace_source.keys():
+            self.show_traces(names, cb.isChecked())
+        elif cb.isChecked():
+            before = len(self.fig.data)
+            for trace_name, i, color in traces:
+                self.add_trace(
+                    Scattergl(
+                        mode="lines", name=trace_name,
+                        line=dict(color=color) if color else None
+                    ),
+                    sig.name, i
+                )
+                self.add_overlays(self.fig.data[-1], sig.name, i)
+            self.add_traces(self.fig.data[before:])
 
 # helper to darken/lighten a hex color
 def darken_color(hex_str, factor):
@@ -757,6 +1144,7 @@ def shade_color(hex_str, idx, total, min_factor=0.3):
     return darken_color(hex_str, factor)
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()   # decode workers of the packaged exe
     app = QApplication(sys.argv)
     app.setFont(QFont("Segoe UI", 9))
     win = PlotlyWindow()